@@ -1,18 +1,29 @@
-import os, uuid, mimetypes
+import os, uuid, mimetypes, random
 from flask import (
     Flask, render_template, request,
     redirect, url_for, session, flash,
-    send_file, abort
+    send_file, abort, jsonify, Response
 )
 from werkzeug.utils import secure_filename
+from bson.errors import InvalidId
 from dotenv import load_dotenv
 
-from core.pipeline import Pipeline
+from core.pipeline import Pipeline, pipeline_config_from_env
 from core.video_pipeline import VideoPipeline
-from core.db import MongoDB
-from core.pdf_report import generate_forensic_pdf
+from core.db import MongoDB, VIDEO_PAYLOAD_FIELDS, TRACE_FIELD
+from core.jobs import JobQueue, job_status
+from core.cache import ResultCache, LRUCache, DiskCache, MongoCache
+from core.models import registry as models
+from core.video.hash_utils import save_and_hash
+from core.video.remux import remux_faststart, playback_path
+from core.derivatives import DERIVATIVE_WIDTHS, SPRITE_FILE, ensure_derivative
+from core.pdf_report import generate_forensic_pdf, TEMPLATE_VERSION as IMAGE_PDF_VERSION
 # ✅ NEW IMPORT
-from core.video_pdf_report import generate_video_pdf
+from core.video_pdf_report import generate_video_pdf, TEMPLATE_VERSION as VIDEO_PDF_VERSION
+from core.report_cache import PdfCache
+from core.inference.client import register_remote
+from core.metrics import metrics, timed
+from core.trace import waterfall
 
 # -----------------------------------
 #           INIT
@@ -44,16 +55,84 @@ VIDEO_EXTENSIONS = {".mp4", ".avi", ".mov", ".mkv"}
 for d in (UPLOAD_DIR, OUTPUT_DIR, REPORT_DIR, VIDEO_DIR):
     os.makedirs(d, exist_ok=True)
 
+# Evidence files never change once written (unique names), so browsers
+# may cache them; "private" keeps shared proxies from storing them.
+MEDIA_MAX_AGE = int(os.getenv("MEDIA_MAX_AGE", 86400))
+# Thumbnails / previews / sprites are derived from immutable evidence
+DERIVATIVE_MAX_AGE = 365 * 86400
+
+# Per-case performance traces: opt-in per upload, or a random sample of
+# cases; slow traced cases (>= TRACE_PROFILE_SEC) keep a sampling profile
+TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", 0))
+TRACE_PROFILE_SEC = float(os.getenv("TRACE_PROFILE_SEC", 0)) or None
+
 # Core services
-pipeline = Pipeline(
-    os.getenv("YOLO_WEIGHTS"),
-    os.getenv("CAPTION_MODEL"),
-    OUTPUT_DIR
+db = MongoDB()
+db.ensure_indexes()
+
+# Result cache: bounded memory LRU + optional persistent tier
+CACHE_BACKEND = os.getenv("RESULT_CACHE", "memory")
+if CACHE_BACKEND == "mongo":
+    persistent_cache = MongoCache(db.db.result_cache)
+elif CACHE_BACKEND == "disk":
+    persistent_cache = DiskCache(
+        os.getenv("RESULT_CACHE_DIR", "data/cache"),
+        max_bytes=int(os.getenv("RESULT_CACHE_MAX_MB", 512)) * 1024 * 1024
+    )
+else:
+    persistent_cache = None
+
+result_cache = ResultCache(
+    memory=LRUCache(int(os.getenv("RESULT_CACHE_ENTRIES", 256))),
+    persistent=persistent_cache
 )
 
-video_pipeline = VideoPipeline(pipeline, OUTPUT_DIR)
+# Models / options from the environment (same helper as the inference server)
+pipeline = Pipeline(cache=result_cache, **pipeline_config_from_env(OUTPUT_DIR))
+
+# Shared inference server (python -m core.inference.server): models are
+# loaded once there and calls from every worker are micro-batched
+INFERENCE_SOCKET = os.getenv("INFERENCE_SOCKET")
+if INFERENCE_SOCKET:
+    register_remote(models, INFERENCE_SOCKET)
+
+# Load models in the background so /health answers immediately
+if os.getenv("MODEL_WARMUP", "1") == "1":
+    models.warm_up()
+
+video_pipeline = VideoPipeline(
+    pipeline,
+    OUTPUT_DIR,
+    batch_size=int(os.getenv("DETECT_BATCH_SIZE", 8)),
+    caption_mode=os.getenv("CAPTION_VIDEO_MODE", "short"),
+    keyframes={
+        "threshold": float(os.getenv("KEYFRAME_THRESHOLD", 0.08)),
+        "min_gap": float(os.getenv("KEYFRAME_MIN_GAP", 0.0)),
+        "max_gap": float(os.getenv("KEYFRAME_MAX_GAP", 2.0))
+    } if os.getenv("KEYFRAME_MODE", "0") == "1" else None,
+    detect_interval=int(os.getenv("DETECT_INTERVAL", 1)),
+    frame_workers=int(os.getenv("FRAME_WORKERS", 1)),
+    worker_threads=int(os.getenv("FRAME_WORKER_THREADS", 0)) or None
+)
 
-db = MongoDB()
+if video_pipeline.frame_pool and os.getenv("MODEL_WARMUP", "1") == "1":
+    video_pipeline.frame_pool.warm_up()
+
+# Rendered PDF reports, keyed by case content + template version
+pdf_cache = PdfCache(REPORT_DIR)
+pdf_cache.register("image", generate_forensic_pdf, IMAGE_PDF_VERSION)
+pdf_cache.register("video", generate_video_pdf, VIDEO_PDF_VERSION)
+
+# Split-out case fields the PDF reports render
+PDF_PAYLOAD_FIELDS = ("timeline", "license_plates")
+
+# Background analysis: images and videos run in separate lanes so a
+# quick image case never waits behind a long video.
+jobs = JobQueue(db, lanes={
+    "image": int(os.getenv("JOB_IMAGE_WORKERS", 2)),
+    "video": int(os.getenv("JOB_VIDEO_WORKERS", 1)),
+    "media": int(os.getenv("JOB_MEDIA_WORKERS", 1))
+})
 
 # -----------------------------------
 #           HELPERS
@@ -65,6 +144,112 @@ def allowed_image(filename):
 def allowed_video(filename):
     return os.path.splitext(filename.lower())[1] in VIDEO_EXTENSIONS
 
+def wants_trace():
+    return request.form.get("trace") == "1" or random.random() < TRACE_SAMPLE_RATE
+
+def send_media(path, mimetype, max_age=MEDIA_MAX_AGE, immutable=False):
+    """send_file with byte ranges, conditional GET (ETag / Last-Modified) and caching."""
+    resp = send_file(path, mimetype=mimetype, conditional=True, etag=True, max_age=max_age)
+    resp.cache_control.public = False
+    resp.cache_control.private = True
+    resp.cache_control.immutable = immutable
+    return resp
+
+def send_derivative(path):
+    if not path or not os.path.exists(path):
+        abort(404)
+    return send_media(path, "image/webp", max_age=DERIVATIVE_MAX_AGE, immutable=True)
+
+def perf_view(case):
+    """Waterfall of the case's performance trace (None if it was not traced)."""
+    trace = case.get(TRACE_FIELD)
+    return waterfall(trace) if trace else None
+
+def owned_video_case(case_id):
+    """The signed-in user's video case, or a 403 / 404 abort."""
+    if "user" not in session:
+        abort(403)
+    case = db.get_case(case_id, session["user"])
+    if not case or case.get("type") != "video":
+        abort(404)
+    return case
+
+# -----------------------------------
+#           JOB HANDLERS
+# -----------------------------------
+
+def process_image_job(job, progress):
+    progress("analyzing", 0, 1)
+
+    # AI Pipeline (upload bytes stay in memory; the file is the fallback)
+    result = pipeline.run(
+        job["payload"]["upload_path"],
+        data=job.get("attachment"),
+        trace=job["payload"].get("trace", False),
+        profile_after=TRACE_PROFILE_SEC
+    )
+    annotated_path = result["evidence"]["annotated_image"]
+    result["evidence"]["image_filename"] = os.path.basename(annotated_path)
+
+    progress("reporting", 1, 1)
+    db.save_case({
+        "case_id": result["case"]["case_id"],
+        "user": job["user"],
+        "type": "image",
+        **result
+    }, split=(TRACE_FIELD,))
+
+    jobs.submit("pdf", job["user"], {"case_id": result["case"]["case_id"]})
+    return {"case_id": result["case"]["case_id"], "type": "image"}
+
+def process_video_job(job, progress):
+    filename = job["payload"]["filename"]
+    video_path = job["payload"]["video_path"]
+
+    # Video Pipeline
+    result = video_pipeline.run(
+        video_path,
+        progress=progress,
+        video_sha256=job["payload"].get("video_sha256"),
+        trace=job["payload"].get("trace", False),
+        profile_after=TRACE_PROFILE_SEC
+    )
+
+    result["video"] = {
+        "filename": filename,
+        "path": video_path
+    }
+    result["type"] = "video"
+    result["user"] = job["user"]
+
+    # Per-frame data (timeline, frame lists, hashes) is stored separately
+    db.save_case({
+        "case_id": result["case"]["case_id"],
+        "user": job["user"],
+        **result
+    }, split=VIDEO_PAYLOAD_FIELDS)
+
+    jobs.submit("pdf", job["user"], {"case_id": result["case"]["case_id"]})
+    return {"case_id": result["case"]["case_id"], "type": "video"}
+
+def process_remux_job(job, progress):
+    # Playback copy only; analysis and custody always use the original
+    remuxed = remux_faststart(job["payload"]["video_path"])
+    return {"remuxed": os.path.basename(remuxed) if remuxed else None}
+
+def process_pdf_job(job, progress):
+    # Pre-render so the first download is already a cache hit
+    case = db.get_case(job["payload"]["case_id"], job["user"], payload=PDF_PAYLOAD_FIELDS)
+    if case:
+        pdf_cache.get(case)
+    return {"case_id": job["payload"]["case_id"], "type": "pdf"}
+
+jobs.register("image", process_image_job, lane="image")
+jobs.register("video", process_video_job, lane="video")
+jobs.register("remux", process_remux_job, lane="media")
+jobs.register("pdf", process_pdf_job, lane="media")
+jobs.start()
+
 # -----------------------------------
 #           AUTH
 # -----------------------------------
@@ -100,8 +285,17 @@ def dashboard():
     if "user" not in session:
         return redirect(url_for("login"))
 
-    cases = db.get_cases_by_user(session["user"])
-    return render_template("dashboard.html", cases=cases)
+    before = request.args.get("before")
+    try:
+        cases, next_cursor = db.get_case_summaries(session["user"], before=before)
+    except (ValueError, InvalidId):
+        # Malformed / stale cursor: fall back to the newest cases
+        before = None
+        cases, next_cursor = db.get_case_summaries(session["user"])
+
+    return render_template(
+        "dashboard.html", cases=cases, next_cursor=next_cursor, paged=bool(before)
+    )
 
 # -----------------------------------
 #        IMAGE INVESTIGATION
@@ -125,21 +319,17 @@ def new_case():
 
         filename = f"{uuid.uuid4().hex}_{secure_filename(f.filename)}"
         upload_path = os.path.join(UPLOAD_DIR, filename)
-        f.save(upload_path)
-
-        # AI Pipeline
-        result = pipeline.run(upload_path)
-        annotated_path = result["evidence"]["annotated_image"]
-        result["evidence"]["image_filename"] = os.path.basename(annotated_path)
-
-        db.save_case({
-            "case_id": result["case"]["case_id"],
-            "user": session["user"],
-            "type": "image",
-            **result
-        })
 
-        return redirect(url_for("view_case", case_id=result["case"]["case_id"]))
+        # Read the upload once: the same bytes are stored and analysed
+        data = f.read()
+        with open(upload_path, "wb") as out:
+            out.write(data)
+
+        job_id = jobs.submit("image", session["user"], {
+            "upload_path": upload_path,
+            "trace": wants_trace()
+        }, attachment=data)
+        return redirect(url_for("view_job", job_id=job_id))
 
     return render_template("new_case.html")
 
@@ -165,28 +355,60 @@ def new_video_case():
 
         filename = f"{uuid.uuid4().hex}_{secure_filename(v.filename)}"
         video_path = os.path.join(VIDEO_DIR, filename)
-        v.save(video_path)
-
-        # Video Pipeline
-        result = video_pipeline.run(video_path)
+        # Chain of custody: hash the upload while it is written
+        with timed("upload"):
+            video_sha256 = save_and_hash(v.stream, video_path)
 
-        result["video"] = {
+        job_id = jobs.submit("video", session["user"], {
             "filename": filename,
-            "path": video_path
-        }
-        result["type"] = "video"
-        result["user"] = session["user"]
-
-        db.save_case({
-            "case_id": result["case"]["case_id"],
-            "user": session["user"],
-            **result
+            "video_path": video_path,
+            "video_sha256": video_sha256,
+            "trace": wants_trace()
         })
-
-        return redirect(url_for("view_video_case", case_id=result["case"]["case_id"]))
+        jobs.submit("remux", session["user"], {"video_path": video_path})
+        return redirect(url_for("view_job", job_id=job_id))
 
     return render_template("new_video_case.html")
 
+# -----------------------------------
+#           JOB STATUS
+# -----------------------------------
+
+@app.route("/jobs/<job_id>")
+def view_job(job_id):
+    if "user" not in session:
+        return redirect(url_for("login"))
+
+    job = jobs.get(job_id, session["user"])
+    if not job:
+        flash("Job not found")
+        return redirect(url_for("dashboard"))
+
+    status = job_status(job)
+    if status["state"] == "done" and status["case_id"]:
+        return redirect(_report_url(job["kind"], status["case_id"]))
+
+    return render_template("processing.html", job=status)
+
+@app.route("/jobs/<job_id>/status")
+def job_status_api(job_id):
+    if "user" not in session:
+        abort(403)
+
+    job = jobs.get(job_id, session["user"])
+    if not job:
+        abort(404)
+
+    status = job_status(job)
+    if status["state"] == "done" and status["case_id"]:
+        status["report_url"] = _report_url(job["kind"], status["case_id"])
+    return jsonify(status)
+
+def _report_url(kind, case_id):
+    if kind == "video":
+        return url_for("view_video_case", case_id=case_id)
+    return url_for("view_case", case_id=case_id)
+
 # -----------------------------------
 #           VIEW REPORTS
 # -----------------------------------
@@ -196,24 +418,27 @@ def view_case(case_id):
     if "user" not in session:
         return redirect(url_for("login"))
 
-    case = db.get_case(case_id, session["user"])
+    case = db.get_case(case_id, session["user"], payload=(TRACE_FIELD,))
     if not case:
         flash("Case not found")
         return redirect(url_for("dashboard"))
 
-    return render_template("report.html", result=case)
+    return render_template("report.html", result=case, perf=perf_view(case))
 
 @app.route("/case/<case_id>/video")
 def view_video_case(case_id):
     if "user" not in session:
         return redirect(url_for("login"))
 
-    case = db.get_case(case_id, session["user"])
+    case = db.get_case(
+        case_id, session["user"],
+        payload=("timeline", "license_plates", "evidence.frames", TRACE_FIELD)
+    )
     if not case or case.get("type") != "video":
         flash("Video case not found")
         return redirect(url_for("dashboard"))
 
-    return render_template("video_report.html", result=case)
+    return render_template("video_report.html", result=case, perf=perf_view(case))
 
 # -----------------------------------
 #        VIEW ASSETS (SECURE)
@@ -225,24 +450,28 @@ def view_image(filename):
     if not os.path.exists(safe_path):
         abort(404)
     mime, _ = mimetypes.guess_type(safe_path)
-    return send_file(safe_path, mimetype=mime or "image/jpeg")
+    return send_media(safe_path, mime or "image/jpeg")
 
 @app.route("/video/<filename>")
 def view_video(filename):
     safe_path = os.path.join(VIDEO_DIR, filename)
     if not os.path.exists(safe_path):
         abort(404)
-    mime, _ = mimetypes.guess_type(safe_path)
-    return send_file(safe_path, mimetype=mime or "video/mp4")
 
-@app.route("/video/frame/<case_id>/<filename>")
-def view_video_frame(case_id, filename):
-    if "user" not in session:
-        abort(403)
+    # Faststart remux when ready, so playback and seeking start at once
+    path = playback_path(safe_path)
+    mime, _ = mimetypes.guess_type(path)
+    return send_media(path, mime or "video/mp4")
 
-    case = db.get_case(case_id, session["user"])
-    if not case or case.get("type") != "video":
+@app.route("/view/<kind>/<filename>")
+def view_image_derivative(kind, filename):
+    if kind not in DERIVATIVE_WIDTHS:
         abort(404)
+    return send_derivative(ensure_derivative(OUTPUT_DIR, filename, kind))
+
+@app.route("/video/frame/<case_id>/<filename>")
+def view_video_frame(case_id, filename):
+    case = owned_video_case(case_id)
 
     # Use the frames_dir path stored in the DB to locate the frame
     frames_dir = case["evidence"]["frames_dir"]
@@ -251,7 +480,19 @@ def view_video_frame(case_id, filename):
     if not os.path.exists(frame_path):
         abort(404)
 
-    return send_file(frame_path, mimetype="image/jpeg")
+    return send_media(frame_path, "image/jpeg")
+
+@app.route("/video/frame/<case_id>/<kind>/<filename>")
+def view_video_frame_derivative(case_id, kind, filename):
+    if kind not in DERIVATIVE_WIDTHS:
+        abort(404)
+    case = owned_video_case(case_id)
+    return send_derivative(ensure_derivative(case["evidence"]["frames_dir"], filename, kind))
+
+@app.route("/video/sprite/<case_id>")
+def view_video_sprite(case_id):
+    case = owned_video_case(case_id)
+    return send_derivative(os.path.join(case["evidence"]["frames_dir"], SPRITE_FILE))
 
 # -----------------------------------
 #           UTILS
@@ -261,6 +502,7 @@ def view_video_frame(case_id, filename):
 def delete_case(case_id):
     if "user" in session:
         db.delete_case(case_id, session["user"])
+        pdf_cache.discard(case_id)
         flash("Case deleted")
     return redirect(url_for("dashboard"))
 
@@ -270,24 +512,63 @@ def download_pdf(case_id):
     if "user" not in session:
         return redirect(url_for("login"))
 
-    case = db.get_case(case_id, session["user"])
+    case = db.get_case(case_id, session["user"], payload=PDF_PAYLOAD_FIELDS)
     if not case:
         flash("Case not found")
         return redirect(url_for("dashboard"))
 
-    pdf_path = os.path.join(REPORT_DIR, f"{case_id}.pdf")
+    # Rendered once per case version; concurrent clicks share one render
+    pdf_path, etag = pdf_cache.get(case)
 
-    # Hook: Check type and call correct generator
-    if case.get("type") == "video":
-        generate_video_pdf(case, pdf_path)
-    else:
-        generate_forensic_pdf(case, pdf_path)
-
-    return send_file(pdf_path, as_attachment=True)
+    resp = send_file(
+        pdf_path,
+        as_attachment=True,
+        download_name=f"{case_id}.pdf",
+        conditional=True,
+        etag=etag
+    )
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True     # revalidate with If-None-Match
+    return resp
 
 @app.route("/health")
 def health():
-    return {"status": "Oracle Forensic System running"}
+    status = models.status()
+    return {
+        "status": "Oracle Forensic System running",
+        "models_ready": all(m["state"] == "ready" for m in status.values()),
+        "models": status
+    }
+
+# Scrape-time gauges; stage / job histograms are recorded where they run
+metrics.gauge(
+    "oracle_job_queue_depth", "Queued (not started) jobs per lane",
+    lambda: {(lane,): n for lane, n in jobs.depth().items()}, labels=("lane",)
+)
+metrics.gauge(
+    "oracle_result_cache_hit_rate", "Result cache hits per lookup (all tiers)",
+    lambda: result_cache.stats()["hit_rate"]
+)
+metrics.gauge(
+    "oracle_result_cache_hits", "Result cache hits per tier",
+    lambda: {(tier,): t["hits"] for tier, t in result_cache.stats()["tiers"].items()}, labels=("tier",)
+)
+metrics.gauge(
+    "oracle_pdf_cache_events", "PDF report cache hits and renders",
+    lambda: {(event,): n for event, n in pdf_cache.stats.items()}, labels=("event",)
+)
+metrics.gauge(
+    "oracle_model_load_seconds", "Time taken to load each model",
+    lambda: {(name,): s["load_sec"] for name, s in models.status().items()}, labels=("model",)
+)
+metrics.gauge(
+    "oracle_model_ready", "1 if the model is loaded",
+    lambda: {(name,): int(s["state"] == "ready") for name, s in models.status().items()}, labels=("model",)
+)
+
+@app.route("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
 
 if __name__ == "__main__":
     app.run(port=5001, debug=True)
\ No newline at end of file
@@ -0,0 +1,141 @@
+# bench_captioner.py
+# Regression harness for the optimized captioning modes: captions, the
+# RULE 2 crash-word input and the resulting fault allocation of each
+# variant are compared with the fp32 model on the sample images (and
+# optionally video frames), along with caption latency.
+#
+#   python bench_captioner.py
+#   python bench_captioner.py --variants int8 int8:288 fp32:288 --traced --video clip.mp4
+#
+# A variant is "<precision>[:<image size>]". Exits non-zero if any variant
+# changes a crash-word count or a fault allocation, so a caption setting
+# cannot silently change fault outcomes.
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from dotenv import load_dotenv
+
+from core.captioner import Captioner
+from core.pipeline import Pipeline
+from core.geometry import PairGeometry
+from core.reasoning import (
+    crash_word_hits,
+    fault_score,
+    verification_layer,
+    normalize_fault,
+    is_vehicle
+)
+from bench_detector_backends import load_images
+
+MODES = ("full", "short")
+FAULT_TOLERANCE = 0.5     # percentage points
+
+
+def parse_variant(spec):
+    precision, _, size = spec.partition(":")
+    return {"precision": precision, "image_size": int(size) if size else None}
+
+
+def token_jaccard(a, b):
+    a, b = set(a.lower().split()), set(b.lower().split())
+    return len(a & b) / len(a | b) if a | b else 1.0
+
+
+def fault_allocation(pipeline, objects, raw_caption):
+    """Same steps as Pipeline.analyse; persons do not affect the fault rules."""
+    geometry = PairGeometry([o["box"] for o in objects if is_vehicle(o)])
+    scene, _ = pipeline._scene_caption(objects, [], raw_caption, geometry)
+    verified = verification_layer(fault_score(objects, scene, geometry), objects, geometry)
+    return normalize_fault(verified)
+
+
+def caption_all(captioner, images, mode, batch_size):
+    frames = [img for _, img in images]
+    captioner.caption_batch(frames[:1], mode=mode)     # warm-up (and trace)
+
+    single = []
+    for frame in frames:
+        start = time.perf_counter()
+        captioner.caption_batch([frame], mode=mode)
+        single.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    captions = captioner.caption_batch(frames, mode=mode, batch_size=batch_size)
+    batch_ms = (time.perf_counter() - start) * 1000 / len(frames)
+    return captions, statistics.median(single), batch_ms
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Captioner regression vs fp32")
+    parser.add_argument("--model", default=os.getenv("CAPTION_MODEL", "Salesforce/blip-image-captioning-base"))
+    parser.add_argument("--weights", default=os.getenv("YOLO_WEIGHTS", "yolov8n.pt"))
+    parser.add_argument("--variants", nargs="+", default=["int8", "int8:288"])
+    parser.add_argument("--traced", action="store_true", help="trace the vision encoder in every variant")
+    parser.add_argument("--samples", default="data/samples")
+    parser.add_argument("--video", help="also sample frames from this video")
+    parser.add_argument("--batch-size", type=int, default=8)
+    args = parser.parse_args()
+
+    images = load_images(args.samples, args.video)
+    if not images:
+        sys.exit(f"No sample images in {args.samples}")
+
+    # Detector only: objects feed the geometry part of the fault rules
+    pipeline = Pipeline(args.weights, args.model, tempfile.mkdtemp(prefix="bench_captioner_"))
+    objects = [pipeline.detector.detect(img) for _, img in images]
+    print(f"{len(images)} images, caption model {args.model}\n")
+
+    reference = Captioner(args.model)
+    ref = {mode: caption_all(reference, images, mode, args.batch_size) for mode in MODES}
+
+    print(f"{'variant':<16} {'mode':<6} {'p50 ms':>8} {'batch ms/img':>12} {'speedup':>8} "
+          f"{'exact':>6} {'jaccard':>8} {'rule2 diff':>10} {'fault diff':>10}")
+    for mode in MODES:
+        _, p50, batch_ms = ref[mode]
+        print(f"{'fp32':<16} {mode:<6} {p50:>8.1f} {batch_ms:>12.1f} {1.0:>8.2f}")
+
+    regressions = []
+    for spec in args.variants:
+        options = parse_variant(spec)
+        name = spec + ("+traced" if args.traced else "")
+        try:
+            captioner = Captioner(args.model, traced=args.traced,
+                                  graph_cache=tempfile.mkdtemp(prefix="bench_graphs_"), **options)
+        except Exception as e:
+            print(f"[{name}] unavailable: {e}")
+            continue
+
+        for mode in MODES:
+            ref_captions, ref_p50, ref_batch = ref[mode]
+            captions, p50, batch_ms = caption_all(captioner, images, mode, args.batch_size)
+
+            rule2 = fault = 0
+            for (image, _), objs, a, b in zip(images, objects, ref_captions, captions):
+                hits_a, hits_b = crash_word_hits(a), crash_word_hits(b)
+                fa, fb = fault_allocation(pipeline, objs, a), fault_allocation(pipeline, objs, b)
+                changed = any(abs(fa.get(k, 0) - fb.get(k, 0)) > FAULT_TOLERANCE for k in set(fa) | set(fb))
+                rule2 += hits_a != hits_b
+                fault += changed
+                if hits_a != hits_b or changed:
+                    regressions.append((name, mode, image, a, b))
+
+            exact = sum(a == b for a, b in zip(ref_captions, captions)) / len(captions)
+            jaccard = statistics.mean(token_jaccard(a, b) for a, b in zip(ref_captions, captions))
+            print(f"{name:<16} {mode:<6} {p50:>8.1f} {batch_ms:>12.1f} {ref_batch / batch_ms:>8.2f} "
+                  f"{exact:>6.2f} {jaccard:>8.2f} {rule2:>10} {fault:>10}")
+
+    if regressions:
+        print("\nFault-relevant caption changes:")
+        for name, mode, image, a, b in regressions:
+            print(f"  [{name} / {mode}] {image}\n    fp32   : {a}\n    {name:<7}: {b}")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+# bench_detector_backends.py
+# Accuracy parity and latency of the CPU detector backends against the
+# PyTorch reference, on the sample images (and optionally a video).
+#
+#   python bench_detector_backends.py
+#   python bench_detector_backends.py --backends onnx onnx-int8 openvino --video clip.mp4
+#
+# Exits non-zero if a backend's recall or precision against "torch" is
+# below the thresholds, so it can gate a DETECTOR_BACKEND change.
+
+import argparse
+import glob
+import os
+import statistics
+import sys
+import time
+
+import cv2
+from dotenv import load_dotenv
+
+from core.detector import Detector
+from core.detector_backends import DETECTOR_BACKENDS, compare_detections
+
+IMAGE_PATTERNS = ("*.jpg", "*.jpeg", "*.png", "*.webp")
+
+
+def load_images(samples_dir, video=None, video_frames=32):
+    images = []
+    for pattern in IMAGE_PATTERNS:
+        for path in sorted(glob.glob(os.path.join(samples_dir, pattern))):
+            img = cv2.imread(path)
+            if img is not None:
+                images.append((os.path.basename(path), img))
+
+    if video:
+        from core.video.extractor import iter_frames
+        for item in iter_frames(video, fps=3):
+            images.append((f"frame_{item['index']:04d}", item["frame"]))
+            if len(images) >= video_frames:
+                break
+    return images
+
+
+def latency(detector, images, repeats):
+    detector.detect(images[0][1])     # warm-up (graph build / first allocation)
+    single = []
+    for _ in range(repeats):
+        for _, img in images:
+            start = time.perf_counter()
+            detector.detect(img)
+            single.append((time.perf_counter() - start) * 1000)
+
+    frames = [img for _, img in images] * repeats
+    start = time.perf_counter()
+    detector.detect_batch(frames, batch_size=8)
+    batch_fps = len(frames) / (time.perf_counter() - start)
+
+    single.sort()
+    return {
+        "p50_ms": statistics.median(single),
+        "p95_ms": single[min(len(single) - 1, int(len(single) * 0.95))],
+        "batch_fps": batch_fps
+    }
+
+
+def parity(reference, outputs, iou_threshold):
+    totals = {"reference": 0, "candidate": 0, "matched": 0}
+    ious, deltas = [], []
+    for ref, out in zip(reference, outputs):
+        cmp = compare_detections(ref, out, iou_threshold)
+        for k in totals:
+            totals[k] += cmp[k]
+        if cmp["mean_iou"] is not None:
+            ious.append(cmp["mean_iou"])
+            deltas.append(cmp["max_conf_delta"])
+
+    return {
+        "recall": totals["matched"] / totals["reference"] if totals["reference"] else 1.0,
+        "precision": totals["matched"] / totals["candidate"] if totals["candidate"] else 1.0,
+        "mean_iou": statistics.mean(ious) if ious else None,
+        "max_conf_delta": max(deltas) if deltas else None
+    }
+
+
+def main():
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Detector backend parity and latency")
+    parser.add_argument("--weights", default=os.getenv("YOLO_WEIGHTS", "yolov8n.pt"))
+    parser.add_argument("--backends", nargs="+", default=["onnx", "onnx-int8", "openvino"],
+                        choices=[b for b in DETECTOR_BACKENDS if b != "torch"])
+    parser.add_argument("--samples", default="data/samples")
+    parser.add_argument("--video", help="also sample frames from this video")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--iou", type=float, default=0.5)
+    parser.add_argument("--min-recall", type=float, default=0.95)
+    parser.add_argument("--min-precision", type=float, default=0.95)
+    args = parser.parse_args()
+
+    images = load_images(args.samples, args.video)
+    if not images:
+        sys.exit(f"No sample images in {args.samples}")
+    print(f"{len(images)} images, weights {args.weights}\n")
+
+    torch_det = Detector(args.weights, backend="torch")
+    reference = [torch_det.detect(img) for _, img in images]
+    rows = [("torch", latency(torch_det, images, args.repeats), None)]
+
+    for backend in args.backends:
+        try:
+            det = Detector(args.weights, backend=backend)
+        except Exception as e:
+            print(f"[{backend}] unavailable: {e}")
+            continue
+        outputs = [det.detect(img) for _, img in images]
+        rows.append((backend, latency(det, images, args.repeats), parity(reference, outputs, args.iou)))
+
+    print(f"{'backend':<10} {'p50 ms':>8} {'p95 ms':>8} {'batch fps':>10} "
+          f"{'recall':>7} {'precision':>9} {'mean IoU':>9} {'max dconf':>9}")
+    failed = False
+    for backend, lat, par in rows:
+        line = f"{backend:<10} {lat['p50_ms']:>8.1f} {lat['p95_ms']:>8.1f} {lat['batch_fps']:>10.1f}"
+        if par:
+            line += (f" {par['recall']:>7.3f} {par['precision']:>9.3f}"
+                     f" {par['mean_iou'] or 0:>9.3f} {par['max_conf_delta'] or 0:>9.3f}")
+            if par["recall"] < args.min_recall or par["precision"] < args.min_precision:
+                line += "  << below parity threshold"
+                failed = True
+        print(line)
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
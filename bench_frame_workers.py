@@ -0,0 +1,71 @@
+# bench_frame_workers.py
+# Scaling benchmark: video frame analysis with 1..N worker processes.
+# Uses the models configured in .env (YOLO_WEIGHTS, CAPTION_MODEL).
+#
+#   python bench_frame_workers.py data/videos/crash.mp4 [max_workers]
+
+import os
+import sys
+import time
+import tempfile
+
+from dotenv import load_dotenv
+
+from core.pipeline import Pipeline, pipeline_config_from_env
+from core.video.extractor import iter_frames
+from core.video.frame_pipeline import analyze_frames
+from core.video.parallel import FramePool
+
+# Per-run fields that legitimately differ between two analyses
+VOLATILE = ("case_id", "generated_at")
+
+
+def comparable(frame_results):
+    out = []
+    for fr in frame_results:
+        fr = dict(fr)
+        fr["case"] = {k: v for k, v in fr.get("case", {}).items() if k not in VOLATILE}
+        out.append(fr)
+    return out
+
+
+def run(video, analyze, **kwargs):
+    frames_dir = tempfile.mkdtemp(prefix="bench_frames_")
+    frames = list(iter_frames(video, fps=3))   # decode once, outside the timing
+    start = time.perf_counter()
+    results = analyze(frames, frames_dir=frames_dir, **kwargs)
+    return time.perf_counter() - start, results
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    video = sys.argv[1]
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else (os.cpu_count() or 1)
+    batch_size = int(os.getenv("DETECT_BATCH_SIZE", 8))
+
+    pipeline = Pipeline(**pipeline_config_from_env(tempfile.mkdtemp(prefix="bench_outputs_")))
+    pipeline.models.warm_up(background=False)
+
+    base_sec, baseline = run(
+        video,
+        lambda frames, **kw: analyze_frames(frames, pipeline, **kw),
+        batch_size=batch_size
+    )
+    baseline = comparable(baseline)
+    n = len(baseline)
+
+    print(f"{'workers':>8} {'threads':>8} {'sec':>8} {'frames/s':>9} {'speedup':>8} {'identical':>10}")
+    print(f"{1:>8} {'-':>8} {base_sec:>8.2f} {n / base_sec:>9.2f} {1.0:>7.2f}x {'-':>10}")
+
+    for workers in range(2, max_workers + 1):
+        pool = FramePool(pipeline.config, workers)
+        # Model loading is a one-off per worker, not part of the per-case cost
+        for f in pool.warm_up():
+            f.result()
+
+        sec, results = run(video, pool.analyze_frames, batch_size=batch_size)
+        same = comparable(results) == baseline
+        pool.shutdown()
+
+        print(f"{workers:>8} {pool.threads:>8} {sec:>8.2f} {n / sec:>9.2f} "
+              f"{base_sec / sec:>7.2f}x {str(same):>10}")
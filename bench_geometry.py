@@ -0,0 +1,57 @@
+# bench_geometry.py
+# Micro-benchmark: nested-loop reasoning vs the shared PairGeometry matrices
+# on crowded scenes (e.g. parking-lot footage with dozens of vehicles).
+#
+#   python bench_geometry.py
+
+import random
+import time
+
+from core.geometry import PairGeometry
+from core.reasoning import fault_score, verification_layer, is_vehicle
+from test_geometry import (
+    random_scene,
+    reference_fault_score,
+    reference_verification,
+    reference_max_overlap
+)
+
+REPEATS = 20
+
+
+def old_path(objects, caption):
+    reference_max_overlap(objects)
+    fault = reference_fault_score(objects, caption)
+    return reference_verification(fault, objects)
+
+
+def new_path(objects, caption):
+    geo = PairGeometry([o["box"] for o in objects if is_vehicle(o)])
+    geo.max_overlap
+    fault = fault_score(objects, caption, geo)
+    return verification_layer(fault, objects, geo)
+
+
+def timed(fn, objects, caption):
+    start = time.perf_counter()
+    for _ in range(REPEATS):
+        out = fn(objects, caption)
+    return (time.perf_counter() - start) / REPEATS * 1000, out
+
+
+rng = random.Random(42)
+print(f"{'objects':>8} {'vehicles':>9} {'loops ms':>10} {'matrix ms':>10} {'speedup':>8}")
+
+for n in (5, 10, 25, 50, 100, 200):
+    objects = random_scene(rng, n)
+    # Parking lots: mostly cars, densely packed
+    for o in objects:
+        o["name"] = "car" if o["name"] == "person" else o["name"]
+    caption = "cars parked after a collision"
+
+    old_ms, old_out = timed(old_path, objects, caption)
+    new_ms, new_out = timed(new_path, objects, caption)
+    assert old_out == new_out, "vectorized output differs from reference"
+
+    vcount = sum(is_vehicle(o) for o in objects)
+    print(f"{n:>8} {vcount:>9} {old_ms:>10.2f} {new_ms:>10.2f} {old_ms / new_ms:>7.1f}x")
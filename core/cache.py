@@ -0,0 +1,222 @@
+# core/cache.py
+
+import copy
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+
+# --------------------------------------------------
+#     PIPELINE RESULT CACHE
+#     - bounded in-memory LRU tier
+#     - optional persistent tier (disk or MongoDB)
+#     - keyed by content hash + model versions + pipeline version
+# --------------------------------------------------
+
+
+def content_hash(data):
+    """Fast fingerprint of raw input bytes (BLAKE2b, 160-bit)."""
+    return hashlib.blake2b(data, digest_size=20).hexdigest()
+
+
+def cache_key(content_hash, model_tag, pipeline_version):
+    return f"{content_hash}:{model_tag}:{pipeline_version}"
+
+
+def model_tag(yolo_weights, caption_model, detector_backend="torch", caption_options=None,
+              plate_mode="roi"):
+    """
+    Short fingerprint of the models that produce a result.
+    The YOLO weights file is hashed (once, at startup) so swapping weights
+    under the same filename still invalidates cached results. Exported /
+    quantized detector backends and captioner precision / resolution can
+    change outputs slightly, so they are tagged too, as is the plate OCR
+    mode (vehicle crops vs the whole image read different plates).
+    """
+    h = hashlib.sha256()
+    h.update(str(caption_model).encode())
+    if detector_backend and detector_backend != "torch":
+        h.update(f"detector:{detector_backend}".encode())
+
+    caption_options = caption_options or {}
+    if caption_options.get("precision", "fp32") != "fp32":
+        h.update(f"caption-precision:{caption_options['precision']}".encode())
+    if caption_options.get("image_size"):
+        h.update(f"caption-size:{caption_options['image_size']}".encode())
+    if plate_mode and plate_mode != "roi":
+        h.update(f"plates:{plate_mode}".encode())
+
+    if yolo_weights and os.path.exists(yolo_weights):
+        with open(yolo_weights, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    else:
+        h.update(str(yolo_weights).encode())
+
+    return h.hexdigest()[:16]
+
+
+class LRUCache:
+    """Bounded in-memory tier. Evicts least-recently-used entries."""
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._data:
+                self.counters["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self.counters["hits"] += 1
+            return copy.deepcopy(self._data[key])
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = copy.deepcopy(value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.counters["evictions"] += 1
+
+    def __len__(self):
+        return len(self._data)
+
+
+class DiskCache:
+    """
+    Persistent tier: one JSON file per key under cache_dir.
+    Oldest files are evicted once the directory exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir, max_bytes=512 * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+        os.makedirs(cache_dir, exist_ok=True)
+
+    def _path(self, key):
+        name = hashlib.sha256(key.encode()).hexdigest()
+        return os.path.join(self.cache_dir, f"{name}.json")
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = json.load(f)
+            os.utime(path)  # refresh recency for eviction
+        except (OSError, ValueError):
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        return value
+
+    def put(self, key, value):
+        path = self._path(key)
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(value, f, default=str)
+        os.replace(tmp, path)
+        self._evict()
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            total = 0
+            for name in os.listdir(self.cache_dir):
+                if not name.endswith(".json"):
+                    continue
+                p = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(p)
+                except OSError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, p))
+                total += st.st_size
+
+            entries.sort()
+            while total > self.max_bytes and entries:
+                _, size, p = entries.pop(0)
+                try:
+                    os.remove(p)
+                    total -= size
+                    self.counters["evictions"] += 1
+                except OSError:
+                    pass
+
+
+class MongoCache:
+    """
+    Persistent tier shared by every worker: a MongoDB collection.
+    Entries expire after ttl_days via a TTL index.
+    """
+
+    def __init__(self, collection, ttl_days=30):
+        self.collection = collection
+        self.counters = {"hits": 0, "misses": 0, "evictions": 0}
+        self.collection.create_index("key", unique=True)
+        self.collection.create_index(
+            "stored_at", expireAfterSeconds=int(ttl_days * 86400)
+        )
+
+    def get(self, key):
+        doc = self.collection.find_one({"key": key}, {"_id": 0, "result": 1})
+        if not doc:
+            self.counters["misses"] += 1
+            return None
+        self.counters["hits"] += 1
+        return doc["result"]
+
+    def put(self, key, value):
+        self.collection.update_one(
+            {"key": key},
+            {"$set": {"result": value, "stored_at": datetime.utcnow()}},
+            upsert=True
+        )
+
+
+class ResultCache:
+    """
+    Memory LRU in front of an optional persistent tier.
+    Persistent hits are promoted into memory.
+    """
+
+    def __init__(self, memory=None, persistent=None):
+        self.memory = memory or LRUCache()
+        self.persistent = persistent
+
+    def get(self, key):
+        value = self.memory.get(key)
+        if value is not None or self.persistent is None:
+            return value
+
+        value = self.persistent.get(key)
+        if value is not None:
+            self.memory.put(key, value)
+        return value
+
+    def put(self, key, value):
+        self.memory.put(key, value)
+        if self.persistent is not None:
+            try:
+                self.persistent.put(key, value)
+            except Exception as e:
+                print(f"[ResultCache] Persistent write failed: {e}")
+
+    def stats(self):
+        tiers = {"memory": dict(self.memory.counters, entries=len(self.memory))}
+        if self.persistent is not None:
+            tiers[type(self.persistent).__name__] = dict(self.persistent.counters)
+
+        hits = sum(t["hits"] for t in tiers.values())
+        lookups = self.memory.counters["hits"] + self.memory.counters["misses"]
+        return {
+            "tiers": tiers,
+            "hit_rate": round(hits / lookups, 3) if lookups else None
+        }
@@ -1,15 +1,179 @@
+import hashlib
+import os
+import threading
+
+import torch
+import transformers
 from transformers import BlipForConditionalGeneration, BlipProcessor
 from PIL import Image
 from dotenv import load_dotenv
 load_dotenv()
 
+# Decode settings per caption mode.
+#   full  : investigator-facing caption for image cases
+#   short : greedy, length-bounded caption for video frames, where only
+#           the scene keywords feed the reasoning rules
+CAPTION_MODES = {
+    "full": {"max_new_tokens": 30},
+    "short": {"max_new_tokens": 12, "num_beams": 1, "do_sample": False}
+}
+
+CAPTION_PRECISIONS = ("fp32", "int8")
+
 class Captioner:
-    def __init__(self, model_id="Salesforce/blip-image-captioning-base"):
+    def __init__(self, model_id="Salesforce/blip-image-captioning-base", short_max_tokens=None,
+                 precision="fp32", image_size=None, traced=False, graph_cache=None):
+        """
+        CPU optimizations (compare against fp32 with bench_captioner.py):
+          precision   : "int8" dynamically quantizes every nn.Linear
+                        (weights int8, activations quantized per batch)
+          image_size  : vision input side in pixels (multiple of the patch
+                        size); position embeddings are interpolated from the
+                        pretrained 384 grid. None keeps the model default.
+          traced      : run the vision encoder as a TorchScript graph, traced
+                        once per batch shape and cached in graph_cache.
+        """
+        if precision not in CAPTION_PRECISIONS:
+            raise ValueError(f"Unknown caption precision: {precision}")
+
         self.processor = BlipProcessor.from_pretrained(model_id)
         self.model = BlipForConditionalGeneration.from_pretrained(model_id)
+        self.model.eval()
+
+        if image_size:
+            _resize_vision_input(self.model, int(image_size))
+            self.processor.image_processor.size = {"height": int(image_size), "width": int(image_size)}
+
+        if precision == "int8":
+            self.model = torch.ao.quantization.quantize_dynamic(
+                self.model, {torch.nn.Linear}, dtype=torch.qint8
+            )
+
+        if traced:
+            tag = f"{model_id}|{precision}|{self.model.config.vision_config.image_size}"
+            self.model.vision_model = TracedVisionEncoder(self.model.vision_model, tag, graph_cache)
+
+        self.modes = {k: dict(v) for k, v in CAPTION_MODES.items()}
+        if short_max_tokens:
+            self.modes["short"]["max_new_tokens"] = int(short_max_tokens)
+
+    def caption(self, img_bgr, mode="full"):
+        return self.caption_batch([img_bgr], mode=mode)[0]
+
+    def caption_batch(self, frames, mode="full", batch_size=8):
+        """
+        Captions a list of BGR frames, batch_size images per generate call.
+        The vision encoder runs once per batch and decoding is shared.
+        """
+        if mode not in self.modes:
+            raise ValueError(f"Unknown caption mode: {mode}")
+
+        captions = []
+        for start in range(0, len(frames), batch_size):
+            chunk = frames[start:start + batch_size]
+            images = [Image.fromarray(f[:, :, ::-1]) for f in chunk]  # BGR->RGB
+            inputs = self.processor(images=images, return_tensors="pt")
+
+            with torch.inference_mode():
+                out_ids = self.model.generate(**inputs, **self.modes[mode])
+
+            captions.extend(
+                self.processor.batch_decode(out_ids, skip_special_tokens=True)
+            )
+        return captions
+
+
+def _resize_vision_input(model, image_size):
+    """
+    Adapts the vision transformer to image_size x image_size inputs by
+    bicubic interpolation of its position embeddings (class token kept).
+    """
+    embeddings = model.vision_model.embeddings
+    patch = embeddings.patch_size
+    if image_size % patch:
+        raise ValueError(f"Caption image size must be a multiple of {patch}")
+
+    old = embeddings.position_embedding.data            # (1, 1 + g*g, dim)
+    grid = int((old.shape[1] - 1) ** 0.5)
+    new_grid = image_size // patch
+    if new_grid == grid:
+        return
+
+    cls_pos, patch_pos = old[:, :1], old[:, 1:]
+    patch_pos = patch_pos.reshape(1, grid, grid, -1).permute(0, 3, 1, 2)
+    patch_pos = torch.nn.functional.interpolate(
+        patch_pos, size=(new_grid, new_grid), mode="bicubic", align_corners=False
+    )
+    patch_pos = patch_pos.permute(0, 2, 3, 1).reshape(1, new_grid * new_grid, -1)
+
+    embeddings.position_embedding = torch.nn.Parameter(torch.cat([cls_pos, patch_pos], dim=1))
+    embeddings.num_patches = new_grid * new_grid
+    embeddings.num_positions = embeddings.num_patches + 1
+    embeddings.image_size = image_size
+    if hasattr(embeddings, "position_ids"):
+        embeddings.position_ids = torch.arange(embeddings.num_positions).unsqueeze(0)
+    model.config.vision_config.image_size = image_size
+
+
+class _LastHiddenState(torch.nn.Module):
+    def __init__(self, vision_model):
+        super().__init__()
+        self.vision_model = vision_model
+
+    def forward(self, pixel_values):
+        return self.vision_model(pixel_values=pixel_values, return_dict=False)[0]
+
+
+class TracedVisionEncoder(torch.nn.Module):
+    """
+    Stands in for model.vision_model inside generate(): returns the same
+    (last_hidden_state,) tuple from a TorchScript graph. Graphs are traced
+    per input shape (batch sizes differ for the last chunk) and saved to
+    graph_cache, keyed by model, precision, resolution and library
+    versions, so restarts and worker processes load instead of re-tracing.
+    """
+
+    def __init__(self, vision_model, tag, graph_cache=None):
+        super().__init__()
+        self.eager = _LastHiddenState(vision_model)
+        self.key = hashlib.sha256(
+            f"{tag}|torch {torch.__version__}|transformers {transformers.__version__}".encode()
+        ).hexdigest()[:16]
+        self.graph_cache = graph_cache
+        self.graphs = {}
+        self._lock = threading.Lock()
+
+    def forward(self, pixel_values, **kwargs):
+        shape = tuple(pixel_values.shape)
+        graph = self.graphs.get(shape) or self._graph(pixel_values)
+        return (graph(pixel_values),)
+
+    def _graph(self, example):
+        shape = tuple(example.shape)
+        with self._lock:
+            if shape in self.graphs:
+                return self.graphs[shape]
+
+            path = None
+            if self.graph_cache:
+                os.makedirs(self.graph_cache, exist_ok=True)
+                path = os.path.join(self.graph_cache, f"blip-vision-{self.key}-{'x'.join(map(str, shape))}.pt")
+
+            if path and os.path.exists(path):
+                graph = torch.jit.load(path)
+            else:
+                # Tracing is not allowed under inference_mode
+                with torch.inference_mode(False), torch.no_grad():
+                    graph = torch.jit.trace(self.eager, example.clone(), check_trace=False)
+                    try:
+                        # Folds weights into the graph; some quantized ops cannot be frozen
+                        graph = torch.jit.freeze(graph.eval())
+                    except RuntimeError:
+                        pass
+                if path:
+                    partial = f"{path}.{os.getpid()}.part"
+                    torch.jit.save(graph, partial)
+                    os.replace(partial, path)
 
-    def caption(self, img_bgr):
-        img_rgb = Image.fromarray(img_bgr[:, :, ::-1])  # BGR->RGB
-        inputs = self.processor(images=img_rgb, return_tensors="pt")
-        out_ids = self.model.generate(**inputs, max_new_tokens=30)
-        return self.processor.batch_decode(out_ids, skip_special_tokens=True)[0]
+            self.graphs[shape] = graph
+            return graph
@@ -1,16 +1,70 @@
 # core/db.py
 
+import json
+import zlib
+
 import bcrypt
-from pymongo import MongoClient
+from bson import ObjectId
+from pymongo import MongoClient, ReturnDocument, ASCENDING, DESCENDING
 from datetime import datetime
 import os
 
+# Fields the dashboard renders; full case documents (timelines, frame
+# hashes, plates) are only loaded when a single case is opened.
+CASE_SUMMARY_FIELDS = {
+    "case_id": 1,
+    "type": 1,
+    "created_at": 1,
+    "case.case_id": 1,
+    "case.generated_at": 1,
+    "scene.summary": 1
+}
+
+DASHBOARD_PAGE_SIZE = 24
+
+# Per-frame video data that grows with video length. It is stored
+# compressed in case_payloads and loaded only by the views that use it,
+# so the case document stays small however long the video is.
+VIDEO_PAYLOAD_FIELDS = (
+    "timeline",
+    "license_plates",
+    "evidence.frames",
+    "chain_of_custody.frame_hashes",
+    "chain_of_custody.frame_proofs",
+    "trace"
+)
+
+# Opt-in performance traces (core.trace) are split out for image cases too
+TRACE_FIELD = "trace"
+
+# Compressed payloads are split so no single document nears the 16 MB limit
+PAYLOAD_CHUNK_BYTES = 4 * 1024 * 1024
+
 class MongoDB:
     def __init__(self):
         self.client = MongoClient(os.getenv("MONGO_URI"))
         self.db = self.client.oracle_forensic
         self.users = self.db.users
         self.cases = self.db.cases
+        self.jobs = self.db.jobs
+        self.case_payloads = self.db.case_payloads
+
+    def ensure_indexes(self):
+        """Idempotent; called once at startup."""
+        # Dashboard listing + keyset pagination; _id breaks created_at ties
+        self.cases.create_index(
+            [("user", ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)],
+            name="user_created_at"
+        )
+        self.cases.create_index([("case_id", ASCENDING), ("user", ASCENDING)], name="case_id_user")
+        # Not unique: existing deployments may already hold duplicate usernames
+        self.users.create_index("username", name="username")
+        self.jobs.create_index("job_id", name="job_id")
+        self.jobs.create_index([("state", ASCENDING), ("heartbeat_at", ASCENDING)], name="state_heartbeat")
+        self.case_payloads.create_index(
+            [("case_id", ASCENDING), ("field", ASCENDING), ("seq", ASCENDING)],
+            name="case_field_seq"
+        )
 
     # ---------- USERS ----------
 
@@ -48,15 +102,157 @@ class MongoDB:
 
     # ---------- CASES ----------
 
-    def save_case(self, data):
+    def save_case(self, data, split=()):
+        """
+        split: dotted field paths moved out of the case document into
+        case_payloads (zlib-compressed JSON, chunked). The case records
+        which fields were split under "payload".
+        """
         data["created_at"] = datetime.utcnow()
+
+        moved = []
+        for path in split:
+            found, value = _pop_path(data, path)
+            if not found:
+                continue
+            blob = zlib.compress(json.dumps(value, default=str).encode(), 6)
+            self.case_payloads.insert_many([
+                {
+                    "case_id": data["case_id"],
+                    "user": data["user"],
+                    "field": path,
+                    "seq": n,
+                    "data": blob[i:i + PAYLOAD_CHUNK_BYTES]
+                }
+                for n, i in enumerate(range(0, max(len(blob), 1), PAYLOAD_CHUNK_BYTES))
+            ])
+            moved.append({"field": path, "bytes": len(blob)})
+
+        if moved:
+            data["payload"] = {"fields": moved, "encoding": "json+zlib"}
         self.cases.insert_one(data)
 
-    def get_cases_by_user(self, user):
-        return list(self.cases.find({"user": user}).sort("created_at", -1))
+    def load_payload(self, case, fields):
+        """Restores split-out fields into a loaded case (no-op for inline cases)."""
+        stored = {f["field"] for f in case.get("payload", {}).get("fields", [])}
+        wanted = [f for f in fields if f in stored]
+        if not wanted:
+            return case
+
+        chunks = {}
+        for doc in self.case_payloads.find(
+            {"case_id": case["case_id"], "user": case["user"], "field": {"$in": wanted}},
+            {"_id": 0, "field": 1, "seq": 1, "data": 1}
+        ).sort("seq", ASCENDING):
+            chunks.setdefault(doc["field"], []).append(doc["data"])
+
+        for path, parts in chunks.items():
+            _set_path(case, path, json.loads(zlib.decompress(b"".join(parts))))
+        return case
+
+    def get_case_summaries(self, user, before=None, limit=DASHBOARD_PAGE_SIZE):
+        """
+        One dashboard page of case summaries, newest first.
+        before: cursor returned with the previous page (None = first page).
+        Returns (cases, next_cursor); next_cursor is None on the last page.
+        Keyset pagination: each page is an index range scan, independent
+        of how many older cases the user has.
+        """
+        query = {"user": user}
+        if before:
+            created_at, oid = _parse_cursor(before)
+            query["$or"] = [
+                {"created_at": {"$lt": created_at}},
+                {"created_at": created_at, "_id": {"$lt": oid}}
+            ]
+
+        cases = list(
+            self.cases.find(query, CASE_SUMMARY_FIELDS)
+            .sort([("created_at", DESCENDING), ("_id", DESCENDING)])
+            .limit(limit + 1)
+        )
+
+        next_cursor = None
+        if len(cases) > limit:
+            cases = cases[:limit]
+            last = cases[-1]
+            next_cursor = f"{last['created_at'].isoformat()}~{last['_id']}"
+        return cases, next_cursor
 
-    def get_case(self, case_id, user):
-        return self.cases.find_one({"case_id": case_id, "user": user})
+    def get_case(self, case_id, user, payload=()):
+        """payload: split-out fields this view needs (see VIDEO_PAYLOAD_FIELDS)."""
+        case = self.cases.find_one({"case_id": case_id, "user": user})
+        if case and payload:
+            self.load_payload(case, payload)
+        return case
 
     def delete_case(self, case_id, user):
-        self.cases.delete_one({"case_id": case_id, "user": user})
\ No newline at end of file
+        self.cases.delete_one({"case_id": case_id, "user": user})
+        self.case_payloads.delete_many({"case_id": case_id, "user": user})
+
+    # ---------- JOBS ----------
+
+    def save_job(self, job):
+        self.jobs.insert_one(job)
+
+    def update_job(self, job_id, fields):
+        self.jobs.update_one({"job_id": job_id}, {"$set": fields})
+
+    def get_job(self, job_id, user):
+        return self.jobs.find_one({"job_id": job_id, "user": user}, {"_id": 0})
+
+    def get_unfinished_jobs(self):
+        return list(
+            self.jobs.find({"state": {"$nin": ["done", "failed"]}})
+            .sort("created_at", 1)
+        )
+
+    def claim_job(self, job_id, owner, stale_before):
+        """
+        Atomically takes over an unfinished job whose owner has not
+        heartbeated since stale_before (or that never had one).
+        Returns the claimed job, or None if another process holds it.
+        """
+        return self.jobs.find_one_and_update(
+            {
+                "job_id": job_id,
+                "state": {"$nin": ["done", "failed"]},
+                "$or": [
+                    {"heartbeat_at": {"$exists": False}},
+                    {"heartbeat_at": {"$lt": stale_before}}
+                ]
+            },
+            {"$set": {"owner": owner, "heartbeat_at": datetime.utcnow()}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+
+    def heartbeat_jobs(self, job_ids, owner):
+        self.jobs.update_many(
+            {"job_id": {"$in": list(job_ids)}, "owner": owner},
+            {"$set": {"heartbeat_at": datetime.utcnow()}}
+        )
+
+
+def _parse_cursor(cursor):
+    """Inverse of the next_cursor format: "<created_at iso>~<ObjectId>"."""
+    created_at, oid = cursor.split("~", 1)
+    return datetime.fromisoformat(created_at), ObjectId(oid)
+
+
+def _pop_path(doc, path):
+    *parents, key = path.split(".")
+    for p in parents:
+        doc = doc.get(p)
+        if not isinstance(doc, dict):
+            return False, None
+    if key not in doc:
+        return False, None
+    return True, doc.pop(key)
+
+
+def _set_path(doc, path, value):
+    *parents, key = path.split(".")
+    for p in parents:
+        doc = doc.setdefault(p, {})
+    doc[key] = value
@@ -0,0 +1,113 @@
+# core/derivatives.py
+
+import os
+import cv2
+import numpy as np
+
+# --------------------------------------------------
+#     IMAGE DERIVATIVES
+#     - "thumb": grid thumbnails (report frame grid)
+#     - "preview": medium size shown inline in reports
+#     - one sprite sheet of thumbnails per video case
+#     Originals stay untouched as evidence; derivatives are
+#     display-only copies, written next to them as WebP.
+# --------------------------------------------------
+
+DERIVATIVE_WIDTHS = {"thumb": 160, "preview": 960}
+WEBP_QUALITY = 80
+
+SPRITE_FILE = "sprite.webp"
+SPRITE_COLUMNS = 10
+WEBP_MAX_DIM = 16383
+
+
+def derivative_name(filename, kind):
+    """frame_0012.jpg -> frame_0012.thumb.webp"""
+    if kind not in DERIVATIVE_WIDTHS:
+        raise ValueError(f"Unknown derivative: {kind}")
+    return f"{os.path.splitext(filename)[0]}.{kind}.webp"
+
+
+def resize_to_width(img, width):
+    h, w = img.shape[:2]
+    if w <= width:
+        return img
+    return cv2.resize(img, (width, max(1, round(h * width / w))), interpolation=cv2.INTER_AREA)
+
+
+def _encode_webp(img):
+    ok, buf = cv2.imencode(".webp", img, [cv2.IMWRITE_WEBP_QUALITY, WEBP_QUALITY])
+    if not ok:
+        raise ValueError("WebP encode failed")
+    return buf.tobytes()
+
+
+def encode_derivatives(img, kinds=tuple(DERIVATIVE_WIDTHS)):
+    """Encodes each derivative of an already-decoded image: {kind: webp bytes}."""
+    return {kind: _encode_webp(resize_to_width(img, DERIVATIVE_WIDTHS[kind])) for kind in kinds}
+
+
+def write_derivatives(img, out_dir, filename, kinds=tuple(DERIVATIVE_WIDTHS)):
+    """Writes each derivative next to the original; returns {kind: filename}."""
+    names = {}
+    for kind, data in encode_derivatives(img, kinds).items():
+        names[kind] = derivative_name(filename, kind)
+        with open(os.path.join(out_dir, names[kind]), "wb") as f:
+            f.write(data)
+    return names
+
+
+def ensure_derivative(out_dir, filename, kind):
+    """
+    Path of a derivative, generating it from the original on first request
+    (cases analysed before derivatives existed). None if the original is missing.
+    """
+    path = os.path.join(out_dir, derivative_name(filename, kind))
+    if os.path.exists(path):
+        return path
+
+    img = cv2.imread(os.path.join(out_dir, filename))
+    if img is None:
+        return None
+    write_derivatives(img, out_dir, filename, kinds=(kind,))
+    return path
+
+
+def build_sprite(frames_dir, filenames, columns=SPRITE_COLUMNS):
+    """
+    Packs the frames' thumbnails into one sprite sheet in frames_dir.
+    Tiles follow the order of filenames, row-major. Returns the layout
+    {file, tile: [w, h], columns, count} (count < len(filenames) if the
+    sheet would exceed the WebP size limit), or None for no frames.
+    """
+    tiles = []
+    for name in filenames:
+        path = ensure_derivative(frames_dir, name, "thumb")
+        tile = cv2.imread(path) if path else None
+        if tile is None:
+            break
+        tiles.append(tile)
+    if not tiles:
+        return None
+
+    tile_h, tile_w = tiles[0].shape[:2]
+    columns = min(columns, len(tiles))
+    max_rows = WEBP_MAX_DIM // tile_h
+    tiles = tiles[:columns * max_rows]
+    rows = -(-len(tiles) // columns)
+
+    sheet = np.zeros((rows * tile_h, columns * tile_w, 3), np.uint8)
+    for i, tile in enumerate(tiles):
+        r, c = divmod(i, columns)
+        # Frames of one video share a size; crop/pad defensively anyway
+        tile = tile[:tile_h, :tile_w]
+        sheet[r * tile_h:r * tile_h + tile.shape[0], c * tile_w:c * tile_w + tile.shape[1]] = tile
+
+    with open(os.path.join(frames_dir, SPRITE_FILE), "wb") as f:
+        f.write(_encode_webp(sheet))
+    return {
+        "file": SPRITE_FILE,
+        "tile": [tile_w, tile_h],
+        "columns": columns,
+        "count": len(tiles)
+    }
@@ -1,20 +1,51 @@
-from ultralytics import YOLO
 import numpy as np
 
+from core.detector_backends import parse_backend, export_weights
+
 class Detector:
-    def __init__(self, weights_path: str):
-        self.model = YOLO(weights_path)  # yolov8n.pt or custom fine-tuned
+    def __init__(self, weights_path: str, backend="torch"):
+        """
+        backend: "torch", "onnx", "onnx-int8" or "openvino"
+                 (see core.detector_backends); the output schema is the same.
+        """
+        from ultralytics import YOLO   # heavy import, only when a model is built
+
+        self.backend = backend or "torch"
+        runtime, int8 = parse_backend(self.backend)
+        if runtime != "torch":
+            weights_path = export_weights(weights_path, runtime, int8=int8)
+        self.model = YOLO(weights_path, task="detect")  # yolov8n.pt or custom fine-tuned
 
     def detect(self, img_bgr):
         # returns: list of dicts {cls, conf, box[x1,y1,x2,y2]}
         results = self.model.predict(source=img_bgr, verbose=False)[0]
+        return self._to_dicts(results)
+
+    def detect_batch(self, frames, batch_size=8):
+        """
+        Runs YOLO over stacked frames, batch_size images per predict call.
+        Returns one detection list per frame, in input order.
+        """
         out = []
-        for b in results.boxes:
-            x1,y1,x2,y2 = b.xyxy[0].tolist()
-            out.append({
-                "cls": int(b.cls[0].item()),
-                "name": results.names[int(b.cls[0].item())],
-                "conf": float(b.conf[0].item()),
-                "box": [float(x1), float(y1), float(x2), float(y2)]
-            })
+        for start in range(0, len(frames), batch_size):
+            chunk = list(frames[start:start + batch_size])
+            results = self.model.predict(source=chunk, verbose=False)
+            out.extend(self._to_dicts(r) for r in results)
         return out
+
+    @staticmethod
+    def _to_dicts(results):
+        boxes = results.boxes
+        if boxes is None or len(boxes) == 0:
+            return []
+
+        # One device->host copy per tensor instead of .item() per box
+        xyxy = boxes.xyxy.cpu().numpy().astype(np.float64).tolist()
+        cls = boxes.cls.cpu().numpy().astype(np.int64).tolist()
+        conf = boxes.conf.cpu().numpy().astype(np.float64).tolist()
+
+        names = results.names
+        return [
+            {"cls": c, "name": names[c], "conf": p, "box": b}
+            for c, p, b in zip(cls, conf, xyxy)
+        ]
@@ -0,0 +1,159 @@
+# core/detector_backends.py
+
+import os
+import threading
+from contextlib import contextmanager
+
+import numpy as np
+
+from core.geometry import iou_matrix
+
+try:
+    import fcntl
+except ImportError:     # not available on Windows
+    fcntl = None
+
+# --------------------------------------------------
+#     DETECTOR BACKENDS (CPU)
+#     "torch"     : the ultralytics PyTorch model (default)
+#     "onnx"      : weights exported to ONNX, run by ONNX Runtime
+#     "onnx-int8" : the ONNX export with INT8 (dynamic) weights
+#     "openvino"  : weights exported to OpenVINO IR
+#     Exports are written next to the weights on first use and reused
+#     while newer than them. Every backend is loaded through
+#     ultralytics, so pre/post-processing (letterbox, NMS) and the
+#     {cls, name, conf, box} parsing are shared with "torch".
+#     bench_detector_backends.py checks accuracy parity and latency.
+# --------------------------------------------------
+
+DETECTOR_BACKENDS = ("torch", "onnx", "onnx-int8", "openvino")
+EXPORT_IMGSZ = 640
+
+_export_guard = threading.Lock()
+
+
+def parse_backend(spec):
+    """"onnx-int8" -> ("onnx", True); validates the name."""
+    spec = (spec or "torch").strip().lower()
+    if spec not in DETECTOR_BACKENDS:
+        raise ValueError(f"Unknown detector backend: {spec} (expected one of {', '.join(DETECTOR_BACKENDS)})")
+    if spec.endswith("-int8"):
+        return spec[:-len("-int8")], True
+    return spec, False
+
+
+def exported_path(weights_path, backend, int8=False):
+    """Where the export of weights_path for a backend lives (ultralytics naming)."""
+    base = os.path.splitext(weights_path)[0]
+    if backend == "onnx":
+        return f"{base}.int8.onnx" if int8 else f"{base}.onnx"
+    if backend == "openvino":
+        return f"{base}_openvino_model"
+    raise ValueError(f"No export for backend: {backend}")
+
+
+def _is_fresh(path, weights_path):
+    return os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(weights_path)
+
+
+@contextmanager
+def _export_lock(weights_path):
+    # Frame workers / the inference server may load the detector at the
+    # same time; only one process exports, the others then reuse the file
+    with _export_guard:
+        if fcntl is None:
+            yield
+            return
+        with open(f"{weights_path}.export.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+
+def export_weights(weights_path, backend, int8=False, imgsz=EXPORT_IMGSZ):
+    """Exports (once) and returns the model path to load for a non-torch backend."""
+    if not os.path.exists(weights_path):
+        raise FileNotFoundError(f"YOLO weights not found: {weights_path}")
+
+    target = exported_path(weights_path, backend, int8)
+    with _export_lock(weights_path):
+        if _is_fresh(target, weights_path):
+            return target
+
+        from ultralytics import YOLO
+
+        if backend == "openvino":
+            if int8:
+                raise ValueError("INT8 is only supported for the onnx backend")
+            YOLO(weights_path).export(format="openvino", imgsz=imgsz, dynamic=True)
+            return target
+
+        onnx_path = exported_path(weights_path, "onnx")
+        if not _is_fresh(onnx_path, weights_path):
+            # Dynamic axes so detect_batch can send several frames per call
+            YOLO(weights_path).export(format="onnx", imgsz=imgsz, dynamic=True, simplify=True)
+        if int8:
+            quantize_int8(onnx_path, target)
+        return target
+
+
+def quantize_int8(onnx_path, out_path):
+    """
+    INT8 weights with dynamically quantized activations (no calibration
+    set needed). Parity with fp32 is checked by bench_detector_backends.py.
+    """
+    import onnx
+    from onnxruntime.quantization import quantize_dynamic, QuantType
+
+    partial = f"{out_path}.part"
+    quantize_dynamic(onnx_path, partial, weight_type=QuantType.QUInt8)
+
+    # ultralytics reads class names / stride / imgsz from the model metadata
+    source = onnx.load(onnx_path, load_external_data=False)
+    quantized = onnx.load(partial)
+    del quantized.metadata_props[:]
+    quantized.metadata_props.extend(source.metadata_props)
+    onnx.save(quantized, partial)
+    os.replace(partial, out_path)
+
+
+def compare_detections(reference, candidate, iou_threshold=0.5):
+    """
+    Greedy one-to-one matching of a candidate backend's detections to the
+    reference ("torch") ones: same class and IoU >= iou_threshold, highest
+    reference confidence first.
+    """
+    ref = sorted(reference, key=lambda d: d["conf"], reverse=True)
+    if not ref or not candidate:
+        return {
+            "reference": len(ref), "candidate": len(candidate), "matched": 0,
+            "mean_iou": None, "max_conf_delta": None
+        }
+
+    ious = iou_matrix([d["box"] for d in ref], [d["box"] for d in candidate])
+    same_cls = np.array([[r["cls"] == c["cls"] for c in candidate] for r in ref])
+    ious = np.where(same_cls, ious, 0.0)
+
+    used = set()
+    matched_ious, conf_deltas = [], []
+    for i, r in enumerate(ref):
+        for j in np.argsort(-ious[i]):
+            j = int(j)
+            if ious[i, j] < iou_threshold:
+                break
+            if j in used:
+                continue
+            used.add(j)
+            matched_ious.append(float(ious[i, j]))
+            conf_deltas.append(abs(r["conf"] - candidate[j]["conf"]))
+            break
+
+    return {
+        "reference": len(ref),
+        "candidate": len(candidate),
+        "matched": len(used),
+        "mean_iou": round(float(np.mean(matched_ious)), 4) if matched_ious else None,
+        "max_conf_delta": round(float(max(conf_deltas)), 4) if conf_deltas else None
+    }
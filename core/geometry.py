@@ -18,3 +18,66 @@ def horizontal_relation(a,b, tol=20):
     ax = (a[0]+a[2])/2; bx = (b[0]+b[2])/2
     if abs(ax-bx) < tol: return 'overlap'
     return 'left' if ax<bx else 'right'
+
+
+def iou_matrix(a, b):
+    """
+    IoU between every box in a (N,4) and every box in b (M,4) -> (N,M).
+    Same formula as iou(), including the 1e-6 union epsilon.
+    """
+    a = np.asarray(a, dtype=np.float64).reshape(-1, 4)
+    b = np.asarray(b, dtype=np.float64).reshape(-1, 4)
+
+    ix1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    iy1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    ix2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    iy2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.maximum(0, ix2 - ix1) * np.maximum(0, iy2 - iy1)
+
+    a_area = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    b_area = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    union = a_area[:, None] + b_area[None, :] - inter + 1e-6
+    return inter / union
+
+
+class PairGeometry:
+    """
+    Pairwise geometry for one frame's vehicles, computed once and shared by
+    the scene caption, fault rules, verification layer and severity.
+
+    iou[i, j] : IoU of vehicles i and j (diagonal is meaningless)
+    dx[i, j]  : center_x(j) - center_x(i)
+    dy[i, j]  : center_y(j) - center_y(i)
+    """
+
+    def __init__(self, boxes):
+        self.boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        self.n = len(self.boxes)
+
+        self.iou = iou_matrix(self.boxes, self.boxes)
+
+        cx = (self.boxes[:, 0] + self.boxes[:, 2]) / 2.0
+        cy = (self.boxes[:, 1] + self.boxes[:, 3]) / 2.0
+        self.dx = cx[None, :] - cx[:, None]
+        self.dy = cy[None, :] - cy[:, None]
+
+        self._off_diag = ~np.eye(self.n, dtype=bool)
+
+    @property
+    def max_overlap(self):
+        """Largest IoU between two distinct vehicles (0.0 if fewer than two)."""
+        if self.n < 2:
+            return 0.0
+        return max(0.0, float(self.iou[np.triu_indices(self.n, k=1)].max()))
+
+    def overlapping(self, threshold):
+        """Boolean (n, n): distinct pairs whose IoU exceeds threshold."""
+        return (self.iou > threshold) & self._off_diag
+
+    def involved(self, threshold=0.01):
+        """Boolean (n,): vehicles overlapping at least one other vehicle."""
+        return self.overlapping(threshold).any(axis=1)
+
+    def aligned(self, tol):
+        """Boolean (n, n): distinct pairs whose centers are within tol horizontally."""
+        return (np.abs(self.dx) < tol) & self._off_diag
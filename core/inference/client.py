@@ -0,0 +1,129 @@
+import socket
+import threading
+
+from core.inference.protocol import send_message, recv_message
+
+# --------------------------------------------------
+#     INFERENCE CLIENT
+#     - drop-in proxies for the detector / captioner / human /
+#       OCR models, backed by core.inference.server
+#     - register_remote() swaps them into a ModelRegistry, so the
+#       pipelines run unchanged while the models live in one
+#       shared process
+# --------------------------------------------------
+
+
+class InferenceClient:
+    def __init__(self, socket_path, timeout=300):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._local = threading.local()     # one connection per thread
+
+    def _connection(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.socket_path)
+            except OSError:
+                sock.close()
+                raise
+            self._local.sock = sock
+        return sock
+
+    def close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            self._local.sock = None
+            sock.close()
+
+    def call(self, op, arrays=(), args=None):
+        arrays = list(arrays)
+        # Every op is a pure function of its inputs, so one retry on a
+        # fresh connection is safe (e.g. after a server restart)
+        for attempt in range(2):
+            try:
+                sock = self._connection()
+                send_message(sock, {"op": op, "args": args or {}}, arrays)
+                header, _ = recv_message(sock)
+                if header is None:
+                    raise ConnectionError("Inference server closed the connection")
+                break
+            except (ConnectionError, OSError):
+                self.close()
+                if attempt:
+                    raise
+
+        if not header.get("ok"):
+            raise RuntimeError(f"Inference server error ({op}): {header.get('error')}")
+        return header["result"]
+
+
+class RemoteDetector:
+    def __init__(self, client):
+        self.client = client
+
+    def detect(self, img_bgr):
+        return self.client.call("detect", [img_bgr])[0]
+
+    def detect_batch(self, frames, batch_size=8):
+        # The server picks the model batch size across all callers
+        return self.client.call("detect", frames) if len(frames) else []
+
+
+class RemoteCaptioner:
+    def __init__(self, client):
+        self.client = client
+
+    def caption(self, img_bgr, mode="full"):
+        return self.caption_batch([img_bgr], mode=mode)[0]
+
+    def caption_batch(self, frames, mode="full", batch_size=8):
+        return self.client.call("caption", frames, {"mode": mode}) if len(frames) else []
+
+
+class RemoteHuman:
+    def __init__(self, client):
+        self.client = client
+
+    def analyse(self, image, objects):
+        return self.client.call("human", [image], {"objects": objects})[0]
+
+
+class RemoteOCR:
+    def __init__(self, client):
+        self.client = client
+
+    def readtext(self, img):
+        return self.client.call("ocr", [img])[0]
+
+    def readtext_batched(self, images, batch_size=None):
+        return self.client.call("ocr_batched", images) if len(images) else []
+
+
+REMOTE_MODELS = {
+    "detector": RemoteDetector,
+    "captioner": RemoteCaptioner,
+    "human": RemoteHuman,
+    "ocr": RemoteOCR
+}
+
+
+def register_remote(models, socket_path, timeout=300):
+    """
+    Points the registry's models at the inference server. "Loading" a
+    remote model is a ping, so /health and warm-up report whether the
+    server is reachable.
+    """
+    client = InferenceClient(socket_path, timeout=timeout)
+
+    def _loader(proxy_cls):
+        def _load():
+            client.call("ping")
+            return proxy_cls(client)
+        return _load
+
+    for name, proxy_cls in REMOTE_MODELS.items():
+        models.register(name, _loader(proxy_cls))
+    return client
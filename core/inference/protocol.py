@@ -0,0 +1,86 @@
+import json
+import struct
+
+import numpy as np
+
+# --------------------------------------------------
+#     INFERENCE WIRE PROTOCOL (Unix socket)
+#     message = 4-byte big-endian header length
+#             + JSON header {..., "arrays": [{dtype, shape}, ...]}
+#             + raw C-order buffers of each array, back to back
+#     Only numeric arrays and JSON cross the socket (no pickle),
+#     so a peer can never make the other side execute code.
+# --------------------------------------------------
+
+MAX_HEADER_BYTES = 16 * 1024 * 1024
+MAX_ARRAY_BYTES = 512 * 1024 * 1024
+ALLOWED_DTYPE_KINDS = {"u", "i", "f", "b"}
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def send_message(sock, header, arrays=()):
+    metas, buffers = [], []
+    for a in arrays:
+        a = np.ascontiguousarray(a)
+        metas.append({"dtype": a.dtype.str, "shape": list(a.shape)})
+        buffers.append(memoryview(a).cast("B"))
+
+    body = json.dumps(dict(header, arrays=metas)).encode()
+    sock.sendall(struct.pack(">I", len(body)) + body)
+    for buf in buffers:
+        sock.sendall(buf)
+
+
+def recv_message(sock):
+    """Returns (header, arrays), or (None, []) if the peer closed cleanly."""
+    prefix = _recv_exact(sock, 4, allow_eof=True)
+    if prefix is None:
+        return None, []
+
+    (length,) = struct.unpack(">I", prefix)
+    if length > MAX_HEADER_BYTES:
+        raise ProtocolError(f"Header too large: {length} bytes")
+    header = json.loads(bytes(_recv_exact(sock, length)))
+
+    arrays = []
+    for meta in header.pop("arrays", []):
+        dtype = np.dtype(meta["dtype"])
+        if dtype.kind not in ALLOWED_DTYPE_KINDS:
+            raise ProtocolError(f"Unsupported dtype: {meta['dtype']}")
+        shape = [int(d) for d in meta["shape"]]
+        nbytes = dtype.itemsize * int(np.prod(shape, dtype=np.int64))
+        if nbytes > MAX_ARRAY_BYTES:
+            raise ProtocolError(f"Array too large: {nbytes} bytes")
+        arrays.append(np.frombuffer(_recv_exact(sock, nbytes), dtype=dtype).reshape(shape))
+
+    return header, arrays
+
+
+def _recv_exact(sock, n, allow_eof=False):
+    buf = bytearray(n)
+    view = memoryview(buf)
+    got = 0
+    while got < n:
+        k = sock.recv_into(view[got:], n - got)
+        if k == 0:
+            if allow_eof and got == 0:
+                return None
+            raise ConnectionError("Inference socket closed mid-message")
+        got += k
+    return buf
+
+
+def to_json(value):
+    """Converts model outputs (numpy scalars / arrays, tuples) to JSON types."""
+    if isinstance(value, dict):
+        return {str(k): to_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_json(v) for v in value]
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    return value
@@ -0,0 +1,214 @@
+import os
+import queue
+import threading
+import time
+import traceback
+import socketserver
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from core.inference.protocol import send_message, recv_message, to_json, ProtocolError
+
+# --------------------------------------------------
+#     LOCAL INFERENCE SERVER
+#     - one process owns the models; web workers connect over a
+#       Unix socket (see core.inference.client)
+#     - one micro-batcher thread per model: requests arriving from
+#       any connection within max_wait_ms are merged into a single
+#       batched model call, then split back per request
+#
+#     python -m core.inference.server --socket /tmp/oracle-inference.sock
+# --------------------------------------------------
+
+# op -> (model name, batchable, run(model, items, args) -> one output per item)
+OPS = {
+    "detect": ("detector", True,
+               lambda m, items, args, bs: m.detect_batch(items, batch_size=bs)),
+    "caption": ("captioner", True,
+                lambda m, items, args, bs: m.caption_batch(items, mode=args.get("mode", "full"), batch_size=bs)),
+    # Letterboxed plate crops share one size, so they batch across requests
+    "ocr_batched": ("ocr", True,
+                    lambda m, items, args, bs: m.readtext_batched(items, batch_size=bs)),
+    "ocr": ("ocr", False,
+            lambda m, items, args, bs: [m.readtext(items[0])]),
+    "human": ("human", False,
+              lambda m, items, args, bs: [m.analyse(items[0], args.get("objects", []))]),
+}
+
+# Batched across requests only with inputs of the same shape: YOLO
+# letterboxes a batch to a common size; plate crops are fixed-size canvases
+SHAPE_KEYED_OPS = {"detect", "ocr_batched"}
+
+
+class _Request:
+    __slots__ = ("op", "items", "args", "key", "future")
+
+    def __init__(self, op, items, args):
+        self.op = op
+        self.items = items
+        self.args = args
+        self.future = Future()
+
+        batchable = OPS[op][1]
+        if batchable:
+            # Same op, same decode args and (where the model letterboxes a
+            # batch to one size) same input shape can share a call, so a
+            # client's outputs never depend on other traffic in the batch
+            shapes = tuple(sorted({a.shape for a in items}))
+            self.key = (op, tuple(sorted(args.items())), shapes if op in SHAPE_KEYED_OPS else None)
+        else:
+            self.key = id(self)
+
+
+class MicroBatcher:
+    """
+    Collects requests for one model and runs them as batches.
+    A batch closes when it holds max_batch items or max_wait_ms has
+    passed since its first request, whichever comes first.
+    """
+
+    def __init__(self, models, name, max_batch=8, max_wait_ms=10):
+        self.models = models
+        self.name = name
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000.0
+        self.stats = {"requests": 0, "items": 0, "batches": 0, "model_calls": 0}
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name=f"batcher-{name}", daemon=True)
+        self._thread.start()
+
+    def submit(self, op, items, args):
+        req = _Request(op, items, args)
+        self._queue.put(req)
+        return req.future
+
+    def _loop(self):
+        while True:
+            first = self._queue.get()
+            pending, count = [first], len(first.items)
+            deadline = time.monotonic() + self.max_wait
+
+            while count < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    req = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.append(req)
+                count += len(req.items)
+
+            self.stats["batches"] += 1
+            self.stats["requests"] += len(pending)
+            self.stats["items"] += count
+
+            groups = OrderedDict()
+            for req in pending:
+                groups.setdefault(req.key, []).append(req)
+            for reqs in groups.values():
+                self._run(reqs)
+
+    def _run(self, reqs):
+        items = [a for r in reqs for a in r.items]
+        try:
+            model = self.models.get(self.name)
+            outputs = OPS[reqs[0].op][2](model, items, reqs[0].args, self.max_batch) if items else []
+            self.stats["model_calls"] += 1
+        except Exception as e:
+            traceback.print_exc()
+            for r in reqs:
+                r.future.set_exception(e)
+            return
+
+        start = 0
+        for r in reqs:
+            r.future.set_result(list(outputs[start:start + len(r.items)]))
+            start += len(r.items)
+
+
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        # One connection per client thread; requests on it are sequential
+        while True:
+            try:
+                header, arrays = recv_message(self.request)
+            except (ConnectionError, ProtocolError, ValueError) as e:
+                print(f"[InferenceServer] Dropping connection: {e}")
+                return
+            if header is None:
+                return
+
+            try:
+                result = self.server.dispatch(header.get("op"), arrays, header.get("args") or {})
+                reply = {"ok": True, "result": to_json(result)}
+            except Exception as e:
+                reply = {"ok": False, "error": f"{type(e).__name__}: {e}"}
+
+            try:
+                send_message(self.request, reply)
+            except OSError:
+                return
+
+
+class InferenceServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, models, max_batch=8, max_wait_ms=10):
+        if os.path.exists(socket_path):
+            os.remove(socket_path)     # stale socket from a previous run
+        super().__init__(socket_path, _Handler)
+        os.chmod(socket_path, 0o660)
+
+        self.models = models
+        self.batchers = {
+            name: MicroBatcher(models, name, max_batch=max_batch, max_wait_ms=max_wait_ms)
+            for name in {spec[0] for spec in OPS.values()}
+        }
+
+    def dispatch(self, op, arrays, args):
+        if op == "ping":
+            return {"pid": os.getpid()}
+        if op == "stats":
+            return {
+                "models": self.models.status(),
+                "batchers": {name: dict(b.stats) for name, b in self.batchers.items()}
+            }
+        if op not in OPS:
+            raise ValueError(f"Unknown op: {op}")
+        return self.batchers[OPS[op][0]].submit(op, arrays, args).result()
+
+
+def main():
+    import argparse
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Oracle Forensic inference server")
+    parser.add_argument("--socket", default=os.getenv("INFERENCE_SOCKET", "/tmp/oracle-inference.sock"))
+    parser.add_argument("--max-batch", type=int, default=int(os.getenv("INFERENCE_MAX_BATCH", 8)))
+    parser.add_argument("--max-wait-ms", type=float, default=float(os.getenv("INFERENCE_MAX_WAIT_MS", 10)))
+    args = parser.parse_args()
+
+    # Constructing a Pipeline registers the same model loaders the web app uses
+    from core.pipeline import Pipeline, pipeline_config_from_env
+    from core.models import registry
+
+    Pipeline(**pipeline_config_from_env("data/outputs"))
+    registry.warm_up(background=False)
+
+    server = InferenceServer(
+        args.socket, registry, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms
+    )
+    print(f"[InferenceServer] Listening on {args.socket} "
+          f"(max batch {args.max_batch}, max wait {args.max_wait_ms} ms)")
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        if os.path.exists(args.socket):
+            os.remove(args.socket)
+
+
+if __name__ == "__main__":
+    main()
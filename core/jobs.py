@@ -0,0 +1,256 @@
+# core/jobs.py
+
+import os
+import socket
+import threading
+import queue
+import time
+import traceback
+import uuid
+from datetime import datetime, timedelta
+
+from core.metrics import JOB_SECONDS
+
+# --------------------------------------------------
+#     BACKGROUND JOB ENGINE
+#     - durable job records (MongoDB)
+#     - one worker pool per priority lane
+#     - per-job state + frame progress
+#     - jobs are owned by one process at a time: the owner heartbeats
+#       them, and other processes only take over (claim) jobs whose
+#       heartbeat is older than the lease
+# --------------------------------------------------
+
+JOB_STATES = ("queued", "extracting", "analyzing", "reporting", "done", "failed")
+TERMINAL_STATES = {"done", "failed"}
+
+# Progress writes are throttled so a 1000-frame video does not issue
+# 1000 MongoDB updates; state changes are always persisted immediately.
+PROGRESS_FLUSH_SEC = 1.0
+
+# Owners refresh heartbeat_at this often; a job is resumed elsewhere once
+# its heartbeat is older than the lease (owner crashed or was stopped).
+HEARTBEAT_SEC = 10.0
+JOB_LEASE_SEC = 60.0
+
+
+class JobQueue:
+    """
+    Local job queue backed by the case database.
+
+    Each lane (e.g. "image", "video") owns its own queue and worker threads,
+    so short image cases are never stuck behind a long video.
+    """
+
+    def __init__(self, store, lanes, heartbeat_sec=HEARTBEAT_SEC, lease_sec=JOB_LEASE_SEC):
+        self.store = store
+        self.lanes = dict(lanes)               # lane -> worker count
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.heartbeat_sec = heartbeat_sec
+        self.lease_sec = lease_sec
+        self._queues = {lane: queue.Queue() for lane in self.lanes}
+        self._handlers = {}                    # kind -> (lane, handler)
+        self._live = {}                        # job_id -> job dict
+        self._attachments = {}                 # job_id -> in-memory input
+        self._flushed = {}                     # job_id -> last db write
+        self._lock = threading.Lock()
+        self._threads = []
+
+    # ---------- SETUP ----------
+
+    def register(self, kind, handler, lane):
+        if lane not in self.lanes:
+            raise ValueError(f"Unknown job lane: {lane}")
+        self._handlers[kind] = (lane, handler)
+
+    def start(self):
+        if self._threads:
+            return
+
+        for lane, count in self.lanes.items():
+            for n in range(count):
+                t = threading.Thread(
+                    target=self._worker,
+                    args=(lane,),
+                    name=f"jobs-{lane}-{n}",
+                    daemon=True
+                )
+                t.start()
+                self._threads.append(t)
+
+        # Resume anything left queued or running by a process that is gone
+        self._resume()
+
+        t = threading.Thread(target=self._heartbeat, name="jobs-heartbeat", daemon=True)
+        t.start()
+        self._threads.append(t)
+
+    # ---------- SUBMIT / QUERY ----------
+
+    def submit(self, kind, user, payload, attachment=None):
+        """
+        attachment: optional in-memory input (e.g. upload bytes) handed to
+        the handler as job["attachment"]. It is never persisted, so a job
+        resumed after a restart gets None and must fall back to its payload.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"No handler registered for job kind: {kind}")
+
+        now = datetime.utcnow()
+        job = {
+            "job_id": uuid.uuid4().hex,
+            "kind": kind,
+            "lane": self._handlers[kind][0],
+            "user": user,
+            "payload": payload,
+            "state": "queued",
+            "progress": _empty_progress(),
+            "result": None,
+            "error": None,
+            "owner": self.owner,
+            "heartbeat_at": now,
+            "created_at": now,
+            "updated_at": now
+        }
+
+        self.store.save_job(dict(job))
+        if attachment is not None:
+            with self._lock:
+                self._attachments[job["job_id"]] = attachment
+        self._enqueue(job)
+        return job["job_id"]
+
+    def get(self, job_id, user):
+        with self._lock:
+            job = self._live.get(job_id)
+        if job and job["user"] == user:
+            return job
+        return self.store.get_job(job_id, user)
+
+    def depth(self):
+        """Number of queued (not yet started) jobs per lane."""
+        return {lane: q.qsize() for lane, q in self._queues.items()}
+
+    # ---------- OWNERSHIP ----------
+
+    def _resume(self):
+        stale_before = datetime.utcnow() - timedelta(seconds=self.lease_sec)
+        for job in self.store.get_unfinished_jobs():
+            if job["kind"] not in self._handlers:
+                continue
+            with self._lock:
+                if job["job_id"] in self._live:
+                    continue
+
+            # Atomic: of several processes starting together, one wins
+            job = self.store.claim_job(job["job_id"], self.owner, stale_before)
+            if job is None:
+                continue
+            job.pop("_id", None)
+            job.update({"state": "queued", "progress": _empty_progress()})
+            self.store.update_job(job["job_id"], {
+                "state": "queued",
+                "progress": job["progress"]
+            })
+            self._enqueue(job)
+
+    def _heartbeat(self):
+        while True:
+            time.sleep(self.heartbeat_sec)
+            try:
+                with self._lock:
+                    live = list(self._live)
+                if live:
+                    self.store.heartbeat_jobs(live, self.owner)
+                self._resume()
+            except Exception as e:
+                print(f"[JobQueue] Heartbeat failed: {e}")
+
+    # ---------- INTERNALS ----------
+
+    def _enqueue(self, job):
+        with self._lock:
+            self._live[job["job_id"]] = job
+        self._queues[job["lane"]].put(job["job_id"])
+
+    def _worker(self, lane):
+        q = self._queues[lane]
+        while True:
+            job_id = q.get()
+            try:
+                self._run(job_id)
+            finally:
+                q.task_done()
+
+    def _run(self, job_id):
+        with self._lock:
+            job = self._live.get(job_id)
+            attachment = self._attachments.pop(job_id, None)
+        if job is None:
+            return
+
+        _, handler = self._handlers[job["kind"]]
+
+        def progress(state=None, done=None, total=None):
+            self._progress(job, state, done, total)
+
+        started = time.perf_counter()
+        try:
+            result = handler(dict(job, attachment=attachment), progress)
+            self._set(job, state="done", result=result)
+        except Exception as e:
+            traceback.print_exc()
+            self._set(job, state="failed", error=str(e))
+        finally:
+            JOB_SECONDS.observe(time.perf_counter() - started, kind=job["kind"], state=job["state"])
+            with self._lock:
+                self._live.pop(job_id, None)
+                self._flushed.pop(job_id, None)
+
+    def _progress(self, job, state, done, total):
+        fields = {}
+        if state and state != job["state"]:
+            fields["state"] = state
+        if total is not None:
+            job["progress"]["frames_total"] = total
+        if done is not None:
+            job["progress"]["frames_done"] = done
+
+        now = time.monotonic()
+        last = self._flushed.get(job["job_id"], 0.0)
+        if fields or now - last >= PROGRESS_FLUSH_SEC:
+            fields["progress"] = dict(job["progress"])
+            self._set(job, **fields)
+
+    def _set(self, job, **fields):
+        fields["updated_at"] = datetime.utcnow()
+        job.update(fields)
+        self._flushed[job["job_id"]] = time.monotonic()
+        try:
+            self.store.update_job(job["job_id"], fields)
+        except Exception as e:
+            print(f"[JobQueue] Failed to persist job {job['job_id']}: {e}")
+
+
+def _empty_progress():
+    return {"frames_done": 0, "frames_total": 0}
+
+
+def job_status(job):
+    """JSON-safe view of a job for the status endpoint."""
+    progress = job.get("progress") or _empty_progress()
+    total = progress.get("frames_total", 0)
+    done = progress.get("frames_done", 0)
+
+    return {
+        "job_id": job["job_id"],
+        "kind": job["kind"],
+        "state": job["state"],
+        "progress": {
+            "frames_done": done,
+            "frames_total": total,
+            "percent": round(100 * done / total, 1) if total else None
+        },
+        "case_id": (job.get("result") or {}).get("case_id"),
+        "error": job.get("error")
+    }
@@ -1,17 +1,30 @@
 import cv2
-import easyocr
 import os
 import numpy as np
 
-# Initialize reader once
-reader = easyocr.Reader(['en'], gpu=False) 
+from core.models import registry
 
-def detect_license_plates(input_data):
+# Vehicle ROI crops: plates sit in the lower part of the vehicle box
+ROI_LOWER_FRACTION = 0.6     # keep the bottom 60% of the box
+ROI_PAD = 0.08               # pad each side by 8% of the box size
+ROI_SIZE = (480, 240)        # (w, h) letterbox canvas for batched OCR
+ROI_MAX_UPSCALE = 2.0
+
+def get_reader():
+    """Shared EasyOCR reader (loaded once by the model registry)."""
+    return registry.get("ocr")
+
+def detect_license_plates(input_data, vehicles=None):
     """
     Universal License Plate Detector.
     Handles:
       1. Single Image (numpy array) -> for Image Pipeline
       2. List of Analyzed Frames -> for Video Pipeline
+
+    vehicles (optional, image input only): list of {"id", "box"}. When given,
+    only padded lower-body crops of those vehicles are OCR'd, in one batch,
+    and each plate is linked back to its vehicle. Without vehicles the whole
+    image is scanned.
     """
     plates = []
 
@@ -27,17 +40,87 @@ def detect_license_plates(input_data):
             
             _run_ocr(img, plates, timestamp=fr.get("timestamp_sec", 0), frame=fr.get("frame_file"))
 
-    # CASE 2: Image Pipeline (Single Numpy Array)
+    # CASE 2: Image Pipeline, vehicle regions only
+    elif isinstance(input_data, np.ndarray) and vehicles:
+        print(f"   > Scanning {len(vehicles)} vehicle regions for plates...")
+        _run_roi_ocr(input_data, vehicles, plates)
+
+    # CASE 3: Image Pipeline (Single Numpy Array)
     elif isinstance(input_data, np.ndarray):
         print("   > Scanning single image for plates...")
         _run_ocr(input_data, plates)
 
     return plates
 
+def vehicle_roi(box, img_shape):
+    """Padded lower-body region of a vehicle box, clipped to the image."""
+    h_img, w_img = img_shape[:2]
+    x1, y1, x2, y2 = box
+    w, h = x2 - x1, y2 - y1
+
+    top = y1 + h * (1 - ROI_LOWER_FRACTION)
+    rx1 = int(max(0, x1 - w * ROI_PAD))
+    rx2 = int(min(w_img, x2 + w * ROI_PAD))
+    ry1 = int(max(0, top))
+    ry2 = int(min(h_img, y2 + h * ROI_PAD))
+    return rx1, ry1, rx2, ry2
+
+def _letterbox(crop):
+    """Fits a crop into ROI_SIZE without distortion; returns canvas + scale."""
+    cw, ch = ROI_SIZE
+    h, w = crop.shape[:2]
+    scale = min(cw / w, ch / h, ROI_MAX_UPSCALE)
+
+    resized = cv2.resize(crop, (max(1, int(w * scale)), max(1, int(h * scale))))
+    canvas = np.zeros((ch, cw, 3), dtype=crop.dtype)
+    canvas[:resized.shape[0], :resized.shape[1]] = resized
+    return canvas, scale
+
+def _run_roi_ocr(img, vehicles, plates_list):
+    """Batched OCR over vehicle crops; keeps the best read per plate text."""
+    canvases, meta = [], []
+    for v in vehicles:
+        rx1, ry1, rx2, ry2 = vehicle_roi(v["box"], img.shape)
+        if rx2 - rx1 < 8 or ry2 - ry1 < 8:
+            continue
+        canvas, scale = _letterbox(img[ry1:ry2, rx1:rx2])
+        canvases.append(canvas)
+        meta.append((v, rx1, ry1, scale))
+
+    if not canvases:
+        return
+
+    try:
+        batched = get_reader().readtext_batched(canvases, batch_size=len(canvases))
+    except Exception as e:
+        print(f"Warning: OCR error: {e}")
+        return
+
+    best = {}
+    for (v, ox, oy, scale), results in zip(meta, batched):
+        for (bbox, text, conf) in results:
+            text = text.replace(" ", "").upper()
+
+            # Filter noise (len > 4, confidence > 0.4)
+            if len(text) > 4 and conf > 0.4:
+                xs = [pt[0] / scale + ox for pt in bbox]
+                ys = [pt[1] / scale + oy for pt in bbox]
+                entry = {
+                    "plate": text,
+                    "confidence": round(float(conf), 2),
+                    "vehicle": v.get("id"),
+                    "box": [float(min(xs)), float(min(ys)), float(max(xs)), float(max(ys))]
+                }
+                # Overlapping vehicle crops can read the same plate twice
+                if text not in best or entry["confidence"] > best[text]["confidence"]:
+                    best[text] = entry
+
+    plates_list.extend(best.values())
+
 def _run_ocr(img, plates_list, timestamp=None, frame=None):
     """Internal helper to run EasyOCR and append valid results."""
     try:
-        results = reader.readtext(img)
+        results = get_reader().readtext(img)
         for (bbox, text, conf) in results:
             text = text.replace(" ", "").upper()
             
@@ -0,0 +1,215 @@
+# core/metrics.py
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from core.trace import span, annotate
+
+# --------------------------------------------------
+#     METRICS (Prometheus text exposition, no client library)
+#     - counters and histograms are updated in-process
+#     - gauges are read from a callback at scrape time
+#       (queue depth, cache hit rate, model state)
+#     - served by the /metrics route; with FRAME_WORKERS > 1 the
+#       per-frame stages run in worker processes and only the
+#       parent's totals are visible here
+# --------------------------------------------------
+
+# Seconds; spans a cached lookup up to a long video
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 900)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def _labels(names, values, extra=()):
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in pairs) + "}"
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, help, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels[k]) for k in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        return [(self.name, _labels(self.labels, key), v) for key, v in sorted(values.items())]
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series = {}     # label values -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels[k]) for k in self.labels)
+        # Index of the first bucket with le >= value (len(buckets) = +Inf only)
+        idx = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            series[idx] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def samples(self):
+        with self._lock:
+            snapshot = {k: list(v) for k, v in self._series.items()}
+
+        out = []
+        for key, series in sorted(snapshot.items()):
+            cumulative = 0
+            for le, n in zip(self.buckets + (math.inf,), series):
+                cumulative += n
+                out.append((f"{self.name}_bucket", _labels(self.labels, key, [("le", _number(le))]), cumulative))
+            out.append((f"{self.name}_sum", _labels(self.labels, key), series[-2]))
+            out.append((f"{self.name}_count", _labels(self.labels, key), series[-1]))
+        return out
+
+
+class Gauge:
+    kind = "gauge"
+
+    def __init__(self, name, help, fn, labels=()):
+        """fn() -> a number, or {label value tuple: number}; None values are skipped."""
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self.fn = fn
+
+    def samples(self):
+        value = self.fn()
+        if not isinstance(value, dict):
+            value = {(): value}
+        return [
+            (self.name, _labels(self.labels, key if isinstance(key, tuple) else (key,)), v)
+            for key, v in sorted(value.items()) if v is not None
+        ]
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def _add(self, metric):
+        with self._lock:
+            # Re-registering (e.g. a module reloaded in tests) keeps the first
+            existing = self._metrics.get(metric.name)
+            if existing is not None and type(existing) is type(metric) and metric.kind != "gauge":
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help, labels=()):
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name, help, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name, help, fn, labels=()):
+        return self._add(Gauge(name, help, fn, labels))
+
+    def render(self):
+        with self._lock:
+            metrics = list(self._metrics.values())
+
+        lines = []
+        for metric in metrics:
+            try:
+                samples = metric.samples()
+            except Exception as e:
+                # A failing gauge callback must not break the whole scrape
+                print(f"[Metrics] {metric.name} failed: {e}")
+                continue
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(f"{name}{labels} {_number(value)}" for name, labels, value in samples)
+        return "\n".join(lines) + "\n"
+
+
+# Process-wide default registry, like core.models.registry
+metrics = MetricsRegistry()
+
+STAGE_SECONDS = metrics.histogram(
+    "oracle_stage_seconds", "Time spent in each analysis stage", labels=("stage",)
+)
+STAGE_ERRORS = metrics.counter(
+    "oracle_stage_errors_total", "Analysis stages that raised", labels=("stage",)
+)
+JOB_SECONDS = metrics.histogram(
+    "oracle_job_seconds", "Background job run time by kind and outcome", labels=("kind", "state")
+)
+
+
+@contextmanager
+def timed(stage, **attrs):
+    """
+    with timed("detect", frames=8): ...  -> oracle_stage_seconds{stage="detect"}
+    attrs (e.g. model input sizes) only go to the case trace, if one is active.
+    """
+    started = time.perf_counter()
+    try:
+        with span(stage, **attrs):
+            yield
+    except Exception:
+        STAGE_ERRORS.inc(stage=stage)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage)
+
+
+def timed_iter(iterable, stage):
+    """
+    Yields from a lazy iterable (e.g. frame extraction) and records the
+    time spent producing items, excluding the consumer's work, as one
+    observation when it is exhausted or closed.
+    """
+    spent = 0.0
+    it = iter(iterable)
+    try:
+        while True:
+            started = time.perf_counter()
+            try:
+                item = next(it)
+            except StopIteration:
+                spent += time.perf_counter() - started
+                return
+            spent += time.perf_counter() - started
+            yield item
+    finally:
+        STAGE_SECONDS.observe(spent, stage=stage)
+        annotate(**{f"{stage}_ms": round(spent * 1000, 1)})
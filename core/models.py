@@ -0,0 +1,96 @@
+# core/models.py
+
+import threading
+import time
+import traceback
+
+# --------------------------------------------------
+#     MODEL REGISTRY
+#     - each model is loaded once, on first use or by warm-up
+#     - heavy imports (torch, ultralytics, deepface, easyocr)
+#       happen inside the loaders, not at module import
+#     - /health reports per-model state and load time
+# --------------------------------------------------
+
+
+class ModelRegistry:
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._locks = {}
+        self._status = {}
+        self._guard = threading.Lock()
+
+    def register(self, name, loader):
+        """Registers (or replaces) the zero-argument loader for a model."""
+        with self._guard:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+            self._models.pop(name, None)
+            self._status[name] = {"state": "not_loaded", "load_sec": None, "error": None}
+
+    def get(self, name):
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        if name not in self._loaders:
+            raise KeyError(f"Model not registered: {name}")
+
+        # Per-model lock: concurrent first callers wait for a single load
+        with self._locks[name]:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+
+            self._status[name].update({"state": "loading", "error": None})
+            started = time.perf_counter()
+            try:
+                model = self._loaders[name]()
+            except Exception as e:
+                self._status[name].update({"state": "failed", "error": str(e)})
+                raise
+
+            self._status[name].update({
+                "state": "ready",
+                "load_sec": round(time.perf_counter() - started, 2)
+            })
+            self._models[name] = model
+            return model
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def warm_up(self, names=None, background=True):
+        """Loads models ahead of the first request, optionally in a thread."""
+        names = list(names or self._loaders)
+
+        def _load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception:
+                    print(f"[ModelRegistry] Warm-up failed for {name}")
+                    traceback.print_exc()
+
+        if not background:
+            _load_all()
+            return None
+
+        t = threading.Thread(target=_load_all, name="model-warmup", daemon=True)
+        t.start()
+        return t
+
+    def status(self):
+        return {name: dict(s) for name, s in self._status.items()}
+
+
+def _load_ocr():
+    import easyocr
+    return easyocr.Reader(['en'], gpu=False)
+
+
+# Process-wide default registry. The EasyOCR reader is shared by the
+# image and video plate paths; Pipeline registers its own models here.
+registry = ModelRegistry()
+registry.register("ocr", _load_ocr)
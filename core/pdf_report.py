@@ -15,6 +15,9 @@ from reportlab.lib.units import inch
 from datetime import datetime
 import os
 
+# Bump when the report layout changes; cached PDFs are re-rendered
+TEMPLATE_VERSION = "1"
+
 
 def generate_forensic_pdf(result, save_path, storage_dir=""):
     styles = getSampleStyleSheet()
@@ -224,15 +227,16 @@ def generate_forensic_pdf(result, save_path, storage_dir=""):
         story.append(Spacer(1, 20))
         story.append(Paragraph("Detected License Plates", section_style))
 
-        plate_table_data = [["Plate Number", "Confidence"]]
+        plate_table_data = [["Plate Number", "Vehicle", "Confidence"]]
         for p in plates:
             plate_table_data.append([
                 p.get("plate", "UNKNOWN"),
+                p.get("vehicle") or "-",
                 str(p.get("confidence", "N/A"))
             ])
 
         # Create table
-        t = Table(plate_table_data, colWidths=[3*inch, 3*inch])
+        t = Table(plate_table_data, colWidths=[2.5*inch, 2*inch, 1.5*inch])
         t.setStyle(TableStyle([
             ("GRID", (0,0), (-1,-1), 0.5, colors.grey),
             ("BACKGROUND", (0,0), (-1,0), colors.whitesmoke),
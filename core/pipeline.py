@@ -1,12 +1,10 @@
 import os
 import uuid
 import cv2
-import hashlib
+import numpy as np
 from datetime import datetime
 
-from core.detector import Detector
-from core.captioner import Captioner
-from core.human_analyser import HumanAnalyser
+from core.models import registry
 from core.reasoning import (
     fault_score,
     verification_layer,
@@ -14,13 +12,20 @@ from core.reasoning import (
     is_vehicle
 )
 from core.annotate import draw_annotations
-from core.geometry import iou
+from core.derivatives import write_derivatives
+from core.geometry import PairGeometry
 from core.explanation import build_explanation
 from core.config import VEHICLE_NAMES
 from core.severity import compute_severity
 from core.narrative import build_narrative
 # ✅ NEW IMPORT
 from core.license_plate import detect_license_plates
+from core.cache import ResultCache, cache_key, model_tag, content_hash
+from core.metrics import timed
+from core.trace import tracing
+
+# Bump whenever reasoning / schema changes so cached results are not reused
+PIPELINE_VERSION = "1.2"
 
 
 class Pipeline:
@@ -29,78 +34,187 @@ class Pipeline:
     Produces a structured, investigator-grade forensic report schema
     """
 
-    def __init__(self, yolo_weights, caption_model, storage_dir):
-        self.detector = Detector(yolo_weights)
-        self.captioner = Captioner(caption_model)
-        self.human = HumanAnalyser()
+    def __init__(self, yolo_weights, caption_model, storage_dir, caption_short_tokens=None,
+                 cache=None, models=None, plate_mode="roi", detector_backend="torch",
+                 caption_options=None):
+        """
+        caption_options: Captioner CPU settings {precision, image_size,
+                         traced, graph_cache} (see core.captioner).
+        """
+        caption_options = {k: v for k, v in (caption_options or {}).items() if v}
+
+        # Models are registered here but only loaded on first use / warm-up
+        self.models = models or registry
+        self.models.register("detector", lambda: _load_detector(yolo_weights, detector_backend))
+        self.models.register(
+            "captioner", lambda: _load_captioner(caption_model, caption_short_tokens, caption_options)
+        )
+        self.models.register("human", _load_human)
+
+        # "roi": OCR only vehicle lower-body crops; "full": whole image
+        self.plate_mode = plate_mode
 
         self.storage = storage_dir
         os.makedirs(self.storage, exist_ok=True)
 
-        self._cache = {}
+        self.cache = cache or ResultCache()
+        self._tag_args = (yolo_weights, caption_model, detector_backend, caption_options)
+        self._model_tags = {}
+
+        # Enough to rebuild an equivalent pipeline in a worker process
+        self.config = {
+            "yolo_weights": yolo_weights,
+            "caption_model": caption_model,
+            "storage_dir": storage_dir,
+            "caption_short_tokens": caption_short_tokens,
+            "plate_mode": plate_mode,
+            "detector_backend": detector_backend,
+            "caption_options": caption_options
+        }
 
-    def run(self, image_path: str) -> dict:
-        img_hash = self._hash_image(image_path)
+    @property
+    def model_tag(self):
+        # Per plate mode: plate_mode can be switched on a live pipeline
+        if self.plate_mode not in self._model_tags:
+            self._model_tags[self.plate_mode] = model_tag(*self._tag_args, plate_mode=self.plate_mode)
+        return self._model_tags[self.plate_mode]
+
+    @property
+    def detector(self):
+        return self.models.get("detector")
+
+    @property
+    def captioner(self):
+        return self.models.get("captioner")
+
+    @property
+    def human(self):
+        return self.models.get("human")
+
+    def run(self, image_path: str, data: bytes = None, trace=False, profile_after=None) -> dict:
+        """
+        image_path: the stored upload (recorded as the original evidence)
+        data: the upload's bytes if already in memory; otherwise the file is
+              read once and the same buffer is hashed and decoded.
+        trace: record a per-stage trace (core.trace) under result["trace"];
+               profile_after (seconds) also keeps a sampling profile of
+               runs slower than that.
+        """
+        if not trace:
+            return self._run(image_path, data)
+
+        with tracing("image", profile_after=profile_after) as t:
+            result = self._run(image_path, data)
+        # Copy: the cached result object must not carry this run's trace
+        return dict(result, trace=t.to_dict())
+
+    def _run(self, image_path, data):
+        if data is None:
+            with open(image_path, "rb") as f:
+                data = f.read()
+
+        with timed("hash"):
+            key = cache_key(content_hash(data), self.model_tag, PIPELINE_VERSION)
 
         # ---- cache safety ----
-        if img_hash in self._cache:
-            cached = self._cache[img_hash]
-            if "evidence" in cached:
-                return cached
-
-        img = cv2.imread(image_path)
+        # Only the analysis is cached; every run is still its own case
+        cached = self.cache.get(key)
+        if cached and "evidence" in cached and self._evidence_exists(cached):
+            cached["case"] = self._case_header(uuid.uuid4().hex[:8])
+            cached["evidence"]["original_image"] = os.path.basename(image_path)
+            return cached
+
+        with timed("decode", bytes=len(data)):
+            img = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
         if img is None:
             raise ValueError("Invalid image input")
 
+        result = self.analyse(img)
+
+        analysis = {k: v for k, v in result.items() if k != "case"}
+        self.cache.put(key, analysis)
+
+        result["evidence"]["original_image"] = os.path.basename(image_path)
+        return result
+
+    def analyse(self, img, save_annotated: bool = True, objects=None, raw_caption=None) -> dict:
+        """
+        Runs the forensic analysis on an already-decoded BGR image.
+        Video frames call this directly so they are never re-read from disk;
+        they pass save_annotated=False to skip the annotated JPEG and may pass
+        objects / raw_caption already produced by the batched model calls.
+        """
+
         # =================================================
         # 1. OBJECT & HUMAN DETECTION
         # =================================================
 
-        objects = self.detector.detect(img)
+        if objects is None:
+            with timed("detect", shape=list(img.shape[:2])):
+                objects = self.detector.detect(img)
+
+        vehicle_idxs = [i for i, o in enumerate(objects) if is_vehicle(o)]
 
         # ✅ 2. LICENSE PLATE DETECTION
-        # Runs OCR on the raw image to find plates
-        license_plates = detect_license_plates(img)
+        # ROI mode reads plates from vehicle crops and links them to Vehicle-N
+        plate_vehicles = None
+        if self.plate_mode == "roi":
+            plate_vehicles = [
+                {"id": f"Vehicle-{n}", "box": objects[vi]["box"]}
+                for n, vi in enumerate(vehicle_idxs, start=1)
+            ]
+        with timed("ocr", mode=self.plate_mode, vehicles=len(vehicle_idxs)):
+            license_plates = detect_license_plates(img, vehicles=plate_vehicles)
 
         persons_raw = []
         if any(o["name"] == "person" for o in objects):
-            persons_raw = self.human.analyse(img, objects)
+            with timed("human", objects=len(objects)):
+                persons_raw = self.human.analyse(img, objects)
 
         # =================================================
         # 3. SCENE UNDERSTANDING
         # =================================================
 
-        raw_caption = self.captioner.caption(img)
-        scene_summary, max_overlap = self._scene_caption(
-            objects, persons_raw, raw_caption
-        )
+        if raw_caption is None:
+            with timed("caption", shape=list(img.shape[:2])):
+                raw_caption = self.captioner.caption(img)
 
-        # =================================================
-        # 4. VEHICLE FAULT REASONING
-        # =================================================
+        with timed("reasoning"):
+            # Pairwise vehicle geometry, computed once for every rule below
+            geometry = PairGeometry([objects[i]["box"] for i in vehicle_idxs])
 
-        vehicle_idxs = [i for i, o in enumerate(objects) if is_vehicle(o)]
+            scene_summary, max_overlap = self._scene_caption(
+                objects, persons_raw, raw_caption, geometry
+            )
 
-        raw_fault = fault_score(objects, scene_summary)
-        verified = verification_layer(raw_fault, objects)
-        normalized_fault = normalize_fault(verified)
+            # =================================================
+            # 4. VEHICLE FAULT REASONING
+            # =================================================
 
-        # =================================================
-        # 5. SEVERITY ANALYSIS
-        # =================================================
+            raw_fault = fault_score(objects, scene_summary, geometry)
+            verified = verification_layer(raw_fault, objects, geometry)
+            normalized_fault = normalize_fault(verified)
 
-        severity_score = compute_severity(
-            max_overlap,
-            list(normalized_fault.values()),
-            len(persons_raw)
-        )
+            # =================================================
+            # 5. SEVERITY ANALYSIS
+            # =================================================
+
+            severity_score = compute_severity(
+                max_overlap,
+                list(normalized_fault.values()),
+                len(persons_raw)
+            )
 
-        severity_level = self._severity_label(severity_score)
+            severity_level = self._severity_label(severity_score)
 
         # =================================================
         # 6. ENTITY CONSTRUCTION
         # =================================================
 
+        plate_by_vehicle = {
+            p["vehicle"]: p["plate"] for p in license_plates if p.get("vehicle")
+        }
+
         vehicles = []
         for idx, vi in enumerate(vehicle_idxs, start=1):
             percent = normalized_fault.get(idx - 1, 0.0)
@@ -110,6 +224,7 @@ class Pipeline:
                 "type": objects[vi]["name"],
                 "bounding_box": objects[vi]["box"],
                 "fault_percent": percent,
+                "license_plate": plate_by_vehicle.get(f"Vehicle-{idx}"),
                 "confidence_reason": self._confidence_reason(
                     objects[vi]["name"],
                     percent,
@@ -130,18 +245,28 @@ class Pipeline:
         # 7. ANNOTATED EVIDENCE
         # =================================================
 
-        annotated = draw_annotations(
-            img,
-            objects,
-            normalized_fault,
-            vehicle_idxs
-        )
-
         case_id = uuid.uuid4().hex[:8]
-        annotated_path = os.path.join(
-            self.storage, f"{case_id}_annotated.jpg"
-        )
-        cv2.imwrite(annotated_path, annotated)
+        evidence = {}
+
+        if save_annotated:
+            with timed("annotate"):
+                annotated = draw_annotations(
+                    img,
+                    objects,
+                    normalized_fault,
+                    vehicle_idxs
+                )
+
+                annotated_path = os.path.join(
+                    self.storage, f"{case_id}_annotated.jpg"
+                )
+                cv2.imwrite(annotated_path, annotated)
+                evidence["annotated_image"] = os.path.basename(annotated_path)
+
+                # Display copies for the report (thumbnail / inline preview)
+                derivatives = write_derivatives(annotated, self.storage, evidence["annotated_image"])
+                evidence["annotated_thumb"] = derivatives["thumb"]
+                evidence["annotated_preview"] = derivatives["preview"]
 
         # =================================================
         # 8. AI INVESTIGATIVE NARRATIVE
@@ -176,12 +301,7 @@ class Pipeline:
         # =================================================
 
         result = {
-            "case": {
-                "case_id": case_id,
-                "generated_at": datetime.utcnow().isoformat(),
-                "system": "Oracle Forensic System v1.0",
-                "disclaimer": "AI-assisted forensic assessment."
-            },
+            "case": self._case_header(case_id),
 
             "scene": {
                 "summary": scene_summary,
@@ -215,39 +335,38 @@ class Pipeline:
                 "tone": "investigative",
                 "confidence": "medium"
             },
-            "evidence": {
-                "annotated_image": os.path.basename(annotated_path),
-                "original_image": os.path.basename(image_path)
-            },
+            "evidence": evidence,
 
             "explanation": explanation
         }
 
-        self._cache[img_hash] = result
         return result
 
     # ... (Helpers) ...
-    def _hash_image(self, path):
-        with open(path, "rb") as f:
-            return hashlib.md5(f.read()).hexdigest()
+    def _case_header(self, case_id):
+        return {
+            "case_id": case_id,
+            "generated_at": datetime.utcnow().isoformat(),
+            "system": "Oracle Forensic System v1.0",
+            "disclaimer": "AI-assisted forensic assessment."
+        }
+
+    def _evidence_exists(self, result):
+        # A persistent cache entry can outlive the annotated JPEG it points to
+        annotated = result["evidence"].get("annotated_image")
+        return not annotated or os.path.exists(os.path.join(self.storage, annotated))
 
-    def _scene_caption(self, objects, persons, raw):
+    def _scene_caption(self, objects, persons, raw, geometry=None):
         vehicles = [o for o in objects if o["name"] in VEHICLE_NAMES]
         pieces = []
-        max_overlap = 0.0
+        geometry = geometry or PairGeometry([v["box"] for v in vehicles])
+        max_overlap = geometry.max_overlap
 
         if len(vehicles) > 1:
             pieces.append(f"{len(vehicles)} vehicles involved")
         elif len(vehicles) == 1:
             pieces.append("single vehicle present")
 
-        for i in range(len(vehicles)):
-            for j in range(i + 1, len(vehicles)):
-                max_overlap = max(
-                    max_overlap,
-                    iou(vehicles[i]["box"], vehicles[j]["box"])
-                )
-
         if max_overlap > 0.25:
             pieces.append("severe collision")
         elif max_overlap > 0.10:
@@ -291,4 +410,43 @@ class Pipeline:
             return "High-energy collision"
         elif overlap > 0.10:
             return "Medium-energy collision"
-        return "Low-energy incident"
\ No newline at end of file
+        return "Low-energy incident"
+
+
+# ---- lazy model loaders (heavy imports deferred until first use) ----
+
+def pipeline_config_from_env(storage_dir):
+    """
+    Pipeline(**config) arguments from the environment. Shared by the web
+    app and the inference server so both load the same models and compute
+    the same result-cache model tag.
+    """
+    return {
+        "yolo_weights": os.getenv("YOLO_WEIGHTS"),
+        "caption_model": os.getenv("CAPTION_MODEL"),
+        "storage_dir": storage_dir,
+        "caption_short_tokens": os.getenv("CAPTION_SHORT_TOKENS"),
+        "plate_mode": os.getenv("PLATE_OCR_MODE", "roi"),
+        # torch | onnx | onnx-int8 | openvino (see bench_detector_backends.py)
+        "detector_backend": os.getenv("DETECTOR_BACKEND", "torch"),
+        # CPU captioning: int8 Linear layers, smaller input, traced vision encoder
+        # (check against fp32 with bench_captioner.py)
+        "caption_options": {
+            "precision": os.getenv("CAPTION_PRECISION", "fp32"),
+            "image_size": int(os.getenv("CAPTION_IMAGE_SIZE", 0)) or None,
+            "traced": os.getenv("CAPTION_TRACED", "0") == "1",
+            "graph_cache": os.getenv("CAPTION_GRAPH_CACHE", "data/cache/captioner")
+        }
+    }
+
+def _load_detector(yolo_weights, backend="torch"):
+    from core.detector import Detector
+    return Detector(yolo_weights, backend=backend)
+
+def _load_captioner(caption_model, short_max_tokens, options=None):
+    from core.captioner import Captioner
+    return Captioner(caption_model, short_max_tokens=short_max_tokens, **(options or {}))
+
+def _load_human():
+    from core.human_analyser import HumanAnalyser
+    return HumanAnalyser()
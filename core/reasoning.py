@@ -1,7 +1,16 @@
-from .geometry import iou, center, horizontal_relation
+import numpy as np
+
+from .geometry import iou, center, horizontal_relation, PairGeometry
 
 VEHICLE_NAMES = {"car", "truck", "bus", "motorcycle", "bicycle", "van"}
 
+# RULE 2 caption keywords
+CRASH_WORDS = ["crash", "collided", "impact", "wreck", "smashed", "collision"]
+
+def crash_word_hits(caption):
+    """RULE 2 input: how many distinct crash words the caption contains."""
+    return sum(1 for w in CRASH_WORDS if w in caption)
+
 def is_vehicle(obj):
     return obj["name"] in VEHICLE_NAMES
 
@@ -30,76 +39,61 @@ def rear_end_suspect(a, b):
     return aligned and b_is_behind
 
 
-def fault_score(objects, caption: str):
+def fault_score(objects, caption: str, geometry=None):
+    """
+    geometry: optional PairGeometry over the vehicles (in detection order);
+              built here when the caller has not computed it already.
+    """
     vehicles = [o for o in objects if is_vehicle(o)]
     vcount = len(vehicles)
 
     if vcount <= 1:
         return {0:0.0}
 
-    score = {i: 50 for i in range(vcount)}
+    geo = geometry or PairGeometry([v["box"] for v in vehicles])
+    score = np.full(vcount, 50, dtype=np.int64)
     caption = caption.lower()
 
     # ================
     #  RULE A: Remove background vehicles (no overlap with any other)
     # ================
-    involved = set()
-    for i in range(vcount):
-        for j in range(vcount):
-            if i == j:
-                continue
-            if iou(vehicles[i]["box"], vehicles[j]["box"]) > 0.01:
-                involved.add(i)
-                involved.add(j)
-
     # Vehicles not involved get forced score = 0 later after normalization
-    uninvolved = {i for i in range(vcount) if i not in involved}
+    uninvolved = np.flatnonzero(~geo.involved(0.01)).tolist()
 
     # ================
     # RULE 1: Fallen motorcycle victim
     # ================
     for i, v in enumerate(vehicles):
         if is_fallen_motorcycle(v):
-            for j in range(vcount):
-                if j != i:
-                    score[j] += 30
-            score[i] -= 10
+            score += 30          # every other vehicle +30 ...
+            score[i] -= 40       # ... and the victim -10
 
     # ================
     # RULE 2: Crash words
     # ================
-    for w in ["crash", "collided", "impact", "wreck", "smashed", "collision"]:
-        if w in caption:
-            for i in score:
-                score[i] += 5
+    score += 5 * crash_word_hits(caption)
 
     # ================
-    # RULE 3: Overlap impact logic
+    # RULE 3: Overlap impact logic (pairs i < j, see impact_side)
     # ================
-    for i in range(vcount):
-        for j in range(i+1, vcount):
-            ov = iou(vehicles[i]["box"], vehicles[j]["box"])
-            if ov > 0.05:
-                side = impact_side(vehicles[i], vehicles[j])
-                if side == "front_or_back":
-                    score[i] += 20
-                    score[j] += 20
-                elif side == "left":
-                    score[i] += 15
-                elif side == "right":
-                    score[j] += 15
+    pairs = np.triu(geo.overlapping(0.05), k=1)
+    head_on = pairs & (np.abs(geo.dx) < 50)
+    side = pairs & ~head_on
+    right = side & (geo.dx > 0)      # j is to the right of i -> j +15
+    left = side & ~(geo.dx > 0)      # otherwise -> i +15
+
+    score += 20 * (head_on.sum(axis=1) + head_on.sum(axis=0))
+    score += 15 * right.sum(axis=0)
+    score += 15 * left.sum(axis=1)
 
     # ================
-    # RULE 4: Rear-end
+    # RULE 4: Rear-end (see rear_end_suspect: j aligned with and behind i)
     # ================
-    for i in range(vcount):
-        for j in range(vcount):
-            if i == j: 
-                continue
-            if rear_end_suspect(vehicles[i], vehicles[j]):
-                score[j] += 20
+    rear = geo.aligned(80) & (geo.dy > 0)
+    score += 20 * rear.sum(axis=0)
 
     # NORMALIZE
+    score = {i: int(v) for i, v in enumerate(score)}
     vals = list(score.values())
     mn, mx = min(vals), max(vals)
     norm = {i: round(100 * (score[i] - mn) / (mx - mn + 1e-6), 1) for i in score}
@@ -109,7 +103,7 @@ def fault_score(objects, caption: str):
         norm[i] = 0.0
 
     return norm
-def verification_layer(primary_fault: dict, objects: list):
+def verification_layer(primary_fault: dict, objects: list, geometry=None):
     """
     Second-stage verification.
     Re-evaluates fault scores using extra evidence.
@@ -117,6 +111,7 @@ def verification_layer(primary_fault: dict, objects: list):
 
     vehicles = [o for o in objects if is_vehicle(o)]
     verified = primary_fault.copy()
+    geo = geometry or PairGeometry([v["box"] for v in vehicles])
 
     # Rule 1: If motorcycle is fallen → strongly reduce its fault
     for i, v in enumerate(vehicles):
@@ -127,14 +122,8 @@ def verification_layer(primary_fault: dict, objects: list):
                     verified[j] += 10
 
     # Rule 2: If vehicle has no overlap with any → background vehicle
-    for i in range(len(vehicles)):
-        involved = False
-        for j in range(len(vehicles)):
-            if i != j and iou(vehicles[i]["box"], vehicles[j]["box"]) > 0.01:
-                involved = True
-                break
-        if not involved:
-            verified[i] = 0
+    for i in np.flatnonzero(~geo.involved(0.01)).tolist():
+        verified[i] = 0
 
     # Rule 3: If only one strong vehicle remains → boost confidence
     max_val = max(verified.values())
@@ -0,0 +1,94 @@
+# core/report_cache.py
+
+import glob
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+from core.metrics import timed
+
+# --------------------------------------------------
+#     PDF REPORT CACHE
+#     - one rendered PDF per case, named by a hash of the case
+#       content + the report template version
+#     - rendered in the background when a case completes, or on
+#       the first download; later downloads are served from disk
+#     - concurrent requests for the same case render it once
+# --------------------------------------------------
+
+LOCK_STRIPES = 64
+
+
+def case_content_hash(case, template_version):
+    """Stable fingerprint of everything a report can show."""
+    h = hashlib.sha256(str(template_version).encode())
+    h.update(json.dumps(case, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+class PdfCache:
+    def __init__(self, report_dir):
+        self.report_dir = report_dir
+        self._renderers = {}     # kind -> (render(case, path), template_version)
+        # Striped locks: bounded memory, and one case always maps to one lock
+        self._locks = [threading.Lock() for _ in range(LOCK_STRIPES)]
+        self.stats = {"hits": 0, "renders": 0}
+        os.makedirs(report_dir, exist_ok=True)
+
+    def register(self, kind, render, template_version):
+        """render(case, output_path); bump template_version when its layout changes."""
+        self._renderers[kind] = (render, template_version)
+
+    def _kind(self, case):
+        return "video" if case.get("type") == "video" else "image"
+
+    def etag(self, case):
+        _, version = self._renderers[self._kind(case)]
+        return case_content_hash(case, version)
+
+    def path(self, case, etag=None):
+        etag = etag or self.etag(case)
+        return os.path.join(self.report_dir, f"{case['case_id']}.{etag[:16]}.pdf")
+
+    def get(self, case):
+        """Returns (pdf_path, etag), rendering only if this version is missing."""
+        etag = self.etag(case)
+        path = self.path(case, etag)
+        if os.path.exists(path):
+            self.stats["hits"] += 1
+            return path, etag
+
+        lock = self._locks[int(hashlib.md5(case["case_id"].encode()).hexdigest(), 16) % LOCK_STRIPES]
+        with lock:
+            # Another request may have rendered it while we waited
+            if os.path.exists(path):
+                self.stats["hits"] += 1
+                return path, etag
+
+            render, _ = self._renderers[self._kind(case)]
+            partial = f"{path}.{uuid.uuid4().hex[:8]}.part"
+            try:
+                with timed("pdf"):
+                    render(case, partial)
+                os.replace(partial, path)
+            finally:
+                if os.path.exists(partial):
+                    os.remove(partial)
+            self.stats["renders"] += 1
+
+            # Older versions of this case (content / template changed)
+            self.discard(case["case_id"], keep=path)
+
+        return path, etag
+
+    def discard(self, case_id, keep=None):
+        """Removes cached PDFs of a case (including the legacy <case_id>.pdf)."""
+        pattern = os.path.join(self.report_dir, f"{glob.escape(case_id)}.*pdf")
+        for old in glob.glob(pattern):
+            if old != keep:
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
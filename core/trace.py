@@ -0,0 +1,276 @@
+# core/trace.py
+
+import contextvars
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:     # not available on Windows
+    resource = None
+
+# --------------------------------------------------
+#     PER-CASE PERFORMANCE TRACE (opt-in)
+#     - span tree of one Pipeline.run / VideoPipeline.run: every
+#       timed() stage, per frame, with model input sizes and the
+#       resident memory at each span's end and its change over the
+#       span (process-wide: concurrent jobs show up in each other's)
+#     - optional sampling profiler, kept only for slow cases
+#     - stored with the case (split-out "trace" field) and shown
+#       as a waterfall on the report page
+#     Frames analysed in FRAME_WORKERS processes show up as a single
+#     analyze_frames span; their inner stages are not traced.
+# --------------------------------------------------
+
+# A long video produces a few spans per frame; beyond this only counts are kept
+MAX_SPANS = 20000
+PROFILE_INTERVAL_SEC = 0.005
+PROFILE_TOP_STACKS = 40
+
+_current = contextvars.ContextVar("oracle_trace", default=None)
+
+
+def rss_mb():
+    """Current resident set size (MB), or None where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except (OSError, ValueError, IndexError):
+        return None
+    return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+
+
+def process_peak_rss_mb():
+    """Process-lifetime memory high-water mark (MB), or None where unsupported."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+class Trace:
+    def __init__(self, name, max_spans=MAX_SPANS):
+        self.name = name
+        self.max_spans = max_spans
+        self.started_at = datetime.utcnow().isoformat()
+        self.t0 = time.perf_counter()
+        self.spans = []
+        self.stack = []
+        self.dropped = 0
+        self.attrs = {}
+        self.profile = None
+        self.total_ms = None
+        self._rss_start = {}
+
+    def start_span(self, name, attrs):
+        if len(self.spans) >= self.max_spans:
+            self.dropped += 1
+            return None
+        parent = self.stack[-1] if self.stack else None
+        self.spans.append({
+            "name": name,
+            "parent": parent,
+            "depth": len(self.stack),
+            "start_ms": round((time.perf_counter() - self.t0) * 1000, 3),
+            "dur_ms": None,
+            "attrs": attrs
+        })
+        idx = len(self.spans) - 1
+        self.stack.append(idx)
+        self._rss_start[idx] = rss_mb()
+        return idx
+
+    def end_span(self, idx, error=False):
+        if idx is None:
+            return
+        span = self.spans[idx]
+        span["dur_ms"] = round((time.perf_counter() - self.t0) * 1000 - span["start_ms"], 3)
+        start, end = self._rss_start.pop(idx, None), rss_mb()
+        if end is not None:
+            span["rss_mb"] = round(end, 1)
+            if start is not None:
+                span["rss_delta_mb"] = round(end - start, 1)
+        if error:
+            span["error"] = True
+        if self.stack and self.stack[-1] == idx:
+            self.stack.pop()
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "started_at": self.started_at,
+            "total_ms": self.total_ms,
+            "rss_delta_mb": self.spans[0].get("rss_delta_mb") if self.spans else None,
+            "process_peak_rss_mb": process_peak_rss_mb(),
+            "attrs": self.attrs,
+            "spans": self.spans,
+            "dropped_spans": self.dropped,
+            "profile": self.profile
+        }
+
+
+class Sampler:
+    """
+    Samples one thread's Python stack every interval from a helper thread
+    (sys._current_frames), counting collapsed "file:function;..." stacks
+    in the flame-graph input format.
+    """
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL_SEC):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="trace-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{os.path.basename(code.co_filename)}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+            self.samples += 1
+
+    def result(self, top=PROFILE_TOP_STACKS):
+        leaves = Counter()
+        for stack, n in self.stacks.items():
+            leaves[stack.rsplit(";", 1)[-1]] += n
+        return {
+            "interval_ms": self.interval * 1000,
+            "samples": self.samples,
+            "stacks": [{"stack": s, "samples": n} for s, n in self.stacks.most_common(top)],
+            "functions": [{"function": f, "samples": n} for f, n in leaves.most_common(20)]
+        }
+
+
+@contextmanager
+def tracing(name, profile_after=None, **attrs):
+    """
+    Records a trace of everything timed inside the block (this thread).
+    profile_after: seconds; if set, a sampling profiler runs alongside and
+    its result is kept only when the case took at least that long.
+    """
+    trace = Trace(name)
+    trace.attrs.update(attrs)
+    token = _current.set(trace)
+    root = trace.start_span(name, dict(attrs))
+    sampler = Sampler(threading.get_ident()).start() if profile_after is not None else None
+    failed = False
+    try:
+        yield trace
+    except Exception:
+        failed = True
+        raise
+    finally:
+        trace.end_span(root, error=failed)
+        _current.reset(token)
+        trace.total_ms = trace.spans[root]["dur_ms"]
+        if sampler is not None:
+            sampler.stop()
+            if trace.total_ms >= profile_after * 1000:
+                trace.profile = sampler.result()
+
+
+@contextmanager
+def span(name, **attrs):
+    """A span in the active trace; a no-op when the case is not traced."""
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+
+    idx = trace.start_span(name, attrs)
+    failed = False
+    try:
+        yield
+    except Exception:
+        failed = True
+        raise
+    finally:
+        trace.end_span(idx, error=failed)
+
+
+def annotate(**attrs):
+    """Adds case-level values (e.g. lazily measured totals) to the active trace."""
+    trace = _current.get()
+    if trace is not None:
+        trace.attrs.update(attrs)
+
+
+def waterfall(trace, max_rows=200):
+    """
+    View model for the report page: the top-level spans plus the slowest
+    remaining ones (with their ancestors) in time order, as percentages of
+    the case duration, and per-stage totals across all spans.
+    """
+    spans = trace.get("spans") or []
+    total = trace.get("total_ms") or max((s["start_ms"] + (s["dur_ms"] or 0) for s in spans), default=0)
+    if not spans or not total:
+        return None
+
+    origin = spans[0]["start_ms"]
+    keep = {i for i, s in enumerate(spans) if s["depth"] <= 1}
+    by_duration = sorted(range(len(spans)), key=lambda i: spans[i]["dur_ms"] or 0, reverse=True)
+    for i in by_duration:
+        if len(keep) >= max_rows:
+            break
+        while i is not None and i not in keep:
+            keep.add(i)
+            i = spans[i]["parent"]
+
+    rows = []
+    for i in sorted(keep):
+        s = spans[i]
+        dur = s["dur_ms"] or 0
+        rows.append({
+            "name": s["name"],
+            "depth": s["depth"],
+            "dur_ms": round(dur, 1),
+            "left_pct": round(100 * (s["start_ms"] - origin) / total, 2),
+            "width_pct": max(round(100 * dur / total, 2), 0.1),
+            "attrs": s.get("attrs") or {},
+            "rss_mb": s.get("rss_mb"),
+            "rss_delta_mb": s.get("rss_delta_mb"),
+            "error": s.get("error", False)
+        })
+
+    stages = {}
+    for s in spans[1:]:
+        st = stages.setdefault(s["name"], {"name": s["name"], "count": 0, "total_ms": 0.0, "max_ms": 0.0})
+        st["count"] += 1
+        st["total_ms"] += s["dur_ms"] or 0
+        st["max_ms"] = max(st["max_ms"], s["dur_ms"] or 0)
+    for st in stages.values():
+        st["total_ms"] = round(st["total_ms"], 1)
+        st["max_ms"] = round(st["max_ms"], 1)
+
+    return {
+        "total_ms": round(total, 1),
+        "rss_delta_mb": trace.get("rss_delta_mb"),
+        "process_peak_rss_mb": trace.get("process_peak_rss_mb"),
+        "attrs": trace.get("attrs") or {},
+        "profile": trace.get("profile"),
+        "rows": rows,
+        "hidden": len(spans) - len(rows),
+        "stages": sorted(stages.values(), key=lambda st: st["total_ms"], reverse=True)
+    }
@@ -37,17 +37,20 @@ def aggregate_license_plates(frame_results):
     """
     Aggregates plates with timestamps across video.
     Returns a flat list of all detections with their timing (for timeline reconstruction).
+    Reads come from the single per-frame OCR pass (analysis.license_plates).
     """
     plates = []
 
     for fr in frame_results:
         # Check if this frame has detected plates
-        for p in fr.get("license_plates", []):
+        for p in fr.get("analysis", {}).get("license_plates", []):
             plates.append({
                 "plate": p["plate"],
                 "confidence": p["confidence"],
+                "vehicle": p.get("vehicle"),
                 "timestamp_sec": fr.get("timestamp_sec", 0),
+                "frame": fr.get("frame_file"),
                 "frame_index": fr.get("frame_index", 0)
             })
 
-    return plates
\ No newline at end of file
+    return plates
@@ -1,56 +1,148 @@
 import cv2
 import os
+import time
 
-def extract_frames(video_path, out_dir, fps=3):
-    """
-    Extracts frames and returns metadata including EXACT timestamps.
+from core.video.keyframes import KeyframeSelector
+
+def iter_frames(video_path, fps=3, stats=None, keyframes=None):
     """
-    import cv2, os
+    Opens the video and returns a generator that decodes it once,
+    yielding sampled frames in memory as {frame (BGR ndarray), timestamp, index}.
+    Nothing is written to disk.
 
-    os.makedirs(out_dir, exist_ok=True)
+    stats (dict, optional) is filled with source metadata straight away,
+    so callers can size progress bars before the first frame is decoded.
+    stats["frame_selection"] and stats["decode"] are updated while frames are read.
+
+    Skipped source frames are only grab()bed, never converted to BGR.
+    (Seeking is not used: it restarts decoding at the previous keyframe,
+    which at these sampling intervals costs more than grabbing forward.)
+
+    keyframes (dict, optional) enables scene-change selection with
+    KeyframeSelector kwargs {threshold, min_gap, max_gap}; near-identical
+    sampled frames are then dropped while timestamps stay exact.
+    """
     cap = cv2.VideoCapture(video_path)
-    
+
     if not cap.isOpened():
         raise ValueError(f"Could not open video: {video_path}")
 
     video_fps = cap.get(cv2.CAP_PROP_FPS)
     # Fallback if FPS reading fails
     if video_fps <= 0:
-        video_fps = 30 
+        video_fps = 30
 
     # Calculate how many frames to skip to match desired extraction FPS
     frame_interval = int(video_fps // fps) if video_fps > fps else 1
-    
-    extracted_data = []
+
+    selector = KeyframeSelector(**keyframes) if keyframes else None
+    selection = selector.stats if selector else {
+        "mode": "fixed", "candidates": 0, "kept": 0, "skipped": 0
+    }
+
+    source_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+
+    decode = {
+        "method": "grab",
+        "source_frames": 0,
+        "decoded_frames": 0,
+        "kept_frames": 0,
+        "elapsed_sec": 0.0,
+        "source_frames_per_sec": 0.0,
+        "kept_frames_per_sec": 0.0
+    }
+
+    if stats is not None:
+        stats.update({
+            "source_fps": video_fps,
+            "frame_interval": frame_interval,
+            "expected_frames": -(-source_frames // frame_interval) if source_frames > 0 else 0,
+            "frame_selection": selection,
+            "decode": decode
+        })
+
+    print(f"   > Extracting frames from {os.path.basename(video_path)} (Source FPS: {video_fps}, {decode['method']})...")
+
+    return _read_frames(cap, video_fps, frame_interval, selector, selection, decode)
+
+
+def _read_frames(cap, video_fps, frame_interval, selector, selection, decode):
     idx = 0
     saved_count = 0
+    elapsed = 0.0
 
-    print(f"   > Extracting frames from {os.path.basename(video_path)} (Source FPS: {video_fps})...")
+    try:
+        while True:
+            t0 = time.perf_counter()
+            wanted = idx % frame_interval == 0
 
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+            # Only sampled frames are retrieved (decoded to BGR)
+            ret = cap.grab()
+            frame = None
+            if ret and wanted:
+                ret, frame = cap.retrieve()
+                decode["decoded_frames"] += 1
 
-        if idx % frame_interval == 0:
-            # Calculate precise timestamp: current_frame_number / total_frames_per_second
-            timestamp = round(idx / video_fps, 2)
-            
-            frame_name = f"frame_{saved_count:04d}.jpg"
-            frame_path = os.path.join(out_dir, frame_name)
+            elapsed += time.perf_counter() - t0
+            if not ret:
+                break
 
-            cv2.imwrite(frame_path, frame)
+            decode["source_frames"] = idx + 1
+            _update_rates(decode, elapsed)
 
-            # Return the full object so next steps don't have to guess
-            extracted_data.append({
-                "path": frame_path,
-                "timestamp": timestamp,
-                "index": saved_count
-            })
-            
-            saved_count += 1
+            if wanted:
+                # Calculate precise timestamp: current_frame_number / total_frames_per_second
+                timestamp = round(idx / video_fps, 2)
+
+                if selector is None:
+                    selection["candidates"] += 1
+                    selection["kept"] += 1
+                elif not selector.consider(frame, timestamp):
+                    idx += 1
+                    continue
+
+                decode["kept_frames"] += 1
+                _update_rates(decode, elapsed)
+
+                yield {
+                    "frame": frame,
+                    "timestamp": timestamp,
+                    "index": saved_count
+                }
+                saved_count += 1
+
+            idx += 1
+    finally:
+        cap.release()
+
+
+def _update_rates(decode, elapsed):
+    decode["elapsed_sec"] = round(elapsed, 3)
+    if elapsed > 0:
+        decode["source_frames_per_sec"] = round(decode["source_frames"] / elapsed, 1)
+        decode["kept_frames_per_sec"] = round(decode["kept_frames"] / elapsed, 1)
+
+
+def frame_filename(index):
+    return f"frame_{index:04d}.jpg"
+
+
+def extract_frames(video_path, out_dir, fps=3):
+    """
+    Extracts frames and returns metadata including EXACT timestamps.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+
+    extracted_data = []
+    for item in iter_frames(video_path, fps=fps):
+        frame_path = os.path.join(out_dir, frame_filename(item["index"]))
+        cv2.imwrite(frame_path, item["frame"])
 
-        idx += 1
+        # Return the full object so next steps don't have to guess
+        extracted_data.append({
+            "path": frame_path,
+            "timestamp": item["timestamp"],
+            "index": item["index"]
+        })
 
-    cap.release()
-    return extracted_data
\ No newline at end of file
+    return extracted_data
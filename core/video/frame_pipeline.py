@@ -1,29 +1,193 @@
 import os
+import cv2
 
-def analyze_frames(frames_metadata, image_pipeline):
+from core.video.extractor import frame_filename
+from core.video.hash_utils import sha256_frame, sha256_bytes
+from core.video.tracker import propagate_objects, detect_schedule
+from core.derivatives import DERIVATIVE_WIDTHS, derivative_name, encode_derivatives
+from core.metrics import timed
+from core.trace import span
+
+
+def _severity_level(frame_analysis):
+    score = frame_analysis.get("analysis", {}).get("severity", {}).get("score", 0)
+    return "SEVERE" if score > 70 else "MODERATE" if score > 35 else "MINOR"
+
+
+def _batched(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def new_counts(detect_interval):
+    return {"detect_interval": detect_interval, "detected_frames": 0, "propagated_frames": 0}
+
+
+def model_pass(chunk, image_pipeline, state, counts, batch_size=8,
+               caption_mode="short", detect_interval=1):
+    """
+    Runs the batched models and per-frame analysis over one chunk of frames.
+    state carries the previous frame / objects for box propagation between
+    chunks ({"previous": None, "objects": []} to start fresh).
+    Yields (item, frame_analysis) in input order.
+    """
+    batch = [item["frame"] for item in chunk]
+
+    # Full detector only on scheduled frames, still batched
+    scheduled = [detect_schedule(item["index"], detect_interval) for item in chunk]
+    shape = list(batch[0].shape[:2]) if batch else None
+    with span("batch", first_index=chunk[0]["index"] if chunk else None, frames=len(batch)):
+        with timed("detect", frames=sum(scheduled), shape=shape):
+            detected = iter(image_pipeline.detector.detect_batch(
+                [f for f, run in zip(batch, scheduled) if run], batch_size=batch_size
+            ))
+        with timed("caption", frames=len(batch), shape=shape, mode=caption_mode):
+            captions = image_pipeline.captioner.caption_batch(
+                batch, mode=caption_mode, batch_size=batch_size
+            )
+
+    for item, run, caption in zip(chunk, scheduled, captions):
+        frame = item["frame"]
+        with span("frame", index=item["index"], detected=bool(run)):
+            if run or state["previous"] is None:
+                if run:
+                    objects = next(detected)
+                else:
+                    with timed("detect"):
+                        objects = image_pipeline.detector.detect(frame)
+                counts["detected_frames"] += 1
+            else:
+                with timed("propagate"):
+                    objects = propagate_objects(state["previous"], frame, state["objects"])
+                counts["propagated_frames"] += 1
+            state["previous"], state["objects"] = frame, objects
+
+            # Run AI analysis on the decoded frame (no annotated JPEG per frame)
+            frame_analysis = image_pipeline.analyse(
+                frame, save_annotated=False, objects=objects, raw_caption=caption
+            )
+
+            # Attach the precise metadata we calculated during extraction
+            frame_analysis["frame_index"] = item["index"]
+            frame_analysis["timestamp_sec"] = item["timestamp"]
+            frame_analysis["frame_file"] = frame_filename(item["index"])
+            with timed("hash_frames"):
+                frame_analysis["frame_sha256"] = sha256_frame(frame)
+
+        yield item, frame_analysis
+
+
+def encode_evidence(frame):
+    """JPEG evidence file plus its display derivatives, all from the same pixels."""
+    encoded = encode_derivatives(frame)
+    encoded["original"] = cv2.imencode(".jpg", frame)[1].tobytes()
+    return encoded
+
+
+class EvidenceWriter:
+    """
+    Decides which analysed frames are written to frames_dir, in stream order:
+    the first frame, severity-level changes, frames with plate reads and
+    (on finish) the last frame. Frames are given either as decoded pixels
+    or already encoded (encode_evidence); written frames are hashed from
+    exactly the JPEG bytes that go to disk (file_sha256) and get
+    thumbnail / preview derivatives for the report.
     """
-    Runs image pipeline on frames and attaches existing metadata.
+
+    def __init__(self, frames_dir, progress=None, total=None):
+        os.makedirs(frames_dir, exist_ok=True)
+        self.frames_dir = frames_dir
+        self.progress = progress
+        self.total = total
+        self.results = []
+        self.last_level = "MINOR"
+        self.previous = None
+
+    def add(self, frame_analysis, frame=None, encoded=None):
+        # Same escalation rule as reconstruct_timeline, evaluated as we stream
+        level = _severity_level(frame_analysis)
+        is_evidence = (
+            not self.results
+            or level != self.last_level
+            or bool(frame_analysis["analysis"].get("license_plates"))
+        )
+        self.last_level = level
+
+        frame_analysis["persisted"] = False
+        if is_evidence:
+            self._write(frame_analysis, frame, encoded)
+
+        self.results.append(frame_analysis)
+        self.previous = (frame_analysis, frame, encoded)
+
+        if self.progress:
+            done = len(self.results)
+            self.progress(done=done, total=max(self.total or 0, done))
+
+    def finish(self):
+        # The timeline failsafe references the final frame
+        if self.previous and not self.previous[0]["persisted"]:
+            self._write(*self.previous)
+        return self.results
+
+    def _write(self, frame_analysis, frame, encoded):
+        with timed("write_frames"):
+            if encoded is None:
+                encoded = encode_evidence(frame)
+
+            name = frame_analysis["frame_file"]
+            files = {name: encoded["original"]}
+            files.update({derivative_name(name, kind): encoded[kind] for kind in DERIVATIVE_WIDTHS})
+            for filename, data in files.items():
+                with open(os.path.join(self.frames_dir, filename), "wb") as f:
+                    f.write(data)
+
+        with timed("hash_frames"):
+            frame_analysis["file_sha256"] = sha256_bytes(encoded["original"])
+        frame_analysis["persisted"] = True
+
+
+def analyze_frames(frames, image_pipeline, frames_dir, progress=None, total=None,
+                   batch_size=8, caption_mode="short", detect_interval=1, stats=None):
+    """
+    Streams decoded frames through the image pipeline entirely in memory.
     Args:
-        frames_metadata (list): List of dicts {path, timestamp, index}
+        frames (iterable): Dicts {frame, timestamp, index} from iter_frames
         image_pipeline: The core pipeline instance
-    """
-    results = []
+        frames_dir: Where evidence frames are written
+        progress: Optional callback(done=..., total=...) per analyzed frame
+        total: Expected frame count for progress reporting
+        batch_size: Frames per batched YOLO / BLIP call
+        caption_mode: Captioner decode mode for frames ("short" or "full")
+        detect_interval: Run YOLO every k-th frame; boxes in between are
+                         propagated with optical flow
+        stats: Optional dict filled with detector / propagation counts
 
-    print(f"   > Analyzing {len(frames_metadata)} frames...")
+    Only evidence frames (first/last frame, severity changes, plate reads)
+    are JPEG-encoded to frames_dir and hashed from the encoded bytes; every
+    frame is also hashed from its pixels.
+    See core.video.parallel for the multi-process equivalent.
+    """
+    writer = EvidenceWriter(frames_dir, progress=progress, total=total)
+    state = {"previous": None, "objects": []}
+    counts = new_counts(detect_interval)
 
-    for meta in frames_metadata:
-        # Run AI analysis on the image path
-        # image_pipeline.run returns a dict like { "captions":..., "objects":... }
-        frame_analysis = image_pipeline.run(meta["path"])
+    print(f"   > Analyzing frames (streaming, batch={batch_size}, detect every {detect_interval})...")
 
-        # Attach the precise metadata we calculated during extraction
-        frame_analysis["frame_index"] = meta["index"]
-        frame_analysis["timestamp_sec"] = meta["timestamp"]
-        frame_analysis["frame_file"] = os.path.basename(meta["path"])
-        
-        # Store full path for the license plate detector to use later
-        frame_analysis["full_path"] = meta["path"] 
+    for chunk in _batched(frames, batch_size):
+        for item, frame_analysis in model_pass(
+            chunk, image_pipeline, state, counts,
+            batch_size=batch_size, caption_mode=caption_mode, detect_interval=detect_interval
+        ):
+            writer.add(frame_analysis, frame=item["frame"])
 
-        results.append(frame_analysis)
+    if stats is not None:
+        stats.update(counts)
 
-    return results
\ No newline at end of file
+    return writer.finish()
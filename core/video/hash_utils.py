@@ -13,6 +13,76 @@ def sha256_file(path: str) -> str:
             h.update(chunk)
     return h.hexdigest()
 
+def sha256_frame(frame) -> str:
+    """SHA-256 of a decoded frame's pixel buffer (no disk round-trip)"""
+    return hashlib.sha256(frame.tobytes()).hexdigest()
+
+def sha256_bytes(data: bytes) -> str:
+    """SHA-256 of an in-memory buffer (e.g. an encoded JPEG before it is written)"""
+    return hashlib.sha256(data).hexdigest()
+
+def save_and_hash(stream, path: str, chunk_size: int = 1024 * 1024) -> str:
+    """Copies an upload stream to disk, hashing it on the way (single pass)"""
+    h = hashlib.sha256()
+    with open(path, "wb") as out:
+        for chunk in iter(lambda: stream.read(chunk_size), b""):
+            h.update(chunk)
+            out.write(chunk)
+    return h.hexdigest()
+
+# ---------- Merkle tree over frame hashes ----------
+# Leaves and interior nodes are domain-separated (0x00 / 0x01 prefixes,
+# as in RFC 6962) and an unpaired node is promoted unchanged to the next
+# level, so no two different frame lists share a root.
+
+def _leaf(hex_hash):
+    return hashlib.sha256(b"\x00" + bytes.fromhex(hex_hash)).digest()
+
+def _node(left, right):
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+def _merkle_levels(hashes):
+    level = [_leaf(h) for h in hashes]
+    levels = [level]
+    while len(level) > 1:
+        level = [
+            _node(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+            for i in range(0, len(level), 2)
+        ]
+        levels.append(level)
+    return levels
+
+def merkle_root(hashes: list) -> str:
+    """Root over frame hashes (hex), in frame order; "" for no frames"""
+    if not hashes:
+        return ""
+    return _merkle_levels(hashes)[-1][0].hex()
+
+def merkle_proofs(hashes: list, indices) -> dict:
+    """Audit paths for the given leaf indices: {index: [{"hash", "side"}, ...]}"""
+    levels = _merkle_levels(hashes) if hashes else []
+    proofs = {}
+    for index in indices:
+        path, pos = [], index
+        for level in levels[:-1]:
+            sibling = pos ^ 1
+            if sibling < len(level):
+                path.append({
+                    "hash": level[sibling].hex(),
+                    "side": "left" if sibling < pos else "right"
+                })
+            pos //= 2
+        proofs[index] = path
+    return proofs
+
+def verify_merkle_proof(hex_hash: str, proof: list, root: str) -> bool:
+    """Checks one frame hash against the root with its audit path (log n hashes)"""
+    node = _leaf(hex_hash)
+    for step in proof:
+        sibling = bytes.fromhex(step["hash"])
+        node = _node(sibling, node) if step["side"] == "left" else _node(node, sibling)
+    return node.hex() == root
+
 def hash_frames(frame_paths: list) -> list:
     """Hash each extracted frame"""
     hashes = []
@@ -24,13 +94,23 @@ def hash_frames(frame_paths: list) -> list:
             })
     return hashes
 
-def build_chain_of_custody(case_id, user, video_path, frame_hashes):
-    """Formal chain-of-custody record"""
-    
-    # Calculate values immediately
-    main_hash = sha256_file(video_path)
+def build_chain_of_custody(case_id, user, video_path, frame_hashes, video_sha256=None):
+    """
+    Formal chain-of-custody record.
+    video_sha256: hash taken while the upload was written (save_and_hash);
+                  the file is only re-read when it is missing (older jobs).
+    frame_hashes: [{frame, sha256, basis, persisted}] in frame order. The
+                  Merkle root commits to all of them; persisted evidence
+                  frames also get their audit path for per-file checks.
+    """
+
+    main_hash = video_sha256 or sha256_file(video_path)
     now = datetime.utcnow().isoformat()
 
+    leaves = [f["sha256"] for f in frame_hashes]
+    persisted = [i for i, f in enumerate(frame_hashes) if f.get("persisted")]
+    proofs = merkle_proofs(leaves, persisted)
+
     return {
         "case_id": case_id,
         "file_hash": main_hash,       # ✅ FIX: Root level for Report
@@ -43,8 +123,48 @@ def build_chain_of_custody(case_id, user, video_path, frame_hashes):
             "frames_hashed": len(frame_hashes)
         },
         "frame_hashes": frame_hashes,
+        "merkle_root": merkle_root(leaves),
+        "frame_proofs": {frame_hashes[i]["frame"]: proofs[i] for i in persisted},
         "integrity": {
             "algorithm": "SHA-256",
+            "video_hash_basis": "upload stream, hashed while written",
+            "frame_hash_basis": "evidence frames: JPEG bytes as written; others: decoded pixels",
+            "merkle": "RFC 6962-style, leaves in frame order",
             "verified": True
         }
-    }
\ No newline at end of file
+    }
+
+def verify_custody(custody, frames_dir, video_path=None, frames=None):
+    """
+    Re-verifies a stored chain-of-custody record.
+    - the Merkle root is recomputed from the stored frame hashes
+    - each evidence frame file (or only `frames`) is hashed and checked
+      against the root with its own audit path
+    - the video is re-hashed only when video_path is given (slow for large files)
+    Returns {"ok", "merkle_root", "frames": {name: bool}, "video"}.
+    """
+    root = custody.get("merkle_root")
+    report = {"merkle_root": None, "frames": {}, "video": None}
+
+    if root:
+        leaves = [f["sha256"] for f in custody.get("frame_hashes", [])]
+        report["merkle_root"] = merkle_root(leaves) == root
+
+        proofs = custody.get("frame_proofs", {})
+        for name in (frames or proofs):
+            path = os.path.join(frames_dir, name)
+            report["frames"][name] = (
+                name in proofs
+                and os.path.exists(path)
+                and verify_merkle_proof(sha256_file(path), proofs[name], root)
+            )
+
+    if video_path:
+        report["video"] = sha256_file(video_path) == custody.get("file_hash")
+
+    report["ok"] = (
+        report["merkle_root"] is not False
+        and all(report["frames"].values())
+        and report["video"] is not False
+    )
+    return report
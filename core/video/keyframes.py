@@ -0,0 +1,84 @@
+import cv2
+import numpy as np
+
+# --------------------------------------------------
+#     SCENE-CHANGE KEYFRAME SELECTION
+#     - 16x16 difference hash per sampled frame
+#     - drop frames that barely differ from the last kept one
+#     - min / max gap keep the timeline trustworthy
+# --------------------------------------------------
+
+HASH_SIZE = 16
+
+
+def frame_signature(frame, size=HASH_SIZE):
+    """Difference hash: size*size booleans from a downscaled grayscale frame."""
+    small = cv2.resize(frame, (size + 1, size), interpolation=cv2.INTER_AREA)
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+    return (gray[:, 1:] > gray[:, :-1]).ravel()
+
+
+def signature_distance(a, b):
+    """Fraction of hash bits that differ (0 = identical, 1 = inverted)."""
+    return float(np.count_nonzero(a != b)) / a.size
+
+
+class KeyframeSelector:
+    """
+    Decides which sampled frames are worth sending to the models.
+
+    threshold : minimum signature change vs the last kept frame
+    min_gap   : seconds; changed frames closer than this are still dropped
+    max_gap   : seconds; a frame is always kept after this long without one
+    """
+
+    def __init__(self, threshold=0.08, min_gap=0.0, max_gap=2.0):
+        self.threshold = threshold
+        self.min_gap = min_gap
+        self.max_gap = max_gap
+
+        self._last_sig = None
+        self._last_ts = None
+
+        self.stats = {
+            "mode": "keyframe",
+            "threshold": threshold,
+            "min_gap_sec": min_gap,
+            "max_gap_sec": max_gap,
+            "candidates": 0,
+            "kept": 0,
+            "skipped": 0,
+            "keep_reasons": {"first": 0, "scene_change": 0, "max_gap": 0},
+            "skip_reasons": {"below_threshold": 0, "min_gap": 0}
+        }
+
+    def consider(self, frame, timestamp):
+        self.stats["candidates"] += 1
+        sig = frame_signature(frame)
+
+        if self._last_sig is None:
+            return self._keep(sig, timestamp, "first")
+
+        gap = timestamp - self._last_ts
+        if gap >= self.max_gap:
+            return self._keep(sig, timestamp, "max_gap")
+
+        if signature_distance(sig, self._last_sig) < self.threshold:
+            return self._skip("below_threshold")
+
+        if gap < self.min_gap:
+            return self._skip("min_gap")
+
+        return self._keep(sig, timestamp, "scene_change")
+
+    def _keep(self, sig, timestamp, reason):
+        self._last_sig = sig
+        self._last_ts = timestamp
+        self.stats["kept"] += 1
+        self.stats["keep_reasons"][reason] += 1
+        return True
+
+    def _skip(self, reason):
+        self.stats["skipped"] += 1
+        self.stats["skip_reasons"][reason] += 1
+        return False
@@ -1,42 +1,110 @@
-import cv2
-import easyocr
-import os
+import re
 
-# Initialize reader once
-reader = easyocr.Reader(['en'], gpu=False) 
+# --------------------------------------------------
+#     VIDEO PLATE CONSOLIDATION
+#     Plates are read once per frame by the image pipeline
+#     (analysis.license_plates); this merges repeated reads of
+#     the same plate across frames into one timeline entry.
+# --------------------------------------------------
 
-def detect_license_plates(frame_results):
+# Reads within this edit distance are treated as the same plate
+# (one misread character across frames is common with OCR).
+MAX_EDIT_DISTANCE = 1
+
+# A near-miss read is only merged when it is on the same tracked vehicle,
+# or (vehicle unknown) seen within this many seconds of the group.
+MERGE_WINDOW_SEC = 3.0
+
+
+def _normalize(text):
+    return re.sub(r"[^A-Z0-9]", "", text.upper())
+
+
+def _edit_distance(a, b, limit=MAX_EDIT_DISTANCE):
+    """Levenshtein distance, returning limit + 1 early once it is exceeded."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, start=1):
+        cur = [i]
+        for j, cb in enumerate(b, start=1):
+            cur.append(min(
+                prev[j] + 1,
+                cur[j - 1] + 1,
+                prev[j - 1] + (ca != cb)
+            ))
+        if min(cur) > limit:
+            return limit + 1
+        prev = cur
+    return prev[-1]
+
+
+def _same_plate(text, read, group):
+    if text == group["anchor"]:
+        return True
+    if _edit_distance(text, group["anchor"]) > MAX_EDIT_DISTANCE:
+        return False
+
+    vehicle = read.get("vehicle")
+    vehicles = {r["vehicle"] for r in group["reads"] if r.get("vehicle")}
+    if vehicle and vehicles:
+        return vehicle in vehicles
+
+    ts = read.get("timestamp_sec", 0)
+    return any(abs(ts - r.get("timestamp_sec", 0)) <= MERGE_WINDOW_SEC for r in group["reads"])
+
+
+def consolidate_plates(plate_reads):
     """
-    Runs OCR on analyzed frames. Reads timestamp directly from frame_results.
+    Merges per-frame plate reads into one entry per physical plate.
+    Args:
+        plate_reads (list): {plate, confidence, timestamp_sec, frame, frame_index, vehicle?}
+    Returns:
+        list sorted by first sighting; each entry keeps the best read's
+        frame / confidence plus first/last sighting, read count and variants.
+
+    Reads are compared with each group's anchor (its highest-confidence
+    text) only, never with other variants, so near misses cannot chain
+    distinct plates together (ABC123 -> ABC128 -> ABD128).
     """
-    plates = []
-    print(f"   > Scanning {len(frame_results)} frames for license plates...")
+    groups = []   # each: {"anchor": text, "texts": {text: score}, "reads": [...]}
 
-    for fr in frame_results:
-        path = fr.get("full_path")
-        
-        if not path or not os.path.exists(path):
+    # Strongest reads first so they anchor their group
+    for read in sorted(plate_reads, key=lambda r: -r.get("confidence", 0)):
+        text = _normalize(read.get("plate", ""))
+        if not text:
             continue
 
-        img = cv2.imread(path)
-        if img is None: continue
+        for g in groups:
+            if _same_plate(text, read, g):
+                break
+        else:
+            g = {"anchor": text, "texts": {}, "reads": []}
+            groups.append(g)
 
-        # Run OCR
-        try:
-            ocr_out = reader.readtext(img)
-        except:
-            continue
+        g["texts"][text] = g["texts"].get(text, 0.0) + read.get("confidence", 0)
+        g["reads"].append(read)
+
+    plates = []
+    for g in groups:
+        reads = g["reads"]
+        best = max(reads, key=lambda r: r.get("confidence", 0))
+        canonical = max(g["texts"], key=g["texts"].get)
+        times = [r.get("timestamp_sec", 0) for r in reads]
+        vehicles = sorted({r["vehicle"] for r in reads if r.get("vehicle")})
+
+        plates.append({
+            "plate": canonical,
+            "confidence": best.get("confidence", 0),
+            "timestamp_sec": min(times),
+            "first_seen_sec": min(times),
+            "last_seen_sec": max(times),
+            "reads": len(reads),
+            "frame": best.get("frame"),
+            "frame_index": best.get("frame_index", 0),
+            "variants": sorted(t for t in g["texts"] if t != canonical),
+            "vehicles": vehicles
+        })
 
-        for (bbox, text, conf) in ocr_out:
-            text = text.replace(" ", "").upper()
-            
-            if len(text) > 4 and conf > 0.4:
-                plates.append({
-                    "plate": text,
-                    "confidence": round(conf, 2),
-                    "timestamp_sec": fr.get("timestamp_sec", 0), # ✅ Reads existing time
-                    "frame": fr.get("frame_file", os.path.basename(path)),
-                    "frame_index": fr.get("frame_index", 0)
-                })
-
-    return plates
\ No newline at end of file
+    return sorted(plates, key=lambda p: p["first_seen_sec"])
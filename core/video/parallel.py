@@ -0,0 +1,201 @@
+import os
+import threading
+import multiprocessing as mp
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from math import gcd
+
+import cv2
+
+from core.video.frame_pipeline import (
+    _batched,
+    _severity_level,
+    model_pass,
+    new_counts,
+    encode_evidence,
+    EvidenceWriter
+)
+
+# --------------------------------------------------
+#     MULTI-PROCESS FRAME ANALYSIS
+#     - each worker process builds its own Pipeline and loads the
+#       models once, when the pool starts
+#     - frames are sent in contiguous shards; results are collected
+#       in submission (timestamp) order, so evidence selection,
+#       tracking and the timeline see the same stream as the
+#       sequential analyze_frames
+# --------------------------------------------------
+
+# Lower bound on frames per shard, so IPC and scheduling overhead stay
+# small next to model time. Shards are always a multiple of the batch
+# size and the detect interval (see shard_size).
+SHARD_MIN_FRAMES = 16
+
+_worker_pipeline = None
+
+
+def build_pipeline(**config):
+    """Default worker factory: a full Pipeline with every model loaded."""
+    from core.pipeline import Pipeline
+
+    pipeline = Pipeline(**config)
+    if os.getenv("INFERENCE_SOCKET"):
+        # Workers become thin clients of the shared inference server
+        from core.inference.client import register_remote
+        register_remote(pipeline.models, os.environ["INFERENCE_SOCKET"])
+    pipeline.models.warm_up(background=False)
+    return pipeline
+
+
+def _init_worker(factory, config, threads):
+    global _worker_pipeline
+
+    # Must be set before torch is imported in this process
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    os.environ["MKL_NUM_THREADS"] = str(threads)
+    cv2.setNumThreads(threads)
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except ImportError:
+        pass
+
+    _worker_pipeline = factory(**config)
+
+
+def _ready():
+    return os.getpid()
+
+
+def shard_size(batch_size, detect_interval):
+    """
+    Frames per shard: a multiple of both batch_size (same model batches as
+    the sequential path) and detect_interval (every shard starts on a
+    detector frame, so no propagation state crosses shard boundaries).
+    """
+    step = batch_size * detect_interval // gcd(batch_size, detect_interval)
+    return step * max(1, -(-SHARD_MIN_FRAMES // step))
+
+
+def _analyze_shard(items, options):
+    """
+    Worker side: analyses one shard and encodes (JPEG + derivatives) the
+    frames the parent may need to persist. Within the shard the evidence
+    rule is known exactly; the first frame depends on the previous shard
+    and the last frame may be the end of the video, so both are always
+    encoded.
+    """
+    state = {"previous": None, "objects": []}
+    counts = new_counts(options["detect_interval"])
+
+    analyses = []
+    for chunk in _batched(items, options["batch_size"]):
+        for _, frame_analysis in model_pass(chunk, _worker_pipeline, state, counts, **options):
+            analyses.append(frame_analysis)
+
+    encoded = {}
+    for pos, frame_analysis in enumerate(analyses):
+        candidate = (
+            pos == 0
+            or pos == len(analyses) - 1
+            or _severity_level(frame_analysis) != _severity_level(analyses[pos - 1])
+            or bool(frame_analysis["analysis"].get("license_plates"))
+        )
+        if candidate:
+            encoded[pos] = encode_evidence(items[pos]["frame"])
+
+    return analyses, encoded, counts
+
+
+class FramePool:
+    """
+    Process pool for video frame analysis.
+
+    pipeline_config : Pipeline keyword arguments (see Pipeline.config)
+    workers         : number of worker processes
+    threads         : torch / OpenCV threads per worker; defaults to an even
+                      split of the CPU count so workers do not oversubscribe
+    factory         : picklable callable building the worker pipeline
+    """
+
+    def __init__(self, pipeline_config, workers, threads=None, factory=build_pipeline):
+        self.config = dict(pipeline_config)
+        self.workers = max(1, int(workers))
+        self.threads = int(threads or max(1, (os.cpu_count() or 1) // self.workers))
+        self.factory = factory
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _executor(self):
+        with self._lock:
+            if self._pool is None:
+                # spawn: the parent already runs model / job threads, which
+                # do not survive a fork safely
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=mp.get_context("spawn"),
+                    initializer=_init_worker,
+                    initargs=(self.factory, self.config, self.threads)
+                )
+            return self._pool
+
+    def warm_up(self):
+        """Starts the workers (and their model loads) ahead of the first case."""
+        pool = self._executor()
+        return [pool.submit(_ready) for _ in range(self.workers)]
+
+    def shutdown(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
+
+    def analyze_frames(self, frames, frames_dir, progress=None, total=None,
+                       batch_size=8, caption_mode="short", detect_interval=1, stats=None):
+        """Same contract and output as frame_pipeline.analyze_frames."""
+        options = {
+            "batch_size": batch_size,
+            "caption_mode": caption_mode,
+            "detect_interval": detect_interval
+        }
+        writer = EvidenceWriter(frames_dir, progress=progress, total=total)
+        counts = new_counts(detect_interval)
+        size = shard_size(batch_size, detect_interval)
+
+        print(f"   > Analyzing frames ({self.workers} workers x {self.threads} threads, shard={size})...")
+
+        pool = self._executor()
+        pending = deque()
+        try:
+            for shard in _batched(frames, size):
+                pending.append(pool.submit(_analyze_shard, shard, options))
+                # Bound decoded frames held in flight to two shards per worker
+                while len(pending) >= 2 * self.workers:
+                    self._collect(pending.popleft(), writer, counts)
+
+            while pending:
+                self._collect(pending.popleft(), writer, counts)
+        except BrokenProcessPool:
+            # A worker died (e.g. out of memory); start a fresh pool next case
+            with self._lock:
+                self._pool = None
+            raise
+        finally:
+            for future in pending:
+                future.cancel()
+
+        if stats is not None:
+            stats.update(counts)
+            stats["frame_workers"] = self.workers
+
+        return writer.finish()
+
+    @staticmethod
+    def _collect(future, writer, counts):
+        analyses, encoded, shard_counts = future.result()
+        for pos, frame_analysis in enumerate(analyses):
+            writer.add(frame_analysis, encoded=encoded.get(pos))
+
+        counts["detected_frames"] += shard_counts["detected_frames"]
+        counts["propagated_frames"] += shard_counts["propagated_frames"]
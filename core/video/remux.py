@@ -0,0 +1,92 @@
+import os
+import shutil
+import struct
+import subprocess
+
+# --------------------------------------------------
+#     FASTSTART REMUX FOR PLAYBACK
+#     Many uploads put the MP4 index (moov atom) after the media data,
+#     so a browser must fetch most of the file before it can play or
+#     seek. A stream-copy remux (no re-encode) moves the index to the
+#     front. The copy is kept next to the original; the original upload
+#     stays untouched because the chain of custody refers to it.
+# --------------------------------------------------
+
+MP4_EXTENSIONS = {".mp4", ".mov", ".m4v"}
+REMUX_TIMEOUT_SEC = 600
+
+
+def faststart_path(video_path):
+    """Where the playback copy of an upload lives."""
+    base, _ = os.path.splitext(video_path)
+    return f"{base}.faststart.mp4"
+
+
+def playback_path(video_path):
+    """The file to stream to browsers: the remux when present, else the upload."""
+    remuxed = faststart_path(video_path)
+    return remuxed if os.path.exists(remuxed) else video_path
+
+
+def is_faststart(video_path):
+    """
+    True when an MP4/MOV file already has its moov atom before mdat
+    (top-level box headers only; nothing else is read).
+    """
+    with open(video_path, "rb") as f:
+        while True:
+            header = f.read(8)
+            if len(header) < 8:
+                return False
+            size, kind = struct.unpack(">I4s", header)
+            if kind == b"moov":
+                return True
+            if kind == b"mdat":
+                return False
+
+            if size == 1:       # 64-bit box size follows the header
+                size = struct.unpack(">Q", f.read(8))[0]
+                f.seek(size - 16, os.SEEK_CUR)
+            elif size == 0:     # box runs to end of file
+                return False
+            else:
+                f.seek(size - 8, os.SEEK_CUR)
+
+
+def remux_faststart(video_path, ffmpeg=None):
+    """
+    Stream-copies video_path into a faststart MP4 next to it.
+    Returns the playback path, or None when no remux was needed or possible
+    (already faststart, ffmpeg missing, or codecs MP4 cannot carry).
+    """
+    ext = os.path.splitext(video_path)[1].lower()
+    if ext in MP4_EXTENSIONS and is_faststart(video_path):
+        return None
+
+    ffmpeg = ffmpeg or shutil.which("ffmpeg")
+    if not ffmpeg:
+        print("[Remux] ffmpeg not found; serving the original upload")
+        return None
+
+    target = faststart_path(video_path)
+    partial = target + ".part"
+    cmd = [
+        ffmpeg, "-y", "-v", "error",
+        "-i", video_path,
+        "-c", "copy",
+        "-movflags", "+faststart",
+        "-f", "mp4", partial
+    ]
+
+    try:
+        subprocess.run(cmd, check=True, capture_output=True, timeout=REMUX_TIMEOUT_SEC)
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        stderr = getattr(e, "stderr", b"") or b""
+        print(f"[Remux] Failed for {os.path.basename(video_path)}: {stderr.decode(errors='replace')[-300:]}")
+        if os.path.exists(partial):
+            os.remove(partial)
+        return None
+
+    # Atomic swap so a request never streams a half-written file
+    os.replace(partial, target)
+    return target
@@ -0,0 +1,226 @@
+import cv2
+import numpy as np
+
+from core.geometry import iou_matrix
+
+# --------------------------------------------------
+#     CROSS-FRAME VEHICLE TRACKING
+#     - IoUTracker: persistent IDs from IoU + constant-velocity motion
+#     - assign_tracks: relabels per-frame Vehicle-N with track IDs
+#     - propagate_objects: cheap optical-flow box propagation for
+#       frames where the detector is skipped (detect every k-th frame)
+# --------------------------------------------------
+
+DEFAULT_MAX_AGE = 1.5
+
+
+def track_max_age(max_frame_gap, default=DEFAULT_MAX_AGE):
+    """
+    max_age for frames analysed up to max_frame_gap seconds apart: a track
+    must outlive the widest gap, or a parked vehicle gets a new ID on every
+    frame kept after a long static stretch (keyframe max_gap).
+    """
+    return max(default, 1.25 * max_frame_gap)
+
+
+class IoUTracker:
+    """
+    Greedy IoU tracker with a constant-velocity motion model.
+
+    iou_threshold : minimum IoU between predicted track box and detection
+    center_gate   : fallback match if centers are within this fraction of
+                    the detection's larger side (fast or small vehicles)
+    max_age       : seconds a track survives without a match
+    """
+
+    def __init__(self, iou_threshold=0.3, center_gate=0.5, max_age=DEFAULT_MAX_AGE):
+        self.iou_threshold = iou_threshold
+        self.center_gate = center_gate
+        self.max_age = max_age
+        self.tracks = []     # {id, box, velocity, last_ts, hits}
+        self._next_id = 1
+
+    def update(self, boxes, timestamp):
+        """Returns a track id for each box, in input order."""
+        # Drop tracks that have not been seen recently
+        self.tracks = [t for t in self.tracks if timestamp - t["last_ts"] <= self.max_age]
+
+        ids = [None] * len(boxes)
+        if boxes and self.tracks:
+            predicted = np.array([self._predict(t, timestamp) for t in self.tracks])
+            dets = np.asarray(boxes, dtype=np.float64)
+
+            overlap = iou_matrix(predicted, dets)
+            dist = _center_distance(predicted, dets)
+            size = np.maximum(dets[:, 2] - dets[:, 0], dets[:, 3] - dets[:, 1])
+            near = dist / np.maximum(size[None, :], 1e-6)
+
+            eligible = (overlap >= self.iou_threshold) | (near <= self.center_gate)
+            cost = np.where(eligible, (1 - overlap) + near, np.inf)
+
+            # Greedy assignment, cheapest pairs first
+            used_t, used_d = set(), set()
+            for flat in np.argsort(cost, axis=None):
+                ti, di = np.unravel_index(flat, cost.shape)
+                if not np.isfinite(cost[ti, di]):
+                    break
+                if ti in used_t or di in used_d:
+                    continue
+                used_t.add(ti)
+                used_d.add(di)
+                self._match(self.tracks[ti], boxes[di], timestamp)
+                ids[di] = self.tracks[ti]["id"]
+
+        for di, box in enumerate(boxes):
+            if ids[di] is None:
+                ids[di] = self._start(box, timestamp)
+
+        return ids
+
+    def _predict(self, track, timestamp):
+        dt = timestamp - track["last_ts"]
+        vx, vy = track["velocity"]
+        x1, y1, x2, y2 = track["box"]
+        return [x1 + vx * dt, y1 + vy * dt, x2 + vx * dt, y2 + vy * dt]
+
+    def _match(self, track, box, timestamp):
+        dt = timestamp - track["last_ts"]
+        if dt > 0:
+            (ox, oy), (nx, ny) = _center(track["box"]), _center(box)
+            vx, vy = (nx - ox) / dt, (ny - oy) / dt
+            if track["hits"] == 1:
+                track["velocity"] = (vx, vy)
+            else:
+                # Smooth velocity to damp detector jitter
+                track["velocity"] = (
+                    0.5 * track["velocity"][0] + 0.5 * vx,
+                    0.5 * track["velocity"][1] + 0.5 * vy
+                )
+        track["hits"] += 1
+        track["box"] = list(box)
+        track["last_ts"] = timestamp
+
+    def _start(self, box, timestamp):
+        track = {
+            "id": self._next_id,
+            "box": list(box),
+            "velocity": (0.0, 0.0),
+            "last_ts": timestamp,
+            "hits": 1
+        }
+        self._next_id += 1
+        self.tracks.append(track)
+        return track["id"]
+
+    @property
+    def total_tracks(self):
+        return self._next_id - 1
+
+
+def _center(box):
+    return ((box[0] + box[2]) / 2.0, (box[1] + box[3]) / 2.0)
+
+
+def _center_distance(a, b):
+    ca = np.stack([(a[:, 0] + a[:, 2]) / 2, (a[:, 1] + a[:, 3]) / 2], axis=1)
+    cb = np.stack([(b[:, 0] + b[:, 2]) / 2, (b[:, 1] + b[:, 3]) / 2], axis=1)
+    return np.linalg.norm(ca[:, None, :] - cb[None, :, :], axis=2)
+
+
+def assign_tracks(frame_results, tracker=None):
+    """
+    Replaces per-frame enumeration IDs (Vehicle-1, Vehicle-2, ...) with
+    persistent track IDs, in timestamp order, so aggregation groups the
+    same physical vehicle across frames. References to vehicle IDs inside
+    each frame (primary vehicle, plate links) are rewritten to match.
+    Returns the number of distinct tracks.
+    """
+    tracker = tracker or IoUTracker()
+
+    for fr in sorted(frame_results, key=lambda f: f.get("timestamp_sec", 0)):
+        vehicles = fr.get("entities", {}).get("vehicles", [])
+        if not vehicles:
+            tracker.update([], fr.get("timestamp_sec", 0))
+            continue
+
+        ids = tracker.update(
+            [v["bounding_box"] for v in vehicles], fr.get("timestamp_sec", 0)
+        )
+
+        relabel = {}
+        for v, tid in zip(vehicles, ids):
+            new_id = f"Vehicle-{tid}"
+            relabel[v["id"]] = new_id
+            v["id"] = new_id
+            v["track_id"] = tid
+
+        analysis = fr.get("analysis", {})
+        allocation = analysis.get("fault_allocation", {})
+        if allocation.get("primary_vehicle") in relabel:
+            allocation["primary_vehicle"] = relabel[allocation["primary_vehicle"]]
+        for p in analysis.get("license_plates", []):
+            if p.get("vehicle") in relabel:
+                p["vehicle"] = relabel[p["vehicle"]]
+
+    return tracker.total_tracks
+
+
+# ---------- detect-every-k propagation ----------
+
+FLOW_MAX_WIDTH = 640
+
+
+def _flow_gray(frame):
+    """Downscaled grayscale for optical flow; returns (gray, scale)."""
+    h, w = frame.shape[:2]
+    scale = min(1.0, FLOW_MAX_WIDTH / float(w))
+    if scale < 1.0:
+        frame = cv2.resize(frame, (int(w * scale), int(h * scale)), interpolation=cv2.INTER_AREA)
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY), scale
+
+
+def propagate_objects(prev_frame, frame, objects):
+    """
+    Shifts detections from prev_frame onto frame using sparse Lucas-Kanade
+    flow of feature points inside each box (median displacement).
+    Boxes keep their size; propagated objects are flagged as such.
+    """
+    if not objects:
+        return []
+
+    prev_gray, scale = _flow_gray(prev_frame)
+    gray, _ = _flow_gray(frame)
+    h, w = gray.shape
+
+    out = []
+    for o in objects:
+        x1, y1, x2, y2 = [int(v * scale) for v in o["box"]]
+        x1, y1 = max(0, x1), max(0, y1)
+        x2, y2 = min(w, x2), min(h, y2)
+
+        dx = dy = 0.0
+        if x2 - x1 > 4 and y2 - y1 > 4:
+            mask = np.zeros_like(prev_gray)
+            mask[y1:y2, x1:x2] = 255
+            pts = cv2.goodFeaturesToTrack(
+                prev_gray, maxCorners=30, qualityLevel=0.01, minDistance=3, mask=mask
+            )
+            if pts is not None:
+                nxt, status, _ = cv2.calcOpticalFlowPyrLK(prev_gray, gray, pts, None)
+                good = status.ravel() == 1
+                if good.any():
+                    delta = (nxt[good] - pts[good]).reshape(-1, 2)
+                    dx, dy = np.median(delta, axis=0) / scale
+
+        bx1, by1, bx2, by2 = o["box"]
+        moved = dict(o)
+        moved["box"] = [float(bx1 + dx), float(by1 + dy), float(bx2 + dx), float(by2 + dy)]
+        moved["propagated"] = True
+        out.append(moved)
+
+    return out
+
+
+def detect_schedule(position, detect_interval):
+    """True when the full detector should run on the frame at this position."""
+    return detect_interval <= 1 or position % detect_interval == 0
@@ -2,6 +2,9 @@
 from fpdf import FPDF
 import os
 
+# Bump when the report layout changes; cached PDFs are re-rendered
+TEMPLATE_VERSION = "1"
+
 class VideoReportPDF(FPDF):
     def header(self):
         self.set_font('Arial', 'B', 10)
@@ -61,6 +64,15 @@ def generate_video_pdf(case_data, output_path):
     pdf.cell(0, 8, f"Video File: {os.path.basename(video_path)}", 0, 1)
     pdf.cell(0, 8, f"FPS: {scene.get('video_fps', 'N/A')}", 0, 1)
     pdf.cell(0, 8, f"Total Frames Analyzed: {scene.get('total_frames_analyzed', 0)}", 0, 1)
+
+    selection = scene.get('frame_selection', {})
+    if selection.get('mode') == 'keyframe':
+        skipped = selection.get('skip_reasons', {})
+        pdf.multi_cell(0, 6,
+            f"Keyframe Selection: {selection.get('kept', 0)} of {selection.get('candidates', 0)} "
+            f"sampled frames analyzed; {skipped.get('below_threshold', 0)} skipped below the "
+            f"{selection.get('threshold')} change threshold, {skipped.get('min_gap', 0)} within the "
+            f"{selection.get('min_gap_sec')}s minimum gap (max gap {selection.get('max_gap_sec')}s).")
     
     analysis = case_data.get('analysis', {})
     severity = analysis.get('severity', {})
@@ -150,6 +162,8 @@ def generate_video_pdf(case_data, output_path):
     
     pdf.set_font('Courier', '', 10)
     pdf.multi_cell(0, 6, f"FILE HASH: {custody.get('file_hash', 'N/A')}")
+    if custody.get('merkle_root'):
+        pdf.multi_cell(0, 6, f"FRAME MERKLE ROOT: {custody['merkle_root']}")
     pdf.multi_cell(0, 6, f"HANDLED BY: {custody.get('handled_by', 'N/A')}")
     pdf.multi_cell(0, 6, f"TIMESTAMP:  {custody.get('timestamp', 'N/A')}")
 
@@ -3,54 +3,157 @@ import uuid
 from datetime import datetime
 
 # Import updated modules
-from core.video.extractor import extract_frames
+from core.video.extractor import iter_frames
 from core.video.frame_pipeline import analyze_frames
-from core.video.license_plate import detect_license_plates
+from core.video.parallel import FramePool
 from core.video.timeline import reconstruct_timeline
 from core.video.narrative import build_video_narrative
-from core.video.aggregation import aggregate_video_analysis
-from core.video.hash_utils import hash_frames, build_chain_of_custody
+from core.video.aggregation import aggregate_video_analysis, aggregate_license_plates
+from core.video.license_plate import consolidate_plates
+from core.video.tracker import IoUTracker, assign_tracks, track_max_age
+from core.video.hash_utils import build_chain_of_custody
+from core.derivatives import build_sprite
+from core.metrics import timed, timed_iter
+from core.trace import tracing
+
+# Sampled frames per second of video handed to the models
+EXTRACT_FPS = 3
 
 class VideoPipeline:
-    def __init__(self, image_pipeline, output_dir):
+    def __init__(self, image_pipeline, output_dir, batch_size=8, caption_mode="short",
+                 keyframes=None, detect_interval=1, frame_workers=1, worker_threads=None):
+        """
+        keyframes: optional {threshold, min_gap, max_gap} to enable
+                   scene-change frame selection (see core.video.keyframes).
+        detect_interval: run YOLO every k-th analyzed frame and propagate
+                   boxes in between (see core.video.tracker).
+        frame_workers: >1 analyzes frames in a process pool, each worker
+                   with its own models (see core.video.parallel).
+        worker_threads: torch / OpenCV threads per frame worker.
+        """
         self.image_pipeline = image_pipeline
         self.output_dir = output_dir
+        self.batch_size = batch_size
+        self.caption_mode = caption_mode
+        self.keyframes = keyframes
+        self.detect_interval = max(1, int(detect_interval))
+        # Widest spacing between analyzed frames: one sample, or the
+        # keyframe max_gap rounded up to the next sample
+        frame_gap = 1.0 / EXTRACT_FPS
+        if keyframes:
+            frame_gap += keyframes.get("max_gap", 0)
+        self.track_max_age = track_max_age(frame_gap)
+        self.frame_pool = None
+        if int(frame_workers) > 1:
+            self.frame_pool = FramePool(
+                image_pipeline.config, frame_workers, threads=worker_threads
+            )
         os.makedirs(self.output_dir, exist_ok=True)
 
-    def run(self, video_path: str) -> dict:
+    def run(self, video_path: str, progress=None, video_sha256=None,
+            trace=False, profile_after=None) -> dict:
+        """
+        progress: optional callback(state=None, done=None, total=None)
+                  used by the job engine to report stage and frame counts.
+        video_sha256: hash taken while the upload was saved, if known.
+        trace: record a per-frame, per-stage trace (core.trace) under
+               result["trace"]; profile_after (seconds) also keeps a
+               sampling profile of runs slower than that.
+        """
+        if not trace:
+            return self._run(video_path, progress, video_sha256)
+
+        with tracing("video", profile_after=profile_after,
+                     frame_workers=self.frame_pool.workers if self.frame_pool else 1) as t:
+            result = self._run(video_path, progress, video_sha256)
+        result["trace"] = t.to_dict()
+        return result
+
+    def _run(self, video_path, progress, video_sha256):
+        progress = progress or (lambda *a, **k: None)
+
         case_id = uuid.uuid4().hex[:8]
         frames_dir = os.path.join(self.output_dir, f"{case_id}_frames")
         
-        # 1. EXTRACT (Returns list of {path, timestamp, index})
-        frames_metadata = extract_frames(video_path, frames_dir, fps=3)
+        # 1. EXTRACT (Lazy generator of in-memory {frame, timestamp, index})
+        progress("extracting")
+        extraction = {}
+        # Extraction is lazy; timed_iter counts only the decode side
+        frames = timed_iter(iter_frames(
+            video_path, fps=EXTRACT_FPS, stats=extraction, keyframes=self.keyframes
+        ), "extract")
+
+        # 2. ANALYZE (Decode -> models -> hash in one pass; evidence frames saved)
+        total = extraction.get("expected_frames", 0)
+        progress("analyzing", 0, total)
+
+        tracking = {}
+        options = {
+            "progress": _candidate_progress(progress, extraction["frame_selection"]),
+            "total": total,
+            "batch_size": self.batch_size,
+            "caption_mode": self.caption_mode,
+            "detect_interval": self.detect_interval,
+            "stats": tracking
+        }
+        with timed("analyze_frames"):
+            if self.frame_pool:
+                frame_results = self.frame_pool.analyze_frames(frames, frames_dir, **options)
+            else:
+                frame_results = analyze_frames(frames, self.image_pipeline, frames_dir, **options)
 
-        # 2. ANALYZE (Returns list of analyzed frames with timestamps attached)
-        frame_results = analyze_frames(frames_metadata, self.image_pipeline)
+        selection = extraction["frame_selection"]
+        progress(done=selection["candidates"], total=max(total, selection["candidates"]))
 
-        # 3. DETECT PLATES (Uses analyzed frames + timestamps)
-        license_plates = detect_license_plates(frame_results)
+        # 2b. TRACK (Persistent vehicle IDs across frames, in the parent)
+        with timed("track"):
+            tracking["tracks"] = assign_tracks(
+                frame_results, IoUTracker(max_age=self.track_max_age)
+            )
+
+        # 3. PLATES (Single OCR pass per frame, merged across frames)
+        license_plates = consolidate_plates(aggregate_license_plates(frame_results))
 
         # 4. TIMELINE & AGGREGATION
-        timeline = reconstruct_timeline(frame_results)
-        aggregation = aggregate_video_analysis(frame_results)
+        progress("reporting")
+        with timed("timeline"):
+            timeline = reconstruct_timeline(frame_results)
+            aggregation = aggregate_video_analysis(frame_results)
 
         # 5. NARRATIVE
         narrative_text = build_video_narrative(timeline, aggregation)
 
         # 6. CUSTODY
-        # We need to recreate a simple list of paths for the hasher
-        just_paths = [f["full_path"] for f in frame_results] 
-        frame_hashes = hash_frames(just_paths)
-        
-        chain_of_custody = build_chain_of_custody(
-            case_id=case_id,
-            user="SYSTEM",
-            video_path=video_path,
-            frame_hashes=frame_hashes
-        )
+        # Hashed as produced: written frames from their JPEG bytes,
+        # the rest from decoded pixels; nothing is re-read from disk
+        frame_hashes = [
+            {
+                "frame": f["frame_file"],
+                "sha256": f.get("file_sha256") or f["frame_sha256"],
+                "basis": "file" if f["persisted"] else "pixels",
+                "persisted": f["persisted"]
+            }
+            for f in frame_results
+        ]
+
+        with timed("custody"):
+            chain_of_custody = build_chain_of_custody(
+                case_id=case_id,
+                user="SYSTEM",
+                video_path=video_path,
+                frame_hashes=frame_hashes,
+                video_sha256=video_sha256
+            )
         
-        # Prepare list of filenames for UI
-        frame_filenames = [f["frame_file"] for f in frame_results]
+        # Prepare list of filenames for UI (only frames written as evidence)
+        frame_filenames = [f["frame_file"] for f in frame_results if f["persisted"]]
+
+        # One sprite sheet for the report grid: a tile per timeline event,
+        # in timeline order (every timeline frame is an evidence frame)
+        with timed("sprite"):
+            sprite = build_sprite(frames_dir, [t["frame"] for t in timeline])
+            if sprite:
+                sprite["order"] = "timeline"
 
         # 7. FINAL RETURN
         return {
@@ -61,8 +164,11 @@ class VideoPipeline:
                 "disclaimer": "AI-assisted forensic assessment."
             },
             "scene": {
-                "video_fps": 3,
-                "total_frames_analyzed": len(frame_results)
+                "video_fps": EXTRACT_FPS,
+                "total_frames_analyzed": len(frame_results),
+                "frame_selection": extraction.get("frame_selection", {}),
+                "decode": extraction.get("decode", {}),
+                "tracking": tracking
             },
             "entities": {
                 "vehicles": [], 
@@ -81,7 +187,8 @@ class VideoPipeline:
             "evidence": {
                 "video_file": video_path,
                 "frames_dir": frames_dir,
-                "frames": frame_filenames
+                "frames": frame_filenames,
+                "sprite": sprite
             },
             "timeline": timeline,
             "narrative": { "reconstruction": narrative_text },
@@ -89,4 +196,18 @@ class VideoPipeline:
             
             # ✅ ROOT LEVEL ACCESS FOR TEMPLATE
             "license_plates": license_plates
-        }
\ No newline at end of file
+        }
+
+
+def _candidate_progress(progress, selection):
+    """
+    The progress total counts sampled candidate frames, but the analysis
+    only reports frames it kept; adding the keyframe selector's skips
+    keeps the bar moving with the extractor instead of jumping at the end.
+    """
+    def report(state=None, done=None, total=None):
+        if done is not None:
+            done += selection["skipped"]
+            total = max(total or 0, done)
+        progress(state, done, total)
+    return report
@@ -0,0 +1,101 @@
+import cv2
+import numpy as np
+
+from core.cache import ResultCache, LRUCache, DiskCache, cache_key, model_tag
+
+
+def test_lru_evicts_oldest():
+    lru = LRUCache(max_entries=2)
+    lru.put("a", {"v": 1})
+    lru.put("b", {"v": 2})
+    lru.get("a")                 # a is now most recent
+    lru.put("c", {"v": 3})
+
+    assert lru.get("b") is None
+    assert lru.get("a") == {"v": 1}
+    assert lru.counters["evictions"] == 1
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    key = cache_key("abc", "models", "1.1")
+    first = ResultCache(LRUCache(), DiskCache(str(tmp_path)))
+    first.put(key, {"evidence": {"annotated_image": "x.jpg"}})
+
+    # New process: empty memory tier, same directory
+    second = ResultCache(LRUCache(), DiskCache(str(tmp_path)))
+    assert second.get(key) == {"evidence": {"annotated_image": "x.jpg"}}
+    assert second.memory.counters["misses"] == 1
+    assert second.get(key) is not None
+    assert second.memory.counters["hits"] == 1
+
+
+def test_model_version_changes_key():
+    assert cache_key("abc", "yolo-a", "1.1") != cache_key("abc", "yolo-b", "1.1")
+    assert cache_key("abc", "yolo-a", "1.1") != cache_key("abc", "yolo-a", "1.2")
+
+
+def test_disk_size_eviction(tmp_path):
+    disk = DiskCache(str(tmp_path), max_bytes=300)
+    for i in range(10):
+        disk.put(f"k{i}", {"payload": "x" * 100})
+
+    assert disk.counters["evictions"] > 0
+    assert disk.get("k9") is not None
+
+
+def test_caption_options_change_model_tag():
+    base = model_tag("missing.pt", "blip")
+    assert model_tag("missing.pt", "blip", caption_options={"precision": "fp32", "traced": True}) == base
+    assert model_tag("missing.pt", "blip", caption_options={"precision": "int8"}) != base
+    assert model_tag("missing.pt", "blip", caption_options={"image_size": 288}) != base
+
+
+def test_cache_hits_are_new_cases(tmp_path):
+    from core.models import ModelRegistry
+    from core.pipeline import Pipeline
+
+    pipeline = Pipeline("missing.pt", "blip", str(tmp_path), models=ModelRegistry())
+    calls = []
+
+    def analyse(img):
+        calls.append(img.shape)
+        return {
+            "case": pipeline._case_header("first"),
+            "analysis": {"severity": {"level": "MINOR"}},
+            "evidence": {}
+        }
+    pipeline.analyse = analyse
+
+    ok, png = cv2.imencode(".png", np.zeros((8, 8, 3), np.uint8))
+    uploads = ["a.png", "b.png", "c.png"]
+    results = [pipeline.run(str(tmp_path / name), data=png.tobytes()) for name in uploads]
+
+    assert len(calls) == 1
+    assert len({r["case"]["case_id"] for r in results}) == 3
+    assert [r["evidence"]["original_image"] for r in results] == uploads
+    assert results[1]["analysis"] == results[0]["analysis"]
+
+
+def test_plate_mode_switch_is_a_cache_miss(tmp_path):
+    from core.models import ModelRegistry
+    from core.pipeline import Pipeline
+
+    cache = ResultCache(LRUCache(), DiskCache(str(tmp_path / "cache")))
+    pipeline = Pipeline("missing.pt", "blip", str(tmp_path), cache=cache, models=ModelRegistry())
+    pipeline.analyse = lambda img: {
+        "case": pipeline._case_header("x"),
+        "analysis": {"license_plates": [{"plate": f"{pipeline.plate_mode.upper()}123"}]},
+        "evidence": {}
+    }
+
+    ok, png = cv2.imencode(".png", np.zeros((8, 8, 3), np.uint8))
+    plates = lambda: pipeline.run("a.png", data=png.tobytes())["analysis"]["license_plates"]
+
+    assert plates() == [{"plate": "ROI123"}]
+    pipeline.plate_mode = "full"
+    assert plates() == [{"plate": "FULL123"}]
+    pipeline.plate_mode = "roi"
+    assert plates() == [{"plate": "ROI123"}]
+
+    assert model_tag("missing.pt", "blip", plate_mode="roi") == model_tag("missing.pt", "blip")
+    assert model_tag("missing.pt", "blip", plate_mode="full") != model_tag("missing.pt", "blip")
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+
+from core.captioner import Captioner, CAPTION_MODES
+
+
+class _Processor:
+    """Encodes each image as its mean pixel value and decodes it back."""
+
+    def __call__(self, images, return_tensors="pt"):
+        return {"pixel_values": [int(np.asarray(img).mean()) for img in images]}
+
+    def batch_decode(self, ids, skip_special_tokens=True):
+        return [f"frame {i}" for i in ids]
+
+
+class _Model:
+    def __init__(self):
+        self.calls = []
+
+    def generate(self, pixel_values, **kwargs):
+        self.calls.append((len(pixel_values), kwargs))
+        return list(pixel_values)
+
+
+def _captioner(short_max_tokens=None):
+    cap = Captioner.__new__(Captioner)
+    cap.processor, cap.model = _Processor(), _Model()
+    cap.modes = {k: dict(v) for k, v in CAPTION_MODES.items()}
+    if short_max_tokens:
+        cap.modes["short"]["max_new_tokens"] = short_max_tokens
+    return cap
+
+
+def _frames(n):
+    return [np.full((8, 8, 3), i, np.uint8) for i in range(n)]
+
+
+def test_batches_split_and_order_kept():
+    cap = _captioner()
+    captions = cap.caption_batch(_frames(10), mode="full", batch_size=4)
+
+    assert captions == [f"frame {i}" for i in range(10)]
+    assert [n for n, _ in cap.model.calls] == [4, 4, 2]
+
+
+def test_short_mode_bounds_decoding():
+    cap = _captioner(short_max_tokens=8)
+    cap.caption_batch(_frames(2), mode="short")
+    cap.caption_batch(_frames(2), mode="full")
+
+    short, full = (kwargs for _, kwargs in cap.model.calls)
+    assert short == {"max_new_tokens": 8, "num_beams": 1, "do_sample": False}
+    assert full == CAPTION_MODES["full"]
+    assert short["max_new_tokens"] < full["max_new_tokens"]
+    assert CAPTION_MODES["short"]["max_new_tokens"] == 12     # shared defaults untouched
+
+
+def test_unknown_mode_rejected():
+    with pytest.raises(ValueError):
+        _captioner().caption_batch(_frames(1), mode="long")
@@ -0,0 +1,88 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from core.db import MongoDB, CASE_SUMMARY_FIELDS, _parse_cursor
+
+
+class _Cursor:
+    def __init__(self, docs):
+        self.docs = docs
+
+    def sort(self, keys):
+        for field, direction in reversed(keys):
+            self.docs.sort(key=lambda d: d[field], reverse=direction < 0)
+        return self
+
+    def limit(self, n):
+        return self.docs[:n]
+
+
+def _matches(doc, query):
+    for field, cond in query.items():
+        if field == "$or":
+            if not any(_matches(doc, q) for q in cond):
+                return False
+        elif isinstance(cond, dict):
+            if not doc[field] < cond["$lt"]:
+                return False
+        elif doc[field] != cond:
+            return False
+    return True
+
+
+class FakeCases:
+    """Just the find / sort / limit subset get_case_summaries uses."""
+
+    def __init__(self, docs):
+        self.docs = docs
+
+    def find(self, query, projection):
+        keep = {k.split(".")[0] for k in projection} | {"_id"}
+        return _Cursor([
+            {k: v for k, v in d.items() if k in keep}
+            for d in self.docs if _matches(d, query)
+        ])
+
+
+def _db(docs):
+    db = MongoDB.__new__(MongoDB)
+    db.cases = FakeCases(docs)
+    return db
+
+
+def test_keyset_pages_cover_everything_once():
+    start = datetime(2026, 1, 1, 12, 0, 0, 123000)
+    docs = []
+    for i in range(23):
+        # Several cases share a created_at to exercise the _id tie-break
+        docs.append({
+            "_id": ObjectId(),
+            "user": "jo",
+            "case_id": f"c{i}",
+            "created_at": start + timedelta(seconds=i // 3),
+            "timeline": ["large"] * 10
+        })
+    docs.append({"_id": ObjectId(), "user": "other", "case_id": "x", "created_at": start})
+    db = _db(docs)
+
+    seen, cursor = [], None
+    while True:
+        page, cursor = db.get_case_summaries("jo", before=cursor, limit=5)
+        assert all("timeline" not in c for c in page)
+        seen += [c["case_id"] for c in page]
+        if cursor is None:
+            break
+
+    expected = sorted(
+        (d for d in docs if d["user"] == "jo"),
+        key=lambda d: (d["created_at"], d["_id"]), reverse=True
+    )
+    assert seen == [d["case_id"] for d in expected]
+
+
+def test_cursor_round_trip():
+    oid = ObjectId()
+    ts = datetime(2026, 3, 4, 5, 6, 7, 891000)
+    assert _parse_cursor(f"{ts.isoformat()}~{oid}") == (ts, oid)
+    assert "scene.summary" in CASE_SUMMARY_FIELDS
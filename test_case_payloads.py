@@ -0,0 +1,85 @@
+import core.db
+from core.db import MongoDB, VIDEO_PAYLOAD_FIELDS
+
+
+class _Sorted(list):
+    def sort(self, key, direction):
+        return sorted(self, key=lambda d: d[key], reverse=direction < 0)
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+
+    def insert_one(self, doc):
+        self.docs.append(doc)
+
+    def insert_many(self, docs):
+        self.docs.extend(docs)
+
+    def find_one(self, query):
+        return next((d for d in self.docs if all(d.get(k) == v for k, v in query.items())), None)
+
+    def find(self, query, projection):
+        def ok(d):
+            return all(
+                d.get(k) in v["$in"] if isinstance(v, dict) else d.get(k) == v
+                for k, v in query.items()
+            )
+        return _Sorted(d for d in self.docs if ok(d))
+
+
+def _db():
+    db = MongoDB.__new__(MongoDB)
+    db.cases = FakeCollection()
+    db.case_payloads = FakeCollection()
+    return db
+
+
+def _video_case(frames):
+    return {
+        "case_id": "v1",
+        "user": "jo",
+        "type": "video",
+        "timeline": [{"frame": f"frame_{i:04d}.jpg", "timestamp_sec": i / 3} for i in range(frames)],
+        "license_plates": [{"plate": "AB12CD", "reads": 3}],
+        "evidence": {"frames_dir": "data/outputs/v1_frames",
+                     "frames": [f"frame_{i:04d}.jpg" for i in range(frames)]},
+        "chain_of_custody": {
+            "merkle_root": "ab" * 32,
+            "frame_hashes": [{"frame": f"frame_{i:04d}.jpg", "sha256": f"{i:064x}"} for i in range(frames)],
+            "frame_proofs": {}
+        }
+    }
+
+
+def test_split_fields_round_trip(monkeypatch):
+    monkeypatch.setattr(core.db, "PAYLOAD_CHUNK_BYTES", 1024)
+    db = _db()
+    original = _video_case(2000)
+    db.save_case(_video_case(2000), split=VIDEO_PAYLOAD_FIELDS)
+
+    stored = db.cases.docs[0]
+    assert "timeline" not in stored and "frames" not in stored["evidence"]
+    assert "frame_hashes" not in stored["chain_of_custody"]
+    assert stored["chain_of_custody"]["merkle_root"] == "ab" * 32
+    # Large fields were chunked
+    assert sum(d["field"] == "chain_of_custody.frame_hashes" for d in db.case_payloads.docs) > 1
+
+    # Views load only what they ask for
+    case = db.get_case("v1", "jo", payload=("timeline", "evidence.frames"))
+    assert case["timeline"] == original["timeline"]
+    assert case["evidence"]["frames"] == original["evidence"]["frames"]
+    assert "frame_hashes" not in case["chain_of_custody"]
+
+    db.load_payload(case, ("chain_of_custody.frame_hashes", "license_plates"))
+    assert case["chain_of_custody"]["frame_hashes"] == original["chain_of_custody"]["frame_hashes"]
+    assert case["license_plates"] == original["license_plates"]
+
+
+def test_inline_cases_still_load():
+    db = _db()
+    db.cases.insert_one(_video_case(3))
+    case = db.get_case("v1", "jo", payload=VIDEO_PAYLOAD_FIELDS)
+    assert len(case["timeline"]) == 3
+    assert not db.case_payloads.docs
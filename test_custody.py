@@ -0,0 +1,93 @@
+import io
+import os
+import hashlib
+
+import numpy as np
+
+from core.video.frame_pipeline import EvidenceWriter
+from core.video.hash_utils import (
+    sha256_file,
+    save_and_hash,
+    merkle_root,
+    merkle_proofs,
+    verify_merkle_proof,
+    build_chain_of_custody,
+    verify_custody
+)
+
+
+def _hashes(n):
+    return [hashlib.sha256(str(i).encode()).hexdigest() for i in range(n)]
+
+
+def test_every_leaf_proves_against_root():
+    for n in range(1, 40):
+        leaves = _hashes(n)
+        root = merkle_root(leaves)
+        proofs = merkle_proofs(leaves, range(n))
+        for i in range(n):
+            assert verify_merkle_proof(leaves[i], proofs[i], root)
+            assert len(proofs[i]) <= (n - 1).bit_length()
+        if n > 1:
+            assert not verify_merkle_proof(leaves[0], proofs[1], root)
+
+
+def test_root_depends_on_order_and_count():
+    leaves = _hashes(5)
+    assert merkle_root(leaves) != merkle_root(leaves[::-1])
+    # An odd leaf is promoted, never duplicated
+    assert merkle_root(leaves) != merkle_root(leaves + leaves[-1:])
+    assert merkle_root([]) == ""
+
+
+def test_save_and_hash_matches_file(tmp_path):
+    data = os.urandom(3 * 1024 * 1024 + 17)
+    path = str(tmp_path / "upload.mp4")
+    assert save_and_hash(io.BytesIO(data), path, chunk_size=65536) == sha256_file(path)
+    assert open(path, "rb").read() == data
+
+
+def test_custody_verifies_written_frames(tmp_path):
+    frames_dir = str(tmp_path / "frames")
+    writer = EvidenceWriter(frames_dir)
+    rng = np.random.default_rng(0)
+
+    for i in range(9):
+        frame = rng.integers(0, 255, (24, 32, 3), dtype=np.uint8)
+        writer.add({
+            "frame_file": f"frame_{i:04d}.jpg",
+            "frame_sha256": hashlib.sha256(frame.tobytes()).hexdigest(),
+            "analysis": {"severity": {"score": 80 if i in (3, 4) else 10}, "license_plates": []}
+        }, frame=frame)
+    results = writer.finish()
+
+    frame_hashes = [
+        {
+            "frame": f["frame_file"],
+            "sha256": f.get("file_sha256") or f["frame_sha256"],
+            "persisted": f["persisted"]
+        }
+        for f in results
+    ]
+    video = tmp_path / "v.mp4"
+    video.write_bytes(b"video")
+    custody = build_chain_of_custody("c1", "SYSTEM", str(video), frame_hashes)
+
+    # first, escalation, de-escalation, last
+    assert sorted(custody["frame_proofs"]) == [
+        "frame_0000.jpg", "frame_0003.jpg", "frame_0005.jpg", "frame_0008.jpg"
+    ]
+    for f in results:
+        if f["persisted"]:
+            assert sha256_file(os.path.join(frames_dir, f["frame_file"])) == f["file_sha256"]
+
+    report = verify_custody(custody, frames_dir, video_path=str(video))
+    assert report["ok"] and report["video"] and all(report["frames"].values())
+
+    single = verify_custody(custody, frames_dir, frames=["frame_0003.jpg"])
+    assert single["ok"] and list(single["frames"]) == ["frame_0003.jpg"]
+
+    with open(os.path.join(frames_dir, "frame_0005.jpg"), "ab") as f:
+        f.write(b"tampered")
+    report = verify_custody(custody, frames_dir)
+    assert not report["ok"] and report["frames"]["frame_0005.jpg"] is False
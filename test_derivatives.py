@@ -0,0 +1,48 @@
+import os
+
+import cv2
+import numpy as np
+
+from core.derivatives import (
+    derivative_name,
+    ensure_derivative,
+    build_sprite,
+    SPRITE_FILE
+)
+
+
+def _write_frames(frames_dir, n):
+    names = []
+    for i in range(n):
+        frame = np.full((360, 640, 3), (i * 40) % 255, np.uint8)
+        name = f"frame_{i:04d}.jpg"
+        cv2.imwrite(os.path.join(frames_dir, name), frame)
+        names.append(name)
+    return names
+
+
+def test_derivative_generated_on_demand(tmp_path):
+    names = _write_frames(str(tmp_path), 1)
+    assert derivative_name(names[0], "thumb") == "frame_0000.thumb.webp"
+
+    path = ensure_derivative(str(tmp_path), names[0], "preview")
+    assert cv2.imread(path).shape[:2] == (360, 640)      # never upscaled
+    thumb = cv2.imread(ensure_derivative(str(tmp_path), names[0], "thumb"))
+    assert thumb.shape[:2] == (90, 160)
+
+    assert ensure_derivative(str(tmp_path), "missing.jpg", "thumb") is None
+
+
+def test_sprite_layout(tmp_path):
+    names = _write_frames(str(tmp_path), 13)
+    sprite = build_sprite(str(tmp_path), names, columns=5)
+
+    assert sprite == {"file": SPRITE_FILE, "tile": [160, 90], "columns": 5, "count": 13}
+    sheet = cv2.imread(os.path.join(str(tmp_path), SPRITE_FILE))
+    assert sheet.shape[:2] == (3 * 90, 5 * 160)
+
+    # Tile 7 sits at row 1, column 2
+    tile = sheet[90:180, 320:480].astype(int)
+    assert abs(tile.mean() - (7 * 40) % 255) < 3
+
+    assert build_sprite(str(tmp_path), []) is None
@@ -0,0 +1,49 @@
+import pytest
+
+from core.cache import model_tag
+from core.detector_backends import parse_backend, exported_path, compare_detections
+
+
+def _det(cls, conf, box):
+    return {"cls": cls, "name": str(cls), "conf": conf, "box": box}
+
+
+def test_parse_backend():
+    assert parse_backend(None) == ("torch", False)
+    assert parse_backend("ONNX-int8") == ("onnx", True)
+    assert parse_backend("openvino") == ("openvino", False)
+    with pytest.raises(ValueError):
+        parse_backend("tensorrt")
+
+
+def test_exported_paths_follow_ultralytics_naming():
+    assert exported_path("models/yolov8n.pt", "onnx") == "models/yolov8n.onnx"
+    assert exported_path("models/yolov8n.pt", "onnx", int8=True) == "models/yolov8n.int8.onnx"
+    assert exported_path("models/yolov8n.pt", "openvino") == "models/yolov8n_openvino_model"
+
+
+def test_compare_detections_matches_by_class_and_iou():
+    reference = [_det(2, 0.9, [0, 0, 10, 10]), _det(0, 0.8, [20, 20, 30, 30]), _det(2, 0.4, [50, 50, 60, 60])]
+    candidate = [
+        _det(2, 0.85, [0, 0, 10, 11]),      # same car, slightly shifted
+        _det(7, 0.80, [20, 20, 30, 30]),    # right box, wrong class
+        _det(2, 0.30, [100, 100, 110, 110])
+    ]
+    cmp = compare_detections(reference, candidate)
+    assert cmp["matched"] == 1
+    assert cmp["reference"] == 3 and cmp["candidate"] == 3
+    assert cmp["mean_iou"] == pytest.approx(10 / 11, abs=1e-3)
+    assert cmp["max_conf_delta"] == pytest.approx(0.05)
+
+    assert compare_detections([], candidate)["matched"] == 0
+
+
+def test_compare_detections_is_one_to_one():
+    reference = [_det(2, 0.9, [0, 0, 10, 10]), _det(2, 0.8, [0, 0, 10, 10])]
+    assert compare_detections(reference, [_det(2, 0.9, [0, 0, 10, 10])])["matched"] == 1
+
+
+def test_backend_changes_cache_tag():
+    torch_tag = model_tag("missing.pt", "blip")
+    assert model_tag("missing.pt", "blip", "torch") == torch_tag
+    assert model_tag("missing.pt", "blip", "onnx-int8") != torch_tag
@@ -0,0 +1,94 @@
+import numpy as np
+
+from core.detector import Detector
+
+
+class _Tensor(np.ndarray):
+    """numpy array with the torch.Tensor calls the detector uses."""
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return np.asarray(self)
+
+
+def _tensor(values, dtype=np.float32):
+    return np.asarray(values, dtype=dtype).view(_Tensor)
+
+
+class _Boxes:
+    def __init__(self, xyxy, conf, cls):
+        self.xyxy, self.conf, self.cls = _tensor(xyxy), _tensor(conf), _tensor(cls)
+
+    def __len__(self):
+        return len(self.conf)
+
+    def __iter__(self):
+        # Per-box views, as ultralytics yields them
+        for i in range(len(self)):
+            yield _Boxes(self.xyxy[i:i + 1], self.conf[i:i + 1], self.cls[i:i + 1])
+
+
+class _Results:
+    names = {0: "person", 2: "car", 7: "truck"}
+
+    def __init__(self, xyxy, conf, cls):
+        self.boxes = _Boxes(np.reshape(xyxy, (-1, 4)), conf, cls)
+
+
+def _per_box_loop(results):
+    # The conversion Detector.detect used before it was vectorized
+    out = []
+    for b in results.boxes:
+        x1, y1, x2, y2 = b.xyxy[0].tolist()
+        out.append({
+            "cls": int(b.cls[0].item()),
+            "name": results.names[int(b.cls[0].item())],
+            "conf": float(b.conf[0].item()),
+            "box": [float(x1), float(y1), float(x2), float(y2)]
+        })
+    return out
+
+
+def test_vectorized_conversion_matches_per_box_loop():
+    results = _Results(
+        [[10.5, 20.25, 110.75, 90.0], [0.0, 0.0, 5.5, 5.5], [300.1, 40.2, 420.3, 160.4]],
+        [0.91, 0.26, 0.5],
+        [2, 0, 7]
+    )
+
+    fast = Detector._to_dicts(results)
+    assert fast == _per_box_loop(results)
+    for d in fast:
+        assert type(d["cls"]) is int and type(d["conf"]) is float
+        assert all(type(v) is float for v in d["box"])
+
+    # No second confidence filter: every box predict() kept is returned,
+    # including low-confidence ones, exactly as before
+    assert [d["name"] for d in fast] == ["car", "person", "truck"]
+    assert Detector._to_dicts(_Results(np.zeros((0, 4)), [], [])) == []
+
+
+class _FakeYOLO:
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, source, verbose=False):
+        frames = source if isinstance(source, list) else [source]
+        self.calls.append(len(frames))
+        # One box per frame; x1 identifies the frame
+        return [_Results([[float(f.mean()), 0, 1, 1]], [0.8], [2]) for f in frames]
+
+
+def test_detect_batch_returns_one_list_per_frame_in_order():
+    det = Detector.__new__(Detector)
+    det.model = _FakeYOLO()
+    frames = [np.full((4, 4, 3), i, np.uint8) for i in range(11)]
+
+    out = det.detect_batch(frames, batch_size=4)
+
+    assert det.model.calls == [4, 4, 3]
+    assert len(out) == 11
+    assert [dets[0]["box"][0] for dets in out] == [float(i) for i in range(11)]
+    assert out[3] == det.detect(frames[3])
@@ -0,0 +1,94 @@
+import os
+
+import cv2
+import numpy as np
+
+from core.video.frame_pipeline import analyze_frames
+from core.video.hash_utils import sha256_bytes, sha256_frame
+from core.video_pipeline import VideoPipeline
+
+# Per-frame (severity score, plate) script, keyed by the frame's marker block:
+# MINOR, MINOR, SEVERE, SEVERE, MINOR, MINOR + plate, MINOR, MINOR
+SCRIPT = [(10, None), (10, None), (80, None), (80, None),
+          (10, None), (10, "AB1234"), (10, None), (10, None)]
+EVIDENCE = [0, 2, 4, 5, 7]     # first, two level changes, the plate, last
+
+
+class FakeModels:
+    """Stands in for the batched detector / captioner of an image pipeline."""
+
+    def detect_batch(self, frames, batch_size=8):
+        return [[] for _ in frames]
+
+    def detect(self, frame):
+        return []
+
+    def caption_batch(self, frames, mode="short", batch_size=8):
+        return ["a road" for _ in frames]
+
+
+class FakeImagePipeline:
+    detector = captioner = FakeModels()
+    config = {}
+
+    def analyse(self, img, save_annotated=True, objects=None, raw_caption=None):
+        score, plate = SCRIPT[int(round(img[:16, :16, 0].mean() / 20))]
+        return {
+            "scene": {"summary": raw_caption},
+            "entities": {"vehicles": [], "persons": []},
+            "analysis": {
+                "fault_allocation": {"primary_vehicle": None},
+                "severity": {"score": score},
+                "license_plates": [{"plate": plate, "confidence": 0.9}] if plate else []
+            }
+        }
+
+
+def _clip():
+    # Distinct, noisy frames so every pixel hash differs
+    rng = np.random.default_rng(0)
+    for i in range(len(SCRIPT)):
+        frame = rng.integers(0, 8, (48, 64, 3), dtype=np.uint8)
+        frame[:16, :16] = i * 20     # marker block, survives JPEG
+        yield {"frame": frame, "timestamp": round(i / 3, 2), "index": i}
+
+
+def test_only_evidence_frames_are_persisted(tmp_path):
+    frames = list(_clip())
+    frames_dir = str(tmp_path / "frames")
+    results = analyze_frames(iter(frames), FakeImagePipeline(), frames_dir, batch_size=3)
+
+    persisted = [r["frame_index"] for r in results if r["persisted"]]
+    assert persisted == EVIDENCE
+
+    written = sorted(f for f in os.listdir(frames_dir) if f.endswith(".jpg"))
+    assert written == [r["frame_file"] for r in results if r["persisted"]]
+
+    # Every frame is hashed from its pixels; written ones also from their JPEG bytes
+    for item, r in zip(frames, results):
+        assert r["frame_sha256"] == sha256_frame(item["frame"])
+        if r["persisted"]:
+            with open(os.path.join(frames_dir, r["frame_file"]), "rb") as f:
+                assert r["file_sha256"] == sha256_bytes(f.read())
+        else:
+            assert "file_sha256" not in r
+
+
+def test_video_case_lists_evidence_frames_and_hashes_all(tmp_path):
+    clip = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(clip, cv2.VideoWriter_fourcc(*"MJPG"), 3, (64, 48))
+    for item in _clip():
+        writer.write(item["frame"])
+    writer.release()
+
+    result = VideoPipeline(FakeImagePipeline(), str(tmp_path / "out"), batch_size=3).run(clip)
+
+    assert result["evidence"]["frames"] == [f"frame_{i:04d}.jpg" for i in EVIDENCE]
+    frame_hashes = result["chain_of_custody"]["frame_hashes"]
+    assert len(frame_hashes) == len(SCRIPT)
+    assert [h["persisted"] for h in frame_hashes] == [i in EVIDENCE for i in range(len(SCRIPT))]
+
+    # The report grid walks the timeline, so the sprite is tiled in that order
+    sprite = result["evidence"]["sprite"]
+    assert sprite["order"] == "timeline"
+    assert sprite["count"] == len(result["timeline"])
@@ -0,0 +1,148 @@
+import random
+
+from core.geometry import iou, PairGeometry
+from core.reasoning import (
+    fault_score,
+    verification_layer,
+    is_vehicle,
+    is_fallen_motorcycle,
+    impact_side,
+    rear_end_suspect
+)
+
+# --------------------------------------------------
+#  Reference: the original nested-loop rules, kept to
+#  prove the vectorized geometry gives identical output
+# --------------------------------------------------
+
+def reference_max_overlap(objects):
+    vehicles = [o for o in objects if is_vehicle(o)]
+    max_overlap = 0.0
+    for i in range(len(vehicles)):
+        for j in range(i + 1, len(vehicles)):
+            max_overlap = max(max_overlap, iou(vehicles[i]["box"], vehicles[j]["box"]))
+    return max_overlap
+
+
+def reference_fault_score(objects, caption):
+    vehicles = [o for o in objects if is_vehicle(o)]
+    vcount = len(vehicles)
+    if vcount <= 1:
+        return {0: 0.0}
+
+    score = {i: 50 for i in range(vcount)}
+    caption = caption.lower()
+
+    involved = set()
+    for i in range(vcount):
+        for j in range(vcount):
+            if i != j and iou(vehicles[i]["box"], vehicles[j]["box"]) > 0.01:
+                involved.add(i)
+                involved.add(j)
+    uninvolved = {i for i in range(vcount) if i not in involved}
+
+    for i, v in enumerate(vehicles):
+        if is_fallen_motorcycle(v):
+            for j in range(vcount):
+                if j != i:
+                    score[j] += 30
+            score[i] -= 10
+
+    for w in ["crash", "collided", "impact", "wreck", "smashed", "collision"]:
+        if w in caption:
+            for i in score:
+                score[i] += 5
+
+    for i in range(vcount):
+        for j in range(i + 1, vcount):
+            if iou(vehicles[i]["box"], vehicles[j]["box"]) > 0.05:
+                side = impact_side(vehicles[i], vehicles[j])
+                if side == "front_or_back":
+                    score[i] += 20
+                    score[j] += 20
+                elif side == "left":
+                    score[i] += 15
+                elif side == "right":
+                    score[j] += 15
+
+    for i in range(vcount):
+        for j in range(vcount):
+            if i != j and rear_end_suspect(vehicles[i], vehicles[j]):
+                score[j] += 20
+
+    vals = list(score.values())
+    mn, mx = min(vals), max(vals)
+    norm = {i: round(100 * (score[i] - mn) / (mx - mn + 1e-6), 1) for i in score}
+    for i in uninvolved:
+        norm[i] = 0.0
+    return norm
+
+
+def reference_verification(primary_fault, objects):
+    vehicles = [o for o in objects if is_vehicle(o)]
+    verified = primary_fault.copy()
+    for i, v in enumerate(vehicles):
+        if is_fallen_motorcycle(v):
+            verified[i] = max(0, verified[i] - 30)
+            for j in verified:
+                if j != i:
+                    verified[j] += 10
+    for i in range(len(vehicles)):
+        if not any(i != j and iou(vehicles[i]["box"], vehicles[j]["box"]) > 0.01
+                   for j in range(len(vehicles))):
+            verified[i] = 0
+    max_val = max(verified.values())
+    for i in verified:
+        if verified[i] == max_val:
+            verified[i] += 10
+    return verified
+
+
+def random_scene(rng, n, width=1280, height=720):
+    names = ["car", "car", "truck", "bus", "motorcycle", "person"]
+    objects = []
+    for _ in range(n):
+        w = rng.uniform(30, 300)
+        h = rng.uniform(30, 200)
+        x = rng.uniform(0, width - w)
+        y = rng.uniform(0, height - h)
+        objects.append({
+            "name": rng.choice(names),
+            "conf": rng.uniform(0.35, 1.0),
+            "box": [x, y, x + w, y + h]
+        })
+    return objects
+
+
+CAPTIONS = ["a car parked on a street", "a crash between two cars", "an impact and a wreck"]
+
+
+def test_matches_reference_on_random_scenes():
+    rng = random.Random(7)
+    for trial in range(300):
+        objects = random_scene(rng, rng.randint(0, 40))
+        caption = rng.choice(CAPTIONS)
+        geo = PairGeometry([o["box"] for o in objects if is_vehicle(o)])
+
+        assert geo.max_overlap == reference_max_overlap(objects)
+
+        fault = fault_score(objects, caption, geo)
+        assert fault == reference_fault_score(objects, caption)
+        assert all(type(v) is float for v in fault.values())
+
+        assert verification_layer(fault, objects, geo) == reference_verification(fault, objects)
+
+
+def test_geometry_built_on_demand():
+    objects = [
+        {"name": "car", "conf": 0.9, "box": [100, 100, 300, 220]},
+        {"name": "car", "conf": 0.9, "box": [250, 120, 420, 240]},
+        {"name": "motorcycle", "conf": 0.8, "box": [600, 400, 760, 460]},
+    ]
+    assert fault_score(objects, "crash") == reference_fault_score(objects, "crash")
+
+
+def test_crash_word_hits_counts_distinct_words():
+    from core.reasoning import crash_word_hits
+    assert crash_word_hits("a car crash, crash and impact") == 2
+    assert crash_word_hits("two cars parked") == 0
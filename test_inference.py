@@ -0,0 +1,127 @@
+import socket
+import threading
+
+import numpy as np
+import pytest
+
+from core.models import ModelRegistry
+from core.inference.protocol import send_message, recv_message, ProtocolError
+from core.inference.server import InferenceServer
+from core.inference.client import InferenceClient, register_remote
+
+
+class _Detector:
+    def __init__(self):
+        self.calls = []
+        self.shapes = []
+
+    def detect_batch(self, frames, batch_size=8):
+        self.calls.append(len(frames))
+        self.shapes.append({f.shape for f in frames})
+        return [[{"name": "car", "conf": 0.5, "box": [float(f.mean()), 0.0, 1.0, 1.0]}] for f in frames]
+
+
+class _Captioner:
+    def caption_batch(self, frames, mode="full", batch_size=8):
+        return [f"{mode} {int(f.mean())}" for f in frames]
+
+
+@pytest.fixture
+def server(tmp_path):
+    models = ModelRegistry()
+    detector = _Detector()
+    models.register("detector", lambda: detector)
+    models.register("captioner", _Captioner)
+
+    path = str(tmp_path / "inference.sock")
+    srv = InferenceServer(path, models, max_batch=8, max_wait_ms=200)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    yield srv, path, detector
+    srv.shutdown()
+    srv.server_close()
+
+
+def test_protocol_round_trip():
+    a, b = socket.socketpair()
+    frame = np.arange(2 * 3 * 3, dtype=np.uint8).reshape(2, 3, 3)
+    send_message(a, {"op": "detect", "args": {"k": 1}}, [frame, np.zeros((0,), np.float32)])
+
+    header, arrays = recv_message(b)
+    assert header == {"op": "detect", "args": {"k": 1}}
+    assert np.array_equal(arrays[0], frame) and arrays[1].shape == (0,)
+
+    a.close()
+    assert recv_message(b) == (None, [])
+
+
+def test_protocol_rejects_object_arrays():
+    a, b = socket.socketpair()
+    body = b'{"arrays": [{"dtype": "|O", "shape": [1]}]}'
+    a.sendall(len(body).to_bytes(4, "big") + body)
+    with pytest.raises(ProtocolError):
+        recv_message(b)
+
+
+def test_concurrent_requests_are_batched(server):
+    srv, path, detector = server
+    client = InferenceClient(path)
+    start = threading.Barrier(4)
+    results = {}
+
+    def _call(i):
+        start.wait()
+        results[i] = client.call("detect", [np.full((4, 4, 3), i * 10, np.uint8)])
+
+    threads = [threading.Thread(target=_call, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    # Every caller gets back its own frame's detections
+    for i in range(4):
+        assert results[i][0][0]["box"][0] == i * 10
+    # ...from fewer model calls than requests
+    assert sum(detector.calls) == 4
+    assert len(detector.calls) < 4
+    assert srv.batchers["detector"].stats["requests"] == 4
+
+
+def test_detect_batches_only_same_shaped_frames(server):
+    srv, path, detector = server
+    client = InferenceClient(path)
+    start = threading.Barrier(4)
+    results = {}
+    sizes = [(4, 4), (6, 8), (4, 4), (6, 8)]
+
+    def _call(i):
+        start.wait()
+        results[i] = client.call("detect", [np.full(sizes[i] + (3,), i * 10, np.uint8)])
+
+    threads = [threading.Thread(target=_call, args=(i,)) for i in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    for i in range(4):
+        assert results[i][0][0]["box"][0] == i * 10
+    # Submitted together, but never letterboxed into one mixed batch
+    assert all(len(shapes) == 1 for shapes in detector.shapes)
+    assert {s for shapes in detector.shapes for s in shapes} == {(4, 4, 3), (6, 8, 3)}
+    assert srv.batchers["detector"].stats["batches"] < 4
+
+
+def test_remote_registry_proxies(server):
+    _, path, _ = server
+    models = ModelRegistry()
+    register_remote(models, path)
+
+    frames = [np.full((4, 4, 3), 30, np.uint8), np.full((4, 4, 3), 60, np.uint8)]
+    assert models.get("captioner").caption_batch(frames, mode="short") == ["short 30", "short 60"]
+    assert models.get("detector").detect(frames[1])[0]["box"][0] == 60
+    assert models.status()["detector"]["state"] == "ready"
+
+    # Server-side failures surface as errors, not hangs
+    with pytest.raises(RuntimeError):
+        models.get("human").analyse(frames[0], [])
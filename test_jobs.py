@@ -0,0 +1,196 @@
+import threading
+import time
+from datetime import datetime, timedelta
+
+from core.jobs import JobQueue, job_status
+
+
+class MemoryStore:
+    def __init__(self, jobs=None):
+        self.jobs = {j["job_id"]: j for j in (jobs or [])}
+        self.lock = threading.Lock()
+
+    def save_job(self, job):
+        self.jobs[job["job_id"]] = job
+
+    def update_job(self, job_id, fields):
+        self.jobs[job_id].update(fields)
+
+    def get_job(self, job_id, user):
+        job = self.jobs.get(job_id)
+        return job if job and job["user"] == user else None
+
+    def get_unfinished_jobs(self):
+        return [dict(j) for j in self.jobs.values()
+                if j["state"] not in ("done", "failed")]
+
+    def claim_job(self, job_id, owner, stale_before):
+        with self.lock:
+            job = self.jobs.get(job_id)
+            if not job or job["state"] in ("done", "failed"):
+                return None
+            if job.get("heartbeat_at") and job["heartbeat_at"] >= stale_before:
+                return None
+            job.update(owner=owner, heartbeat_at=datetime.utcnow())
+            return dict(job)
+
+    def heartbeat_jobs(self, job_ids, owner):
+        with self.lock:
+            for job_id in job_ids:
+                if self.jobs[job_id].get("owner") == owner:
+                    self.jobs[job_id]["heartbeat_at"] = datetime.utcnow()
+
+
+def wait_for(store, job_id, timeout=5):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if store.jobs[job_id]["state"] in ("done", "failed"):
+            return store.jobs[job_id]
+        time.sleep(0.01)
+    raise AssertionError("job did not finish")
+
+
+def test_progress_and_result():
+    store = MemoryStore()
+    q = JobQueue(store, lanes={"video": 1})
+
+    def handler(job, progress):
+        progress("analyzing", 0, 3)
+        for i in range(3):
+            progress(done=i + 1)
+        return {"case_id": "abc"}
+
+    q.register("video", handler, lane="video")
+    q.start()
+
+    job_id = q.submit("video", "jo", {})
+    job = wait_for(store, job_id)
+
+    status = job_status(job)
+    assert status["state"] == "done"
+    assert status["case_id"] == "abc"
+    assert status["progress"]["frames_done"] == 3
+    assert status["progress"]["frames_total"] == 3
+
+
+def test_failure_is_recorded():
+    store = MemoryStore()
+    q = JobQueue(store, lanes={"image": 1})
+
+    def handler(job, progress):
+        raise ValueError("Invalid image input")
+
+    q.register("image", handler, lane="image")
+    q.start()
+
+    job = wait_for(store, q.submit("image", "jo", {}))
+    assert job["state"] == "failed"
+    assert "Invalid image input" in job["error"]
+
+
+def test_image_lane_not_blocked_by_video():
+    store = MemoryStore()
+    q = JobQueue(store, lanes={"image": 1, "video": 1})
+    release = threading.Event()
+
+    q.register("video", lambda job, progress: release.wait(5), lane="video")
+    q.register("image", lambda job, progress: {"case_id": "img"}, lane="image")
+    q.start()
+
+    video_id = q.submit("video", "jo", {})
+    image_id = q.submit("image", "jo", {})
+
+    assert wait_for(store, image_id)["state"] == "done"
+    assert store.jobs[video_id]["state"] == "queued"
+    release.set()
+    wait_for(store, video_id)
+
+
+def test_unfinished_jobs_resume_on_start():
+    store = MemoryStore([{
+        "job_id": "old", "kind": "image", "lane": "image", "user": "jo",
+        "payload": {}, "state": "analyzing",
+        "progress": {"frames_done": 1, "frames_total": 1},
+        "result": None, "error": None
+    }])
+    q = JobQueue(store, lanes={"image": 1})
+    q.register("image", lambda job, progress: {"case_id": "again"}, lane="image")
+    q.start()
+
+    job = wait_for(store, "old")
+    assert job["state"] == "done"
+    assert job["result"] == {"case_id": "again"}
+
+
+def test_attachment_reaches_handler_but_is_not_persisted():
+    store = MemoryStore()
+    q = JobQueue(store, lanes={"image": 1})
+    seen = {}
+
+    def handler(job, progress):
+        seen["attachment"] = job["attachment"]
+        return {"case_id": "img"}
+
+    q.register("image", handler, lane="image")
+    q.start()
+
+    job = wait_for(store, q.submit("image", "jo", {"upload_path": "x.jpg"}, attachment=b"\xff\xd8"))
+    assert seen["attachment"] == b"\xff\xd8"
+    assert "attachment" not in job
+    assert not q._attachments
+
+
+def _counting_handler(runs, release=None):
+    def handler(job, progress):
+        runs.append(job["job_id"])
+        if release is not None:
+            release.wait(5)
+        return {"case_id": job["job_id"]}
+    return handler
+
+
+def test_running_job_not_taken_by_a_second_worker():
+    store = MemoryStore()
+    runs, release = [], threading.Event()
+
+    first = JobQueue(store, lanes={"video": 1}, heartbeat_sec=0.02, lease_sec=0.2)
+    first.register("video", _counting_handler(runs, release), lane="video")
+    first.start()
+    job_id = first.submit("video", "jo", {})
+
+    # A sibling worker boots (and keeps scanning) while the job runs
+    second = JobQueue(store, lanes={"video": 1}, heartbeat_sec=0.02, lease_sec=0.2)
+    second.register("video", _counting_handler(runs), lane="video")
+    second.start()
+    time.sleep(0.5)     # several leases; the owner keeps heartbeating
+
+    release.set()
+    assert wait_for(store, job_id)["state"] == "done"
+    time.sleep(0.1)
+    assert runs == [job_id]
+    assert store.jobs[job_id]["owner"] == first.owner
+
+
+def test_stale_job_resumed_by_exactly_one_worker():
+    store = MemoryStore([{
+        "job_id": "orphan", "kind": "image", "lane": "image", "user": "jo",
+        "payload": {}, "state": "analyzing",
+        "progress": {"frames_done": 1, "frames_total": 2},
+        "result": None, "error": None,
+        "owner": "crashed", "heartbeat_at": datetime.utcnow() - timedelta(minutes=5)
+    }])
+    runs = []
+    queues = [JobQueue(store, lanes={"image": 2}) for _ in range(4)]
+    for q in queues:
+        q.register("image", _counting_handler(runs), lane="image")
+
+    starters = [threading.Thread(target=q.start) for q in queues]
+    for t in starters:
+        t.start()
+    for t in starters:
+        t.join()
+
+    assert wait_for(store, "orphan")["state"] == "done"
+    time.sleep(0.1)
+    assert runs == ["orphan"]
+    assert store.jobs["orphan"]["owner"] in {q.owner for q in queues}
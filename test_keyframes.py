@@ -0,0 +1,117 @@
+import cv2
+import numpy as np
+
+from core.video.extractor import iter_frames
+from core.video.keyframes import KeyframeSelector
+
+
+def _scene(seed, size=(170, 160)):
+    # Coarse random blocks: a stable difference hash that survives JPEG
+    rng = np.random.default_rng(seed)
+    small = rng.integers(0, 256, (16, 17, 3), dtype=np.uint8)
+    return cv2.resize(small, size, interpolation=cv2.INTER_NEAREST)
+
+
+def _write_clip(path, scenes, fps=30):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"MJPG"), fps, (170, 160))
+    for seed in scenes:
+        writer.write(_scene(seed))
+    writer.release()
+    return str(path)
+
+
+def test_keep_and_skip_reasons():
+    sel = KeyframeSelector(threshold=0.08, min_gap=0.5, max_gap=2.0)
+    a, b, c = _scene(1), _scene(2), _scene(3)
+
+    assert sel.consider(a, 0.0)           # first
+    assert not sel.consider(a, 0.33)      # unchanged
+    assert not sel.consider(b, 0.4)       # changed, but inside min_gap
+    assert sel.consider(b, 0.67)          # scene change
+    assert sel.consider(b, 2.67)          # unchanged, but max_gap reached
+    assert sel.consider(c, 3.0) is False  # changed, inside min_gap again
+
+    stats = sel.stats
+    assert stats["candidates"] == 6
+    assert stats["kept"] == 3 and stats["skipped"] == 3
+    assert stats["keep_reasons"] == {"first": 1, "scene_change": 1, "max_gap": 1}
+    assert stats["skip_reasons"] == {"below_threshold": 1, "min_gap": 2}
+
+
+def test_max_gap_keeps_a_static_scene_sampled():
+    sel = KeyframeSelector(threshold=0.08, max_gap=1.0)
+    frame = _scene(1)
+    kept = [ts for ts in np.arange(0, 4.01, 0.25) if sel.consider(frame, round(ts, 2))]
+
+    assert kept == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert sel.stats["keep_reasons"]["max_gap"] == 4
+
+
+def test_iter_frames_keeps_exact_timestamps_and_counts_skips(tmp_path):
+    # 2 s at 30 fps, cut at 1 s; fps=3 samples every 10th source frame
+    clip = _write_clip(tmp_path / "clip.avi", [1] * 30 + [2] * 30)
+    stats = {}
+    frames = list(iter_frames(
+        clip, fps=3, stats=stats, keyframes={"threshold": 0.08, "min_gap": 0.0, "max_gap": 2.0}
+    ))
+
+    assert [f["timestamp"] for f in frames] == [0.0, 1.0]
+    assert [f["index"] for f in frames] == [0, 1]
+
+    selection = stats["frame_selection"]
+    assert selection["candidates"] == stats["expected_frames"] == 6
+    assert selection["kept"] == 2
+    assert selection["skipped"] == 4
+    assert selection["skip_reasons"]["below_threshold"] == 4
+    assert selection["keep_reasons"] == {"first": 1, "scene_change": 1, "max_gap": 0}
+
+
+def test_iter_frames_without_keyframes_keeps_every_sample(tmp_path):
+    clip = _write_clip(tmp_path / "clip.avi", [1] * 30 + [2] * 30)
+    stats = {}
+    frames = list(iter_frames(clip, fps=3, stats=stats))
+
+    assert [f["timestamp"] for f in frames] == [0.0, 0.33, 0.67, 1.0, 1.33, 1.67]
+    assert stats["frame_selection"] == {"mode": "fixed", "candidates": 6, "kept": 6, "skipped": 0}
+
+
+def test_progress_counts_skipped_candidates(tmp_path):
+    from core.video_pipeline import _candidate_progress
+
+    clip = _write_clip(tmp_path / "clip.avi", [1] * 30 + [2] * 30)
+    stats = {}
+    frames = iter_frames(clip, fps=3, stats=stats, keyframes={"threshold": 0.08, "max_gap": 2.0})
+
+    seen = []
+    report = _candidate_progress(lambda state, done, total: seen.append((done, total)),
+                                 stats["frame_selection"])
+    for analyzed, _ in enumerate(frames, start=1):
+        report(done=analyzed, total=stats["expected_frames"])
+
+    # Kept frames at 0.0 s and 1.0 s; the second follows two skipped samples
+    assert seen == [(1, 6), (4, 6)]
+
+
+def test_grab_path_decodes_only_sampled_frames(tmp_path):
+    clip = _write_clip(tmp_path / "clip.avi", [1] * 30 + [2] * 30)
+
+    cap = cv2.VideoCapture(clip)
+    reference = []
+    while True:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        reference.append(frame)
+    cap.release()
+
+    stats = {}
+    frames = list(iter_frames(clip, fps=3, stats=stats))
+
+    # Same pixels as a full read() of every 10th frame
+    assert len(frames) == 6
+    for item, idx in zip(frames, range(0, 60, 10)):
+        assert np.array_equal(item["frame"], reference[idx])
+
+    decode = stats["decode"]
+    assert decode["source_frames"] == 60
+    assert decode["decoded_frames"] == decode["kept_frames"] == 6
@@ -0,0 +1,117 @@
+import numpy as np
+
+from core import license_plate
+from core.license_plate import detect_license_plates, vehicle_roi
+from core.video.license_plate import consolidate_plates
+
+
+def _read(plate, conf, ts, vehicle=None):
+    return {
+        "plate": plate, "confidence": conf, "timestamp_sec": ts,
+        "frame": f"frame_{int(ts * 3):04d}.jpg", "frame_index": int(ts * 3), "vehicle": vehicle
+    }
+
+
+def test_exact_repeats_merge():
+    plates = consolidate_plates([
+        _read("ABC 123", 0.7, 0.0),
+        _read("abc-123", 0.9, 4.0),
+        _read("ABC123", 0.8, 12.0),
+    ])
+
+    assert len(plates) == 1
+    p = plates[0]
+    assert p["plate"] == "ABC123"
+    assert p["reads"] == 3
+    assert (p["first_seen_sec"], p["last_seen_sec"]) == (0.0, 12.0)
+    assert p["confidence"] == 0.9 and p["frame_index"] == 12
+    assert p["variants"] == []
+
+
+def test_one_character_ocr_noise_merges():
+    plates = consolidate_plates([
+        _read("ABC123", 0.9, 1.0, "Vehicle-1"),
+        _read("A8C123", 0.5, 1.33, "Vehicle-1"),
+        _read("ABC12", 0.4, 1.67),
+    ])
+
+    assert len(plates) == 1
+    assert plates[0]["plate"] == "ABC123"
+    assert plates[0]["variants"] == ["A8C123", "ABC12"]
+    assert plates[0]["vehicles"] == ["Vehicle-1"]
+
+
+def test_distinct_plates_do_not_chain():
+    # Each step is one edit away from the previous one, but the ends are not
+    plates = consolidate_plates([
+        _read("ABC123", 0.9, 0.0),
+        _read("ABC128", 0.8, 0.33),
+        _read("ABD128", 0.7, 0.67),
+    ])
+    assert len(plates) == 2
+    assert {p["plate"] for p in plates} == {"ABC123", "ABD128"}
+    assert next(p for p in plates if p["plate"] == "ABC123")["variants"] == ["ABC128"]
+
+
+def test_near_miss_on_other_vehicle_or_far_in_time_stays_separate():
+    plates = consolidate_plates([
+        _read("ABC123", 0.9, 0.0, "Vehicle-1"),
+        _read("ABC128", 0.8, 0.33, "Vehicle-2"),
+        _read("XYZ789", 0.9, 0.0),
+        _read("XYZ780", 0.8, 30.0),
+    ])
+    assert sorted(p["plate"] for p in plates) == ["ABC123", "ABC128", "XYZ780", "XYZ789"]
+
+
+# ---------- image plate OCR on vehicle regions ----------
+
+class StubReader:
+    """Reads a plate wherever a letterboxed crop has bright pixels."""
+
+    def __init__(self):
+        self.batches = []
+
+    def readtext_batched(self, canvases, batch_size=1):
+        self.batches.append([c.shape for c in canvases])
+        out = []
+        for canvas in canvases:
+            ys, xs = np.nonzero(canvas[:, :, 0] > 200)
+            if not len(xs):
+                out.append([])
+                continue
+            bbox = [[xs.min(), ys.min()], [xs.max() + 1, ys.min()],
+                    [xs.max() + 1, ys.max() + 1], [xs.min(), ys.max() + 1]]
+            out.append([(bbox, "ab 1234", 0.9)])
+        return out
+
+
+def test_roi_clamped_to_image():
+    assert vehicle_roi([-20, -10, 50, 40], (100, 100, 3)) == (0, 10, 55, 44)
+    assert vehicle_roi([60, 60, 120, 130], (100, 100, 3)) == (55, 88, 100, 100)
+
+
+def test_roi_is_padded_lower_body():
+    # Bottom 60% of the box, padded by 8% of its size on every other side
+    assert vehicle_roi([100, 100, 200, 200], (400, 400, 3)) == (92, 140, 208, 208)
+
+
+def test_plates_mapped_to_their_vehicle(monkeypatch):
+    reader = StubReader()
+    monkeypatch.setattr(license_plate, "get_reader", lambda: reader)
+
+    img = np.zeros((300, 400, 3), np.uint8)
+    img[40:50, 40:60] = 255        # Vehicle-1 roof sign: above its ROI
+    img[220:240, 250:300] = 255    # Vehicle-2 plate
+    vehicles = [
+        {"id": "Vehicle-1", "box": [20, 30, 120, 130]},
+        {"id": "Vehicle-2", "box": [220, 140, 330, 260]},
+    ]
+
+    plates = detect_license_plates(img, vehicles=vehicles)
+
+    assert reader.batches == [[(240, 480, 3), (240, 480, 3)]]    # one batched call
+    assert len(plates) == 1
+    plate = plates[0]
+    assert plate["plate"] == "AB1234" and plate["vehicle"] == "Vehicle-2"
+    # Canvas coordinates are mapped back to the full image
+    assert np.allclose(plate["box"], [250, 220, 300, 240], atol=1)
@@ -0,0 +1,52 @@
+import pytest
+
+from core.metrics import MetricsRegistry, metrics, timed, timed_iter
+
+
+def _value(text, line_prefix):
+    for line in text.splitlines():
+        if line.startswith(line_prefix + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{line_prefix} not in output")
+
+
+def test_histogram_buckets_are_cumulative():
+    reg = MetricsRegistry()
+    h = reg.histogram("t_seconds", "test", labels=("stage",), buckets=(0.1, 1))
+    for v in (0.05, 0.5, 0.5, 3):
+        h.observe(v, stage="detect")
+
+    text = reg.render()
+    assert "# TYPE t_seconds histogram" in text
+    assert _value(text, 't_seconds_bucket{stage="detect",le="0.1"}') == 1
+    assert _value(text, 't_seconds_bucket{stage="detect",le="1"}') == 3
+    assert _value(text, 't_seconds_bucket{stage="detect",le="+Inf"}') == 4
+    assert _value(text, 't_seconds_count{stage="detect"}') == 4
+    assert _value(text, 't_seconds_sum{stage="detect"}') == pytest.approx(4.05)
+
+
+def test_gauges_counters_and_escaping():
+    reg = MetricsRegistry()
+    reg.counter("t_total", "test", labels=("kind",)).inc(kind='say "hi"')
+    reg.gauge("t_depth", "test", lambda: {("video",): 3, ("image",): None}, labels=("lane",))
+    reg.gauge("t_broken", "test", lambda: 1 / 0)
+
+    text = reg.render()
+    assert _value(text, 't_total{kind="say \\"hi\\""}') == 1
+    assert _value(text, 't_depth{lane="video"}') == 3
+    assert 'lane="image"' not in text     # unknown values are skipped
+    assert "t_broken" not in text         # a failing gauge does not break the scrape
+
+
+def test_timed_stages_record_into_default_registry():
+    with timed("unit_stage"):
+        pass
+    with pytest.raises(ValueError):
+        with timed("unit_stage"):
+            raise ValueError()
+    assert list(timed_iter(iter([1, 2, 3]), "unit_iter")) == [1, 2, 3]
+
+    text = metrics.render()
+    assert _value(text, 'oracle_stage_seconds_count{stage="unit_stage"}') == 2
+    assert _value(text, 'oracle_stage_errors_total{stage="unit_stage"}') == 1
+    assert _value(text, 'oracle_stage_seconds_count{stage="unit_iter"}') == 1
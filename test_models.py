@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+from core.models import ModelRegistry
+
+
+def test_concurrent_first_calls_load_once():
+    models = ModelRegistry()
+    loads = []
+    gate = threading.Event()
+
+    def loader():
+        loads.append(1)
+        gate.wait(5)        # hold the load so every caller arrives mid-load
+        return object()
+
+    models.register("detector", loader)
+    start = threading.Barrier(8)
+    got = []
+
+    def _get():
+        start.wait()
+        got.append(models.get("detector"))
+
+    threads = [threading.Thread(target=_get) for _ in range(8)]
+    for t in threads:
+        t.start()
+    gate.set()
+    for t in threads:
+        t.join()
+
+    assert len(loads) == 1
+    assert len(got) == 8 and all(m is got[0] for m in got)
+
+
+def test_status_reports_each_state():
+    models = ModelRegistry()
+    loading, release = threading.Event(), threading.Event()
+
+    def slow():
+        loading.set()
+        release.wait(5)
+        return "model"
+
+    models.register("captioner", slow)
+    assert models.status()["captioner"] == {"state": "not_loaded", "load_sec": None, "error": None}
+
+    t = models.warm_up(["captioner"])
+    loading.wait(5)
+    assert models.status()["captioner"]["state"] == "loading"
+    assert not models.is_loaded("captioner")
+
+    release.set()
+    t.join()
+    status = models.status()["captioner"]
+    assert status["state"] == "ready" and status["load_sec"] >= 0
+    assert models.is_loaded("captioner")
+
+
+def test_loader_failure_is_recorded_and_raised():
+    models = ModelRegistry()
+    attempts = []
+
+    def broken():
+        attempts.append(1)
+        if len(attempts) == 1:
+            raise OSError("weights not found")
+        return "model"
+
+    models.register("human", broken)
+    with pytest.raises(OSError, match="weights not found"):
+        models.get("human")
+    assert models.status()["human"] == {"state": "failed", "load_sec": None, "error": "weights not found"}
+
+    # Not stuck: the next caller retries the load
+    assert models.get("human") == "model"
+    assert models.status()["human"]["state"] == "ready"
+    assert models.status()["human"]["error"] is None
+
+
+def test_unknown_model_raises():
+    with pytest.raises(KeyError):
+        ModelRegistry().get("missing")
@@ -0,0 +1,85 @@
+import os
+
+import numpy as np
+
+from core.video.frame_pipeline import analyze_frames
+from core.video.parallel import FramePool, shard_size
+
+
+class _Detector:
+    def detect(self, frame):
+        level = float(frame.mean())
+        return [{"name": "car", "conf": 0.9, "box": [level, 10.0, level + 20, 30.0]}]
+
+    def detect_batch(self, frames, batch_size=8):
+        return [self.detect(f) for f in frames]
+
+
+class _Captioner:
+    def caption_batch(self, frames, mode="short", batch_size=8):
+        return [f"frame mean {int(f.mean())}" for f in frames]
+
+
+class FakePipeline:
+    """Deterministic stand-in for Pipeline: severity and plates follow pixels."""
+
+    def __init__(self, **config):
+        self.detector = _Detector()
+        self.captioner = _Captioner()
+
+    def analyse(self, frame, save_annotated=True, objects=None, raw_caption=None):
+        score = int(frame.mean()) % 100
+        return {
+            "scene": {"summary": raw_caption},
+            "entities": {"vehicles": [{"id": "Vehicle-1", "bounding_box": objects[0]["box"]}]},
+            "analysis": {
+                "severity": {"score": score},
+                "license_plates": [{"plate": "AB12CD"}] if score % 7 == 0 else []
+            }
+        }
+
+
+def _frames(n):
+    rng = np.random.default_rng(3)
+    for i in range(n):
+        frame = rng.integers(0, 255, (48, 64, 3), dtype=np.uint8)
+        # Slow drift in brightness so severity levels change occasionally
+        frame[:] = np.clip(frame // 4 + (i * 7) % 200, 0, 255)
+        yield {"frame": frame, "timestamp": round(i / 3, 3), "index": i}
+
+
+def _read_dir(path):
+    return {name: open(os.path.join(path, name), "rb").read() for name in sorted(os.listdir(path))}
+
+
+def test_shard_size_aligns_batches_and_detect_interval():
+    assert shard_size(8, 1) == 16
+    assert shard_size(8, 3) == 24
+    assert shard_size(4, 5) == 20
+    assert shard_size(32, 1) == 32
+
+
+def test_pool_matches_sequential(tmp_path):
+    seq_dir, par_dir = tmp_path / "seq", tmp_path / "par"
+    seq_stats, par_stats = {}, {}
+
+    sequential = analyze_frames(
+        _frames(70), FakePipeline(), str(seq_dir),
+        batch_size=4, detect_interval=2, stats=seq_stats
+    )
+
+    pool = FramePool({}, workers=2, threads=1, factory=FakePipeline)
+    try:
+        parallel = pool.analyze_frames(
+            _frames(70), str(par_dir),
+            batch_size=4, detect_interval=2, stats=par_stats
+        )
+    finally:
+        pool.shutdown()
+
+    assert [f["timestamp_sec"] for f in parallel] == sorted(f["timestamp_sec"] for f in parallel)
+    assert parallel == sequential
+    assert _read_dir(par_dir) == _read_dir(seq_dir)
+
+    par_stats.pop("frame_workers")
+    assert par_stats == seq_stats
@@ -0,0 +1,36 @@
+import struct
+
+from core.video.remux import is_faststart, playback_path, faststart_path, remux_faststart
+
+
+def _box(kind, payload=b"", large=False):
+    if large:
+        return struct.pack(">I4sQ", 1, kind, 16 + len(payload)) + payload
+    return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def test_detects_moov_position(tmp_path):
+    ftyp = _box(b"ftyp", b"isom\x00\x00\x02\x00")
+    front = tmp_path / "front.mp4"
+    front.write_bytes(ftyp + _box(b"moov", b"\x00" * 32) + _box(b"mdat", b"\x01" * 64))
+    back = tmp_path / "back.mp4"
+    back.write_bytes(ftyp + _box(b"free", b"\x00" * 4) + _box(b"mdat", b"\x01" * 64) + _box(b"moov"))
+    large = tmp_path / "large.mp4"
+    large.write_bytes(ftyp + _box(b"wide", b"", large=True) + _box(b"moov"))
+
+    assert is_faststart(str(front))
+    assert not is_faststart(str(back))
+    assert is_faststart(str(large))
+
+    # Already faststart: no copy is made and the upload is served as-is
+    assert remux_faststart(str(front)) is None
+    assert playback_path(str(front)) == str(front)
+
+
+def test_playback_prefers_remux(tmp_path):
+    upload = tmp_path / "abc_clip.mov"
+    upload.write_bytes(b"")
+    assert playback_path(str(upload)) == str(upload)
+
+    (tmp_path / "abc_clip.faststart.mp4").write_bytes(b"")
+    assert playback_path(str(upload)) == faststart_path(str(upload))
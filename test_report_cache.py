@@ -0,0 +1,56 @@
+import os
+import threading
+import time
+
+from core.report_cache import PdfCache
+
+
+def _case(summary="two vehicles"):
+    return {"case_id": "c1", "user": "jo", "type": "video", "scene": {"summary": summary}}
+
+
+def _cache(tmp_path, calls, version="1"):
+    def render(case, path):
+        calls.append(case["case_id"])
+        time.sleep(0.05)
+        with open(path, "wb") as f:
+            f.write(b"%PDF-1.4 " + case["scene"]["summary"].encode())
+
+    cache = PdfCache(str(tmp_path))
+    cache.register("video", render, version)
+    return cache
+
+
+def test_concurrent_downloads_render_once(tmp_path):
+    calls = []
+    cache = _cache(tmp_path, calls)
+    results = []
+
+    threads = [threading.Thread(target=lambda: results.append(cache.get(_case()))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert calls == ["c1"]
+    assert len(set(results)) == 1
+    path, etag = results[0]
+    assert open(path, "rb").read() == b"%PDF-1.4 two vehicles"
+    assert [f for f in os.listdir(tmp_path) if f.endswith(".part")] == []
+
+
+def test_rebuilt_only_when_case_or_template_changes(tmp_path):
+    calls = []
+    (tmp_path / "c1.pdf").write_bytes(b"legacy")
+
+    first, etag = _cache(tmp_path, calls).get(_case())
+    assert _cache(tmp_path, calls).get(_case()) == (first, etag)
+    assert len(calls) == 1
+
+    changed, changed_etag = _cache(tmp_path, calls).get(_case("three vehicles"))
+    bumped, bumped_etag = _cache(tmp_path, calls, version="2").get(_case("three vehicles"))
+    assert len(calls) == 3
+    assert len({etag, changed_etag, bumped_etag}) == 3
+
+    # Only the current version is kept
+    assert os.listdir(tmp_path) == [os.path.basename(bumped)]
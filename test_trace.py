@@ -0,0 +1,82 @@
+import time
+
+import pytest
+
+from core.metrics import timed
+from core.trace import tracing, span, waterfall
+
+
+def test_span_tree_records_stages_and_attrs():
+    with tracing("image", bytes=10) as t:
+        with timed("decode", bytes=10):
+            pass
+        with span("frame", index=3):
+            with timed("detect", shape=[4, 4]):
+                pass
+
+    trace = t.to_dict()
+    names = [(s["name"], s["depth"]) for s in trace["spans"]]
+    assert names == [("image", 0), ("decode", 1), ("frame", 1), ("detect", 2)]
+    detect = trace["spans"][3]
+    assert detect["parent"] == 2 and detect["attrs"] == {"shape": [4, 4]}
+    assert trace["total_ms"] >= detect["dur_ms"] >= 0
+    assert trace["profile"] is None
+
+
+def test_spans_are_noops_without_a_trace():
+    with span("frame", index=1):
+        with timed("detect"):
+            pass
+
+
+def test_failed_stage_is_marked():
+    with pytest.raises(ValueError):
+        with tracing("video") as t:
+            with timed("ocr"):
+                raise ValueError()
+    assert [s.get("error", False) for s in t.spans] == [True, True]
+
+
+def test_profile_kept_only_for_slow_cases():
+    with tracing("video", profile_after=0.0) as slow:
+        time.sleep(0.05)
+    assert slow.profile["samples"] > 0
+    assert any("test_trace.py" in s["stack"] for s in slow.profile["stacks"])
+
+    with tracing("video", profile_after=60) as fast:
+        pass
+    assert fast.profile is None
+
+
+def test_waterfall_keeps_top_level_and_slowest_spans():
+    spans = [{"name": "video", "parent": None, "depth": 0, "start_ms": 0, "dur_ms": 100}]
+    spans.append({"name": "analyze_frames", "parent": 0, "depth": 1, "start_ms": 0, "dur_ms": 90})
+    for i in range(10):
+        spans.append({"name": "frame", "parent": 1, "depth": 2, "start_ms": i * 9,
+                      "dur_ms": 20 if i == 7 else 5, "attrs": {"index": i}})
+
+    view = waterfall({"total_ms": 100, "spans": spans}, max_rows=3)
+    assert [r["name"] for r in view["rows"]] == ["video", "analyze_frames", "frame"]
+    assert view["rows"][2]["attrs"]["index"] == 7
+    assert view["hidden"] == 9
+    frames = next(st for st in view["stages"] if st["name"] == "frame")
+    assert frames["count"] == 10 and frames["max_ms"] == 20
+
+
+def test_span_memory_reflects_allocations_inside_it():
+    import numpy as np
+
+    with tracing("video") as t:
+        with span("allocate"):
+            block = np.ones(64 * 1024 * 1024, np.uint8)     # 64 MB, touched
+        with span("idle"):
+            pass
+    del block
+
+    root, allocate, idle = t.spans
+    if allocate.get("rss_delta_mb") is None:
+        pytest.skip("resident memory not available on this platform")
+    assert allocate["rss_delta_mb"] >= 48
+    assert abs(idle["rss_delta_mb"]) < 16
+    assert root["rss_delta_mb"] >= 48
+    assert t.to_dict()["rss_delta_mb"] == root["rss_delta_mb"]
@@ -0,0 +1,61 @@
+# verify_case.py
+# Re-verifies the chain of custody of stored video cases.
+#
+#   python verify_case.py <case_id> [<case_id> ...]      root + evidence frames
+#   python verify_case.py <case_id> --frame frame_0012.jpg   one frame (log-size proof)
+#   python verify_case.py <case_id> --full                 also re-hash the video
+
+import sys
+import argparse
+
+from dotenv import load_dotenv
+
+from core.db import MongoDB
+from core.video.hash_utils import verify_custody
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify stored case integrity")
+    parser.add_argument("case_ids", nargs="+")
+    parser.add_argument("--frame", action="append", help="verify only this evidence frame")
+    parser.add_argument("--full", action="store_true", help="re-hash the original video too")
+    args = parser.parse_args()
+
+    load_dotenv()
+    db = MongoDB()
+    failed = False
+
+    for case_id in args.case_ids:
+        case = db.cases.find_one({"case_id": case_id}, {"_id": 0})
+        if not case or "chain_of_custody" not in case:
+            print(f"[{case_id}] not found or not a video case")
+            failed = True
+            continue
+        db.load_payload(case, ("chain_of_custody.frame_hashes", "chain_of_custody.frame_proofs"))
+
+        custody = case["chain_of_custody"]
+        video_path = case.get("video", {}).get("path") if args.full else None
+        report = verify_custody(
+            custody,
+            case["evidence"]["frames_dir"],
+            video_path=video_path,
+            frames=args.frame
+        )
+
+        if report["merkle_root"] is None:
+            print(f"[{case_id}] no Merkle root recorded (case predates frame proofs)")
+        else:
+            print(f"[{case_id}] merkle root {'OK' if report['merkle_root'] else 'MISMATCH'}")
+        for name, ok in report["frames"].items():
+            print(f"[{case_id}]   {name}: {'OK' if ok else 'FAILED'}")
+        if report["video"] is not None:
+            print(f"[{case_id}] video {'OK' if report['video'] else 'MISMATCH'}")
+
+        print(f"[{case_id}] {'VERIFIED' if report['ok'] else 'INTEGRITY FAILURE'}")
+        failed = failed or not report["ok"]
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()